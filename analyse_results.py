@@ -2,6 +2,7 @@
 import json
 import glob
 from src.detector import EduHallucinationDetector
+from src.replay import normalize_record
 
 def analyze_test_results():
     """Analyze the results from our hallucination tests"""
@@ -21,17 +22,21 @@ def analyze_test_results():
     # Initialize detector
     detector = EduHallucinationDetector()
     
-    # Analyze each result
+    # Score every result in one batch call; older files store `type`,
+    # dataset runs `subcategory`
+    records = [normalize_record(result) for result in results]
+    batch = detector.detect_batch(
+        [record['question'] for record in records],
+        [record['ai_answer'] for record in records],
+        [record['expected_answer'] for record in records],
+        [record['question_type'] for record in records]
+    )
+    
     hallucination_count = 0
     detailed_results = []
     
-    for result in results:
-        detection = detector.detect_hallucination(
-            question=result['question'],
-            ai_response=result['ai_answer'],
-            expected_answer=str(result['expected_answer']),
-            question_type=result['type']
-        )
+    for i, result in enumerate(results):
+        detection = {key: column[i] for key, column in batch.items()}
         
         if detection['hallucination_detected']:
             hallucination_count += 1
@@ -0,0 +1,86 @@
+# build_question_bank.py
+import argparse
+import json
+import os
+import time
+
+from src.dataset_loader import DatasetSource, DEFAULT_DATASET_PATH
+from src.question_bank import QuestionIndex, NEAR_DUPLICATE_THRESHOLD
+
+
+def dataset_records(path):
+    """Questions from a dataset file or directory of JSONL shards"""
+    for question_data, category, subcategory in DatasetSource(path):
+        yield {
+            "source": path,
+            "q": question_data["q"],
+            "a": question_data["a"],
+            "category": category,
+            "subcategory": subcategory,
+            "difficulty": question_data.get("difficulty", "medium")
+        }
+
+
+def comprehensive_records():
+    """Questions hard-coded in comprehensive_test.py"""
+    from comprehensive_test import create_comprehensive_dataset
+    for item in create_comprehensive_dataset():
+        yield {"source": "comprehensive_test", "q": item["q"], "a": item["a"], "category": item["cat"]}
+
+
+def evaluation_records():
+    """Questions hard-coded in run_evaluations.py"""
+    from run_evaluations import create_evaluation_dataset
+    for item in create_evaluation_dataset():
+        yield {"source": "run_evaluations", "q": item["question"], "a": item["correct_answer"],
+               "category": item["category"]}
+
+
+def main():
+    """Find duplicate questions across sources and merge them into one bank"""
+    parser = argparse.ArgumentParser(description="Build a deduplicated question bank from every question source")
+    parser.add_argument("--dataset", action="append", default=[],
+                        help=f"dataset JSON / JSONL shards to include, in priority order (default: {DEFAULT_DATASET_PATH})")
+    parser.add_argument("--no-scripts", action="store_true",
+                        help="skip the questions hard-coded in comprehensive_test.py and run_evaluations.py")
+    parser.add_argument("--threshold", type=float, default=NEAR_DUPLICATE_THRESHOLD,
+                        help="estimated Jaccard similarity at which questions count as near-duplicates")
+    parser.add_argument("--output", default="data/question_bank.jsonl",
+                        help="where the merged bank is written, one question per line")
+    args = parser.parse_args()
+
+    index = QuestionIndex(threshold=args.threshold)
+    started = time.perf_counter()
+    for path in args.dataset or [DEFAULT_DATASET_PATH]:
+        index.extend(dataset_records(path))
+    if not args.no_scripts:
+        index.extend(comprehensive_records())
+        index.extend(evaluation_records())
+
+    exact = index.exact_duplicates()
+    near = index.near_duplicates()
+    bank = index.merge()
+    elapsed = time.perf_counter() - started
+
+    print(f"Indexed {len(index.records)} questions in {elapsed:.1f}s")
+    print(f"Exact duplicate groups: {len(exact)}")
+    print(f"Near-duplicate pairs: {len(near)}")
+    for i, j, similarity in near[:20]:
+        merged = "merged" if index.answers_agree(i, j) else "kept apart, answers differ"
+        print(f"  {similarity:.2f}  {index.records[i]['q']!r} ~ {index.records[j]['q']!r} ({merged})")
+
+    conflicts = [entry for entry in bank if not entry["answers_agree"]]
+    print(f"Canonical questions: {len(bank)} ({len(index.records) - len(bank)} merged away)")
+    for entry in conflicts:
+        answers = ", ".join(f"{source['source']}: {source['a']!r}" for source in entry["sources"])
+        print(f"  Answers disagree for {entry['id']} {entry['q']!r}: {answers}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        for entry in bank:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    print(f"\nQuestion bank saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
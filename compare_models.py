@@ -0,0 +1,167 @@
+# compare_models.py
+import argparse
+import glob
+import json
+import os
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from src.cache import ResponseCache, CACHE_MODES, DEFAULT_CACHE_PATH
+from src.dataset_loader import DatasetSource, DEFAULT_DATASET_PATH, parse_shard
+from src.fanout import FanOutRunner, results_table, comparison_matrix
+from src.question_bank import QuestionIndex
+from src.providers import (make_provider, parse_model_spec, DEFAULT_PROVIDER_CONCURRENCY,
+                           DEFAULT_PROVIDER_LIMITS, PROVIDERS)
+from src.rate_limit import RateLimiter
+from src.storage import write_results_parquet, PARQUET_FILE
+from src.telemetry import Telemetry, EXPORT_FORMATS
+
+load_dotenv()
+
+
+def parse_limit(spec: str):
+    """Parse "provider=N" into (provider, N)"""
+    provider, sep, value = spec.partition('=')
+    if not sep or provider not in PROVIDERS:
+        raise argparse.ArgumentTypeError(f"expected provider=N with provider in {PROVIDERS}, got {spec!r}")
+    try:
+        return provider, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a number: {value!r}")
+
+
+def build_providers(args, dataset):
+    """One provider per model; models of the same provider share its rate limiter"""
+    rpm, tpm = dict(args.rpm), dict(args.tpm)
+    limiters = {}
+    stub_answers = None
+    providers = []
+    for spec in args.model:
+        name, _ = parse_model_spec(spec)
+        if name not in limiters:
+            requests_per_minute, tokens_per_minute = DEFAULT_PROVIDER_LIMITS[name]
+            limiters[name] = RateLimiter(rpm.get(name, requests_per_minute), tpm.get(name, tokens_per_minute))
+
+        options = {'rate_limiter': limiters[name], 'concurrency': args.concurrency}
+        if name == 'stub':
+            # Stub models answer every dataset question correctly after --stub-latency
+            if stub_answers is None:
+                stub_answers = {question_data['q']: question_data['a'] for question_data, _, _ in dataset}
+            options.update(answers=stub_answers, latency=args.stub_latency)
+        providers.append(make_provider(spec, **options))
+    return providers
+
+
+def load_question_bank(path):
+    """QuestionIndex of a merged question bank, or None when there is none"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return QuestionIndex.from_bank(json.loads(line) for line in f if line.strip())
+
+
+def main():
+    """Run the dataset against several models and compare them side by side"""
+    parser = argparse.ArgumentParser(description="Ask every dataset question to several models at once and compare them")
+    parser.add_argument("--model", action="append", required=True, metavar="PROVIDER:MODEL",
+                        help="model to compare, e.g. openai:gpt-4.1 or anthropic:claude-sonnet-4-5 (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_PROVIDER_CONCURRENCY,
+                        help="maximum number of requests in flight per model")
+    parser.add_argument("--rpm", type=parse_limit, action="append", default=[], metavar="PROVIDER=N",
+                        help="requests-per-minute limit for one provider (repeatable)")
+    parser.add_argument("--tpm", type=parse_limit, action="append", default=[], metavar="PROVIDER=N",
+                        help="tokens-per-minute limit for one provider (repeatable)")
+    parser.add_argument("--cache-mode", choices=CACHE_MODES, default="readwrite",
+                        help="response cache behaviour (replay never calls the APIs)")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH,
+                        help="SQLite file holding cached model responses")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH,
+                        help="dataset JSON, JSONL file or glob, or a directory of JSONL shards")
+    parser.add_argument("--category", action="append", default=[],
+                        help="only test this category (repeatable)")
+    parser.add_argument("--subcategory", action="append", default=[],
+                        help="only test this subcategory (repeatable)")
+    parser.add_argument("--difficulty", action="append", default=[],
+                        help="only test this difficulty (repeatable)")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="i/N",
+                        help="only test shard i of N")
+    parser.add_argument("--question-bank", default="data/question_bank.jsonl",
+                        help="merged bank from build_question_bank.py; reworded questions get its IDs when present")
+    parser.add_argument("--stub-latency", type=float, default=0.05,
+                        help="seconds each stub:<name> model takes per answer")
+    parser.add_argument("--yes", action="store_true",
+                        help="don't ask for confirmation before calling paid APIs")
+    parser.add_argument("--export-metrics", choices=EXPORT_FORMATS, action="append", default=[],
+                        help="also write run timings as Prometheus text (metrics.prom) or a Chrome trace (trace.json)")
+    args = parser.parse_args()
+
+    print("EduGuard Model Comparison")
+    print("=" * 70)
+
+    if not glob.glob(args.dataset):
+        print("ERROR: Dataset not found. Please run create_dataset.py first.")
+        return
+    try:
+        for spec in args.model:
+            parse_model_spec(spec)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return
+
+    dataset = DatasetSource(args.dataset, args.category, args.subcategory, args.difficulty, args.shard)
+    paid = [spec for spec in args.model if not spec.startswith('stub:')]
+    if paid and not args.yes:
+        questions = dataset.total if dataset.total is not None else "the matching"
+        response = input(f"This will ask {questions} questions to {', '.join(paid)}. Continue? (y/n): ")
+        if response.lower() != 'y':
+            print("Comparison cancelled.")
+            return
+
+    runner = FanOutRunner(
+        build_providers(args, dataset),
+        cache=ResponseCache(args.cache_path, mode=args.cache_mode),
+        telemetry=Telemetry(trace='chrome-trace' in args.export_metrics),
+        questions=load_question_bank(args.question_bank)
+    )
+    print(f"Models: {', '.join(provider.model_id for provider in runner.providers)}")
+    print(f"Dataset: {dataset.path}")
+    print("=" * 70)
+
+    rows = runner.run(dataset)
+    if not rows:
+        print("No questions matched.")
+        return
+    summary = runner.summary()
+    performance = runner.telemetry.summary()
+
+    run_dir = os.path.join("results", "comparisons", f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(run_dir, exist_ok=True)
+    # One row per (question_id, model)
+    results_table(rows).to_csv(os.path.join(run_dir, "results.csv"))
+    write_results_parquet(rows, os.path.join(run_dir, PARQUET_FILE))
+    comparison_matrix(rows).to_csv(os.path.join(run_dir, "comparison.csv"))
+    with open(os.path.join(run_dir, "summary.json"), "w") as f:
+        json.dump({'models': summary, 'performance': performance}, f, indent=2)
+    exported = runner.telemetry.export(run_dir, args.export_metrics)
+
+    print(f"\n{'MODEL':40} | {'QUESTIONS':>9} | {'RATE':>7} | {'ERRORS':>6} | {'P50':>8} | {'P95':>8}")
+    print("-" * 92)
+    for model_id, stats in summary.items():
+        overall = stats['overall']
+        print(f"{model_id:40} | {overall['total_questions']:9} | {overall['hallucination_rate']:6.2f}% | "
+              f"{stats['errors']:6} | {stats['latency_s']['p50']:7.3f}s | {stats['latency_s']['p95']:7.3f}s")
+    print(f"\nElapsed: {performance['elapsed_s']}s for {performance['questions']} questions "
+          f"x {len(summary)} models")
+
+    print("\nRESULTS SAVED:")
+    print(f"  Directory: {run_dir}")
+    print(f"  - Results by (question_id, model): results.csv, {PARQUET_FILE}")
+    print(f"  - Hallucinations per question and model: comparison.csv")
+    print(f"  - Per-model summary: summary.json")
+    for path in exported:
+        print(f"  - Metrics export: {os.path.basename(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,18 @@
 # comprehensive_test.py
+import argparse
 import json
 from openai import OpenAI
 from dotenv import load_dotenv
 import os
 from src.detector import EduHallucinationDetector
-import time
+from src.rate_limit import RateLimiter, estimate_tokens
+from src.cache import ResponseCache, CACHE_MODES, DEFAULT_CACHE_PATH
+from src.telemetry import Telemetry, EXPORT_FORMATS
 from datetime import datetime
+import time
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+rate_limiter = RateLimiter()
 
 def create_comprehensive_dataset():
     """Create a comprehensive test dataset across multiple categories"""
@@ -38,12 +42,20 @@ def create_comprehensive_dataset():
         {"q": "What's the last digit of pi?", "a": "no last digit", "cat": "trick"},
     ]
 
-def run_comprehensive_test():
+def run_comprehensive_test(cache: ResponseCache = None, export_metrics=(), client=None):
     """Run comprehensive hallucination test"""
     
+    # Created here rather than at import, so the question lists can be
+    # imported without an API key; retries are handled by our RateLimiter
+    client = client or OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
+    cache = cache or ResponseCache(mode='off')
     dataset = create_comprehensive_dataset()
     detector = EduHallucinationDetector()
     
+    # Timing spans for model calls and detection checks
+    telemetry = Telemetry(trace='chrome-trace' in export_metrics)
+    detector.telemetry = telemetry
+    
     print("Running Comprehensive Hallucination Test")
     print("=" * 70)
     
@@ -57,25 +69,35 @@ def run_comprehensive_test():
         
         # Get AI response
         try:
-            response = client.responses.create(
-                model="gpt-4.1",
-                input=f"{item['q']} Give a direct, concise answer."
-            )
+            prompt = f"{item['q']} Give a direct, concise answer."
             
-            ai_answer = response.output_text.strip()
+            def query():
+                with telemetry.span('model_call'):
+                    response = rate_limiter.call(
+                        client.responses.create,
+                        model="gpt-4.1",
+                        input=prompt,
+                        estimated_tokens=estimate_tokens(prompt)
+                    )
+                telemetry.add_usage(getattr(response, 'usage', None))
+                return response.output_text
+            
+            started = time.perf_counter()
+            ai_answer = cache.fetch("gpt-4.1", prompt, query).strip()
             print(f"AI Answer: {ai_answer}")
             print(f"Expected: {item['a']}")
             
             # Detect hallucination
-            detection = detector.detect_hallucination(
-                question=item['q'],
-                ai_response=ai_answer,
-                expected_answer=item['a'],
-                question_type=item['cat']
-            )
+            with telemetry.span('detection'):
+                detection = detector.detect_hallucination(
+                    question=item['q'],
+                    ai_response=ai_answer,
+                    expected_answer=item['a'],
+                    question_type=item['cat']
+                )
             
             # Manual verification for some categories
-            is_hallucination = detection['hallucination_detected']
+            is_hallucination = detection.hallucination_detected
             
             # For trick questions, check if AI recognized the trick
             if item['cat'] == 'trick':
@@ -90,10 +112,12 @@ def run_comprehensive_test():
                 "ai_answer": ai_answer,
                 "category": item['cat'],
                 "hallucination_detected": is_hallucination,
-                "detection_details": detection['detection_details']
+                "detection_details": detection.detection_details
             }
             
             all_results.append(result)
+            telemetry.record('question', time.perf_counter() - started, started)
+            telemetry.count_question()
             
             # Track by category
             if item['cat'] not in hallucination_by_category:
@@ -106,8 +130,6 @@ def run_comprehensive_test():
             print(f"Hallucination: {'YES' if is_hallucination else 'NO'}")
             print("-" * 50)
             
-            time.sleep(0.5)  # Rate limiting
-            
         except Exception as e:
             print(f"Error: {e}")
     
@@ -127,6 +149,10 @@ def run_comprehensive_test():
     
     print("-" * 70)
     print(f"{'OVERALL':15} | Total: {total_questions:2} | Hallucinations: {total_hallucinations:2} | Rate: {overall_rate:5.1f}%")
+    print(f"Rate limiting: {rate_limiter.summary()}")
+    print(f"Response cache: {cache.stats}")
+    performance = telemetry.summary()
+    print(f"Throughput: {performance['questions_per_s']} questions/s, {performance['tokens_per_s']} tokens/s")
     
     # Save results
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -137,6 +163,8 @@ def run_comprehensive_test():
         "total_hallucinations": total_hallucinations,
         "hallucination_rate": overall_rate,
         "by_category": hallucination_by_category,
+        "rate_limit": rate_limiter.summary(),
+        "performance": performance,
         "detailed_results": all_results
     }
     
@@ -145,8 +173,20 @@ def run_comprehensive_test():
         json.dump(output, f, indent=2)
     
     print(f"\nDetailed results saved to {filename}")
+    for path in telemetry.export("results", export_metrics, prefix=f"comprehensive_test_{timestamp}_"):
+        print(f"Metrics exported to {path}")
     
     return output
 
 if __name__ == "__main__":
-    results = run_comprehensive_test()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the comprehensive hallucination test")
+    parser.add_argument("--cache-mode", choices=CACHE_MODES, default="readwrite",
+                        help="response cache behaviour (replay never calls the API)")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH,
+                        help="SQLite file holding cached model responses")
+    parser.add_argument("--export-metrics", choices=EXPORT_FORMATS, action="append", default=[],
+                        help="also write timings as Prometheus text or a Chrome trace next to the results")
+    args = parser.parse_args()
+    
+    results = run_comprehensive_test(ResponseCache(args.cache_path, mode=args.cache_mode),
+                                     export_metrics=args.export_metrics)
\ No newline at end of file
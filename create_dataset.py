@@ -1,7 +1,10 @@
 # create_dataset.py
+import argparse
 import json
 import math
+import time
 from datetime import datetime
+from src.question_generators import write_sharded_dataset, DEFAULT_SHARD_SIZE
 
 def create_comprehensive_dataset():
     """Create a comprehensive dataset for hallucination testing"""
@@ -166,5 +169,38 @@ def create_comprehensive_dataset():
     
     return dataset
 
+def generate_dataset(count, output_dir, seed=0, shard_size=DEFAULT_SHARD_SIZE, workers=1):
+    """Generate a large synthetic dataset as sharded JSONL"""
+    print(f"Generating {count:,} questions (seed {seed}) into {output_dir}/")
+    started = time.perf_counter()
+    manifest = write_sharded_dataset(count, output_dir, seed, shard_size, workers)
+    elapsed = time.perf_counter() - started
+    
+    # A tiny (or empty) run can finish within the timer's resolution
+    rate = f"{count / elapsed:,.0f} questions/s" if elapsed > 0 else "n/a questions/s"
+    print(f"Wrote {len(manifest['shards'])} shards in {elapsed:.1f}s ({rate})")
+    print("\nBreakdown by category:")
+    for main_cat, subcategories in manifest["counts"].items():
+        for sub_cat, n in subcategories.items():
+            print(f"  {main_cat}/{sub_cat}: {n:,} questions")
+    
+    return manifest
+
 if __name__ == "__main__":
-    dataset = create_comprehensive_dataset()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create the hallucination test dataset")
+    parser.add_argument("--generate", type=int, metavar="N", default=None,
+                        help="instead of the curated dataset, generate N synthetic questions with exact answers")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for generated questions; the same seed gives the same dataset")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE,
+                        help="questions per JSONL shard")
+    parser.add_argument("--output-dir", default="data/generated",
+                        help="directory for the generated shards and manifest")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes writing shards in parallel")
+    args = parser.parse_args()
+    
+    if args.generate is not None:
+        generate_dataset(args.generate, args.output_dir, args.seed, args.shard_size, args.workers)
+    else:
+        dataset = create_comprehensive_dataset()
\ No newline at end of file
@@ -0,0 +1,83 @@
+# replay_results.py
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+from src.memo import DetectionMemo, DEFAULT_MAX_ENTRIES
+from src.replay import DEFAULT_CHUNK_SIZE, find_sources, replay
+
+
+def main():
+    """Re-run the current detector over archived results, without any API calls"""
+    parser = argparse.ArgumentParser(
+        description="Re-score stored model answers with the current detector and diff the verdicts"
+    )
+    parser.add_argument("paths", nargs="*", default=["results"],
+                        help="run directories, result files, or directories to search (default: results)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of scoring processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="records scored per task")
+    parser.add_argument("--output-dir", default="results/replays",
+                        help="where the diff and summary are written")
+    parser.add_argument("--no-memo", action="store_true",
+                        help="score every answer, even ones identical (up to markdown) to an earlier one")
+    parser.add_argument("--memo-size", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="verdicts kept in memory for reuse")
+    parser.add_argument("--memo-path", default=None,
+                        help="SQLite file that keeps verdicts across replays (e.g. cache/verdicts.sqlite)")
+    args = parser.parse_args()
+
+    sources = find_sources(args.paths)
+    if not sources:
+        print("No archived results found!")
+        return
+
+    replay_dir = os.path.join(args.output_dir, f"replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(replay_dir, exist_ok=True)
+
+    print(f"Replaying {len(sources)} result source(s)")
+    print("=" * 70)
+
+    memo = None if args.no_memo else DetectionMemo(args.memo_size, args.memo_path)
+    started = time.perf_counter()
+    try:
+        with open(os.path.join(replay_dir, "diff.jsonl"), "w") as diff_file:
+            by_source = replay(sources, diff_file, workers=args.workers, chunk_size=args.chunk_size, memo=memo)
+    finally:
+        if memo is not None:
+            memo.close()
+    elapsed = time.perf_counter() - started
+
+    overall = {key: sum(counts[key] for counts in by_source.values())
+               for key in next(iter(by_source.values()))}
+    summary = {
+        'replayed_at': datetime.now().isoformat(),
+        'elapsed_s': round(elapsed, 2),
+        'overall': overall,
+        'by_source': by_source,
+        'detection_memo': memo.summary() if memo is not None else None
+    }
+    with open(os.path.join(replay_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+
+    for source, counts in by_source.items():
+        print(f"{source}: {counts['total']} answers, "
+              f"{counts['stored_hallucinations']} -> {counts['replayed_hallucinations']} hallucinations "
+              f"(+{counts['new_hallucinations']} / -{counts['cleared_hallucinations']})")
+
+    print("=" * 70)
+    print(f"Re-scored {overall['total'] - overall['skipped']} answers in {elapsed:.1f}s "
+          f"({overall['skipped']} errored answers skipped, {overall['unjudged']} had no stored verdict)")
+    print(f"Verdicts changed: {overall['new_hallucinations'] + overall['cleared_hallucinations']}")
+    if memo is not None:
+        stats = memo.summary()
+        print(f"Detection memo: {stats['hit_rate']:.1%} hit rate "
+              f"({stats['hits']} reused, {stats['misses']} scored)")
+    print(f"Diff and summary saved to: {replay_dir}/")
+
+
+if __name__ == "__main__":
+    main()
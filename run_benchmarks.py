@@ -0,0 +1,93 @@
+# run_benchmarks.py
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+from src.benchmark import benchmark_detector, benchmark_runner, compare_to_baseline, synthetic_corpus
+
+
+def main():
+    """Time the detector and runners and compare against a saved baseline"""
+    parser = argparse.ArgumentParser(description="Benchmark detection, result handling and runner throughput")
+    parser.add_argument("--size", type=int, default=10000,
+                        help="number of synthetic responses to score")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for the synthetic corpus")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="runs per benchmark; the best time is kept")
+    parser.add_argument("--runner-requests", type=int, default=200,
+                        help="requests sent to the stub server (0 skips the runner benchmark)")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="runner requests in flight")
+    parser.add_argument("--stub-latency", type=float, default=0.02,
+                        help="seconds the stub server waits per request")
+    parser.add_argument("--output", default=None,
+                        help="where to save results (default: results/benchmarks/benchmark_<timestamp>.json)")
+    parser.add_argument("--baseline", default=None,
+                        help="earlier benchmark JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="fail when throughput drops more than this fraction below the baseline")
+    args = parser.parse_args()
+
+    with open("data/hallucination_test_dataset.json", "r") as f:
+        dataset = json.load(f)
+
+    print(f"Benchmarking on {args.size} synthetic responses (seed {args.seed})")
+    print("=" * 70)
+
+    corpus = synthetic_corpus(dataset, args.size, args.seed)
+    benchmarks = benchmark_detector(corpus, args.repeats)
+    if args.runner_requests:
+        benchmarks['runner'] = benchmark_runner(
+            synthetic_corpus(dataset, args.runner_requests, args.seed),
+            args.runner_requests, args.concurrency, args.stub_latency
+        )
+
+    for name, result in benchmarks.items():
+        print(f"{name:<22} {result['items']:>8} items  {result['seconds']:>9.4f}s  "
+              f"{result['items_per_s']:>12,.0f}/s")
+
+    report = {
+        'created': datetime.now().isoformat(),
+        'config': {
+            'size': args.size,
+            'seed': args.seed,
+            'repeats': args.repeats,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'benchmarks': benchmarks
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(benchmarks, baseline['benchmarks'], args.threshold)
+        report['baseline'] = args.baseline
+        report['regressions'] = regressions
+
+    output = args.output or os.path.join(
+        "results/benchmarks", f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to: {output}")
+
+    if args.baseline:
+        print("=" * 70)
+        if regressions:
+            for regression in regressions:
+                print(f"REGRESSION {regression['benchmark']}: {regression['baseline_items_per_s']:,.0f}/s -> "
+                      f"{regression['items_per_s']:,.0f}/s ({regression['change']:+.1%})")
+            sys.exit(1)
+        print(f"No benchmark slowed down by more than {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,22 @@
 # run_evaluation.py
+import argparse
 import json
+import time
 from openai import OpenAI
 from dotenv import load_dotenv
 import os
 from src.detector import EduHallucinationDetector
-import time
+from src.evaluation import evaluate, confusion_cells, METRICS
+from src.rate_limit import RateLimiter, estimate_tokens
+from src.telemetry import Telemetry, EXPORT_FORMATS
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+rate_limiter = RateLimiter()
+
+# Printed outcome per confusion cell (see src.evaluation.confusion_cells)
+OUTCOMES = ("TRUE NEGATIVE ✓", "FALSE POSITIVE ✗", "FALSE NEGATIVE ✗", "TRUE POSITIVE ✓")
+
+METRIC_LABELS = {'accuracy': "Accuracy", 'precision': "Precision", 'recall': "Recall", 'f1': "F1"}
 
 def create_evaluation_dataset():
     """Create a dataset with known hallucinations and correct answers"""
@@ -48,17 +57,22 @@ def create_evaluation_dataset():
     
     return dataset
 
-def evaluate_framework():
+def evaluate_framework(export_metrics=(), client=None):
     """Test our detection framework"""
     
+    # Created here rather than at import, so the question lists can be
+    # imported without an API key; retries are handled by our RateLimiter
+    client = client or OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
     dataset = create_evaluation_dataset()
     detector = EduHallucinationDetector()
     
+    # Timing spans for model calls and detection checks
+    telemetry = Telemetry(trace='chrome-trace' in export_metrics)
+    detector.telemetry = telemetry
+    
     results = []
-    true_positives = 0
-    false_positives = 0
-    true_negatives = 0
-    false_negatives = 0
+    # One entry per evaluated item; metrics are computed from these at the end
+    labels = {'expected': [], 'detected': [], 'confidence': [], 'category': [], 'difficulty': []}
     
     print("Evaluating Hallucination Detection Framework")
     print("=" * 60)
@@ -66,37 +80,38 @@ def evaluate_framework():
     for item in dataset:
         # Get AI response
         try:
-            response = client.responses.create(
-                model="gpt-4.1",
-                input=f"{item['question']} Please answer concisely."
-            )
+            prompt = f"{item['question']} Please answer concisely."
+            started = time.perf_counter()
+            with telemetry.span('model_call'):
+                response = rate_limiter.call(
+                    client.responses.create,
+                    model="gpt-4.1",
+                    input=prompt,
+                    estimated_tokens=estimate_tokens(prompt)
+                )
+            telemetry.add_usage(getattr(response, 'usage', None))
             
             ai_answer = response.output_text.strip()
             
             # Detect hallucination
-            detection = detector.detect_hallucination(
-                question=item['question'],
-                ai_response=ai_answer,
-                expected_answer=item['correct_answer'],
-                question_type=item['category']
-            )
+            with telemetry.span('detection'):
+                detection = detector.detect_hallucination(
+                    question=item['question'],
+                    ai_response=ai_answer,
+                    expected_answer=item['correct_answer'],
+                    question_type=item['category']
+                )
             
             # Compare with expected
-            detected = detection['hallucination_detected']
+            detected = detection.hallucination_detected
             expected = item['expected_hallucination']
+            result = OUTCOMES[int(confusion_cells(expected, detected))]
             
-            if detected and expected:
-                true_positives += 1
-                result = "TRUE POSITIVE ✓"
-            elif not detected and not expected:
-                true_negatives += 1
-                result = "TRUE NEGATIVE ✓"
-            elif detected and not expected:
-                false_positives += 1
-                result = "FALSE POSITIVE ✗"
-            else:
-                false_negatives += 1
-                result = "FALSE NEGATIVE ✗"
+            labels['expected'].append(expected)
+            labels['detected'].append(detected)
+            labels['confidence'].append(detection.confidence)
+            labels['category'].append(item['category'])
+            labels['difficulty'].append(item.get('difficulty', 'medium'))
             
             print(f"\nQ: {item['question']}")
             print(f"AI Answer: {ai_answer}")
@@ -108,56 +123,68 @@ def evaluate_framework():
             results.append({
                 "question": item['question'],
                 "ai_answer": ai_answer,
-                "detection": detection,
+                "detection": detection.to_dict(),
                 "expected": expected,
                 "result": result
             })
-            
-            time.sleep(0.5)  # Rate limiting
+            telemetry.record('question', time.perf_counter() - started, started)
+            telemetry.count_question()
             
         except Exception as e:
             print(f"Error: {e}")
     
-    # Calculate metrics
-    total = len(dataset)
-    accuracy = (true_positives + true_negatives) / total * 100
-    
-    if (true_positives + false_positives) > 0:
-        precision = true_positives / (true_positives + false_positives) * 100
-    else:
-        precision = 0
-        
-    if (true_positives + false_negatives) > 0:
-        recall = true_positives / (true_positives + false_negatives) * 100
-    else:
-        recall = 0
+    # Calculate metrics over the items that got an answer
+    report = evaluate(
+        labels['expected'], labels['detected'], labels['confidence'],
+        groups={'by_category': labels['category'], 'by_difficulty': labels['difficulty']}
+    )
+    overall = report['overall']
     
     print("\n" + "=" * 60)
     print("EVALUATION METRICS")
-    print(f"True Positives: {true_positives}")
-    print(f"False Positives: {false_positives}")
-    print(f"True Negatives: {true_negatives}")
-    print(f"False Negatives: {false_negatives}")
-    print(f"\nAccuracy: {accuracy:.1f}%")
-    print(f"Precision: {precision:.1f}%")
-    print(f"Recall: {recall:.1f}%")
+    print(f"True Positives: {overall['true_positives']}")
+    print(f"False Positives: {overall['false_positives']}")
+    print(f"True Negatives: {overall['true_negatives']}")
+    print(f"False Negatives: {overall['false_negatives']}")
+    print()
+    for metric in METRICS:
+        low, high = overall['ci'][metric]
+        print(f"{METRIC_LABELS[metric]}: {overall[metric] * 100:.1f}% "
+              f"({report['confidence_level']:.0%} CI {low * 100:.1f}-{high * 100:.1f}%)")
+    if report['roc']['auc'] is not None:
+        print(f"ROC AUC: {report['roc']['auc']:.3f} | Average precision: {report['pr']['average_precision']:.3f}")
+    
+    print("\nBY CATEGORY")
+    for category, stats in report['by_category'].items():
+        print(f"{category:22} | n: {stats['total']:3} | P: {stats['precision'] * 100:5.1f}% | "
+              f"R: {stats['recall'] * 100:5.1f}% | F1: {stats['f1'] * 100:5.1f}%")
+    
+    print(f"\nRate limiting: {rate_limiter.summary()}")
+    performance = telemetry.summary()
+    print(f"Throughput: {performance['questions_per_s']} questions/s, {performance['tokens_per_s']} tokens/s")
     
     # Save results
     with open("results/framework_evaluation.json", "w") as f:
         json.dump({
             "results": results,
             "metrics": {
-                "true_positives": true_positives,
-                "false_positives": false_positives,
-                "true_negatives": true_negatives,
-                "false_negatives": false_negatives,
-                "accuracy": accuracy,
-                "precision": precision,
-                "recall": recall
-            }
+                **{cell: overall[cell] for cell in ('true_positives', 'false_positives',
+                                                    'true_negatives', 'false_negatives')},
+                **{metric: round(overall[metric] * 100, 2) for metric in METRICS}
+            },
+            "evaluation": report,
+            "rate_limit": rate_limiter.summary(),
+            "performance": performance
         }, f, indent=2)
     
     print("\nResults saved to results/framework_evaluation.json")
+    for path in telemetry.export("results", export_metrics, prefix="framework_evaluation_"):
+        print(f"Metrics exported to {path}")
 
 if __name__ == "__main__":
-    evaluate_framework()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Evaluate the detector against known hallucinations")
+    parser.add_argument("--export-metrics", choices=EXPORT_FORMATS, action="append", default=[],
+                        help="also write timings as Prometheus text or a Chrome trace next to the results")
+    args = parser.parse_args()
+    
+    evaluate_framework(export_metrics=args.export_metrics)
\ No newline at end of file
@@ -1,56 +1,133 @@
 # run_dataset_test.py
+import argparse
+import asyncio
+import glob
 import json
 import os
 from datetime import datetime
 import time
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 from src.detector import EduHallucinationDetector
-import pandas as pd
+from src.dataset_loader import DatasetSource, DEFAULT_DATASET_PATH, parse_shard
+from src.aggregation import HallucinationAggregator
+from src.storage import write_results_json, write_results_csv, write_results_parquet, PARQUET_FILE
+from src.records import ResultStore
+from src.runner import AsyncQueryEngine
+from src.cache import ResponseCache, CACHE_MODES, DEFAULT_CACHE_PATH
+from src.journal import RunJournal, result_key, FSYNC_POLICIES
+from src.telemetry import Telemetry, EXPORT_FORMATS
+from src.similarity import SemanticIndex, DEFAULT_VECTOR_CACHE
+from src.memo import DetectionMemo
+from src.rate_limit import RateLimiter, estimate_tokens, DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+MODEL = "gpt-4.1"
+
+# Temperature for the extra samples used by the consistency check
+SAMPLE_TEMPERATURE = 1.0
 
 class DatasetTester:
-    def __init__(self):
-        self.detector = EduHallucinationDetector()
-        self.results_dir = "results/dataset_tests"
-        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    def __init__(self, concurrency=8, client=None, rate_limiter=None, cache=None,
+                 run_id=None, fsync='interval', consistency_samples=0, export_metrics=(),
+                 dataset=None, results_dir="results/dataset_tests", vector_cache=DEFAULT_VECTOR_CACHE):
+        # Reference-answer vectors are kept on disk and memory-mapped across
+        # runs; answers repeated up to markdown reuse their verdict
+        self.detector = EduHallucinationDetector(
+            similarity=SemanticIndex(cache_path=vector_cache),
+            memo=DetectionMemo()
+        )
+        # Questions are streamed from here rather than loaded up front
+        self.dataset = dataset or DatasetSource()
+        # Created here rather than at import so importing needs no API key;
+        # retries are handled by our RateLimiter, not the SDK
+        self.client = client or AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
+        self.engine = AsyncQueryEngine(concurrency)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.cache = cache or ResponseCache(mode='off')
+        self.consistency_samples = consistency_samples
+        
+        # Timing spans for model calls, detection checks and I/O; every span
+        # is kept only when a Chrome trace was asked for
+        self.export_metrics = tuple(export_metrics)
+        self.telemetry = Telemetry(trace='chrome-trace' in self.export_metrics)
+        self.detector.telemetry = self.telemetry
+        self.results_dir = results_dir
+        # Resuming reuses the interrupted run's id and journal
+        self.timestamp = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
         
         # Create results directory
         os.makedirs(self.results_dir, exist_ok=True)
         
-        # Initialize results storage
-        self.all_results = []
+        # Every finished result is appended here so a crashed run can resume
+        self.journal = RunJournal(
+            os.path.join(self.results_dir, f"journal_{self.timestamp}.jsonl"), fsync=fsync
+        )
+        
+        # Initialize results storage; results are kept as compact records
+        self.all_results = ResultStore()
         self.summary_stats = {}
         
-    def load_dataset(self):
-        """Load the test dataset"""
-        with open("data/hallucination_test_dataset.json", "r") as f:
-            return json.load(f)
+        # Counts are updated as each result arrives
+        self.aggregator = HallucinationAggregator()
+        
+    def build_prompt(self, question_data):
+        """Prompt sent to the model for one dataset question"""
+        return f"{question_data['q']} Please provide a direct, numerical answer where applicable."
+    
+    async def ask(self, prompt, **params):
+        """One model answer, served from the cache when we've asked before"""
+        async def query():
+            with self.telemetry.span('model_call'):
+                response = await self.rate_limiter.call_async(
+                    self.client.responses.create,
+                    model=MODEL,
+                    input=prompt,
+                    estimated_tokens=estimate_tokens(prompt),
+                    **params
+                )
+            self.telemetry.add_usage(getattr(response, 'usage', None))
+            return response.output_text
+        
+        return (await self.cache.fetch_async(MODEL, prompt, query, **params)).strip()
+    
+    async def sample(self, prompt, index):
+        """Sampled answer for consistency checks; each index is cached separately"""
+        return await self.ask(prompt, temperature=SAMPLE_TEMPERATURE, metadata={"sample": str(index)})
     
-    def test_single_question(self, question_data, category, subcategory):
+    async def test_single_question(self, question_data, category, subcategory):
         """Test a single question and return results"""
         question = question_data["q"]
         expected_answer = str(question_data["a"])
         difficulty = question_data.get("difficulty", "medium")
         
+        prompt = self.build_prompt(question_data)
+        
+        started = time.perf_counter()
         try:
             # Get AI response
-            response = client.responses.create(
-                model="gpt-4.1",
-                input=f"{question} Please provide a direct, numerical answer where applicable."
-            )
-            
-            ai_answer = response.output_text.strip()
+            ai_answer = await self.ask(prompt)
+            latency = time.perf_counter() - started
             
             # Detect hallucination
-            detection = self.detector.detect_hallucination(
-                question=question,
-                ai_response=ai_answer,
-                expected_answer=expected_answer,
-                question_type=subcategory
-            )
+            with self.telemetry.span('detection'):
+                detection = self.detector.detect_hallucination(
+                    question=question,
+                    ai_response=ai_answer,
+                    expected_answer=expected_answer,
+                    question_type=subcategory
+                )
+            
+            # Optionally re-ask the question and check the answers agree
+            if self.consistency_samples:
+                with self.telemetry.span('consistency_sampling'):
+                    consistency = await self.detector.sample_consistency(
+                        prompt, self.sample, n_samples=self.consistency_samples
+                    )
+                detection.detection_details['consistency'] = consistency
+                if consistency['likely_hallucination']:
+                    detection.hallucination_detected = True
             
             # Create result record
             result = {
@@ -60,11 +137,13 @@ class DatasetTester:
                 "question": question,
                 "expected_answer": expected_answer,
                 "ai_answer": ai_answer,
-                "hallucination_detected": detection['hallucination_detected'],
-                "detection_confidence": detection['confidence'],
-                "detection_details": detection['detection_details']
+                "hallucination_detected": detection.hallucination_detected,
+                "detection_confidence": detection.confidence,
+                "detection_details": detection.detection_details,
+                "latency_s": round(latency, 4)
             }
             
+            self.telemetry.record('question', time.perf_counter() - started, started)
             return result
             
         except Exception as e:
@@ -76,110 +155,96 @@ class DatasetTester:
                 "expected_answer": expected_answer,
                 "ai_answer": f"ERROR: {str(e)}",
                 "hallucination_detected": None,
-                "error": True
+                "error": True,
+                "latency_s": round(time.perf_counter() - started, 4)
             }
     
     def run_tests(self):
         """Run all tests in the dataset"""
-        dataset = self.load_dataset()
-        total_questions = dataset["metadata"]["total_questions"]
+        asyncio.run(self.run_tests_async())
+        
+        print("\n" + "="*70)
+        print("Test run completed!")
+        print(f"Rate limiting: {self.rate_limiter.summary()}")
+        print(f"Response cache: {self.cache.stats}")
+        print(f"Detection memo: {self.detector.memo.summary()}")
+        self.analyze_results()
+        performance = self.summary_stats['performance']
+        print(f"Throughput: {performance['questions_per_s']} questions/s, "
+              f"{performance['tokens_per_s']} tokens/s")
+        self.save_final_results()
+    
+    async def run_tests_async(self):
+        """Query the model for every question with bounded concurrency"""
+        # Unknown up front when filtering or sharding
+        total_questions = self.dataset.total or "?"
         
         print(f"Starting test run: {self.timestamp}")
+        print(f"Dataset: {self.dataset.path}")
         print(f"Total questions to test: {total_questions}")
+        print(f"Concurrent requests: {self.engine.concurrency}")
         print("="*70)
         
+        # Answered questions from an earlier attempt of this run are reused;
+        # errored ones are asked again. They wait as compact records.
+        previous_results = ResultStore()
+        answered = {}
+        for record in self.journal.load():
+            if not record.get('error'):
+                answered[result_key(record)] = previous_results.pack(record)
+        if answered:
+            print(f"Resuming run {self.timestamp}: {len(answered)} questions already answered")
+        
+        async def handle(item):
+            question_data, category, subcategory = item
+            previous = answered.get((category, subcategory, question_data["q"]))
+            if previous is not None:
+                return previous_results.unpack(previous), False
+            return await self.test_single_question(*item), True
+        
         question_count = 0
         
-        # Test each category
-        for main_category, subcategories in dataset["categories"].items():
-            for subcategory, questions in subcategories.items():
-                if not questions:
+        try:
+            # Results arrive in dataset order even though requests overlap
+            async for result, is_new in self.engine.map(handle, self.dataset):
+                question_count += 1
+                self.all_results.append(result)
+                with self.telemetry.span('aggregate'):
+                    self.aggregator.add(result)
+                
+                if not is_new:
                     continue
-                    
-                print(f"\nTesting {main_category}/{subcategory} ({len(questions)} questions)")
-                print("-"*50)
+                self.telemetry.count_question()
+                with self.telemetry.span('io.journal'):
+                    self.journal.append(result)
                 
-                for i, question_data in enumerate(questions):
-                    question_count += 1
-                    
-                    # Progress indicator
-                    print(f"[{question_count}/{total_questions}] Testing: {question_data['q'][:50]}...")
-                    
-                    # Test the question
-                    result = self.test_single_question(question_data, main_category, subcategory)
-                    self.all_results.append(result)
-                    
-                    # Rate limiting
-                    time.sleep(0.5)
-                    
-                    # Save intermediate results every 10 questions
-                    if question_count % 10 == 0:
-                        self.save_intermediate_results()
-        
-        print("\n" + "="*70)
-        print("Test run completed!")
-        self.analyze_results()
-        self.save_final_results()
-    
-    def save_intermediate_results(self):
-        """Save results periodically during testing"""
-        temp_file = os.path.join(self.results_dir, f"temp_{self.timestamp}.json")
-        with open(temp_file, "w") as f:
-            json.dump(self.all_results, f, indent=2)
+                # Progress indicator with the live hallucination rate
+                print(f"[{question_count}/{total_questions}] {result['category']}/{result['subcategory']}: "
+                      f"{result['question'][:50]}... ({result['latency_s']:.2f}s, "
+                      f"running rate {self.aggregator.hallucination_rate}%)")
+        finally:
+            self.journal.close()
     
     def analyze_results(self):
-        """Analyze test results and generate summary statistics"""
-        df = pd.DataFrame(self.all_results)
+        """Build summary statistics from the running aggregator"""
+        summary = self.aggregator.summary()
         
         # Overall statistics
-        total_tested = len(df)
-        total_hallucinations = df['hallucination_detected'].sum()
-        overall_rate = (total_hallucinations / total_tested * 100) if total_tested > 0 else 0
-        
-        self.summary_stats['overall'] = {
-            'total_questions': total_tested,
-            'total_hallucinations': int(total_hallucinations),
-            'hallucination_rate': round(overall_rate, 2)
-        }
-        
-        # By category
-        self.summary_stats['by_category'] = {}
-        for category in df['category'].unique():
-            cat_df = df[df['category'] == category]
-            cat_hallucinations = cat_df['hallucination_detected'].sum()
-            cat_rate = (cat_hallucinations / len(cat_df) * 100) if len(cat_df) > 0 else 0
-            
-            self.summary_stats['by_category'][category] = {
-                'total': len(cat_df),
-                'hallucinations': int(cat_hallucinations),
-                'rate': round(cat_rate, 2)
-            }
+        self.summary_stats['overall'] = summary['overall']
         
-        # By subcategory
-        self.summary_stats['by_subcategory'] = {}
-        for subcategory in df['subcategory'].unique():
-            sub_df = df[df['subcategory'] == subcategory]
-            sub_hallucinations = sub_df['hallucination_detected'].sum()
-            sub_rate = (sub_hallucinations / len(sub_df) * 100) if len(sub_df) > 0 else 0
-            
-            self.summary_stats['by_subcategory'][subcategory] = {
-                'total': len(sub_df),
-                'hallucinations': int(sub_hallucinations),
-                'rate': round(sub_rate, 2)
-            }
+        # Time spent waiting on rate limits
+        self.summary_stats['rate_limit'] = self.rate_limiter.summary()
         
-        # By difficulty
-        self.summary_stats['by_difficulty'] = {}
-        for difficulty in df['difficulty'].unique():
-            diff_df = df[df['difficulty'] == difficulty]
-            diff_hallucinations = diff_df['hallucination_detected'].sum()
-            diff_rate = (diff_hallucinations / len(diff_df) * 100) if len(diff_df) > 0 else 0
-            
-            self.summary_stats['by_difficulty'][difficulty] = {
-                'total': len(diff_df),
-                'hallucinations': int(diff_hallucinations),
-                'rate': round(diff_rate, 2)
-            }
+        # How often a verdict was reused instead of recomputed
+        self.summary_stats['detection_memo'] = self.detector.memo.summary()
+        
+        # Latency percentiles per stage and overall throughput
+        self.summary_stats['performance'] = self.telemetry.summary()
+        
+        # By category, subcategory and difficulty
+        self.summary_stats['by_category'] = summary['by_category']
+        self.summary_stats['by_subcategory'] = summary['by_subcategory']
+        self.summary_stats['by_difficulty'] = summary['by_difficulty']
     
     def save_final_results(self):
         """Save all results and analysis"""
@@ -189,19 +254,24 @@ class DatasetTester:
         
         # 1. Save raw results
         raw_file = os.path.join(run_dir, "raw_results.json")
-        with open(raw_file, "w") as f:
-            json.dump(self.all_results, f, indent=2)
+        with self.telemetry.span('io.raw_results'):
+            write_results_json(self.all_results, raw_file)
         
-        # 2. Save summary statistics
+        # 2. Save as CSV for easy analysis
+        csv_file = os.path.join(run_dir, "results.csv")
+        with self.telemetry.span('io.csv'):
+            write_results_csv(self.all_results, csv_file)
+        
+        # 2b. Save a typed columnar copy with flattened detection fields
+        with self.telemetry.span('io.parquet'):
+            write_results_parquet(self.all_results, os.path.join(run_dir, PARQUET_FILE))
+        
+        # 3. Save summary statistics, with timings that include the writes above
+        self.summary_stats['performance'] = self.telemetry.summary()
         summary_file = os.path.join(run_dir, "summary_statistics.json")
         with open(summary_file, "w") as f:
             json.dump(self.summary_stats, f, indent=2)
         
-        # 3. Save as CSV for easy analysis
-        csv_file = os.path.join(run_dir, "results.csv")
-        df = pd.DataFrame(self.all_results)
-        df.to_csv(csv_file, index=False)
-        
         # 4. Generate summary report
         report_file = os.path.join(run_dir, "summary_report.txt")
         with open(report_file, "w") as f:
@@ -229,6 +299,18 @@ class DatasetTester:
             f.write("-"*30 + "\n")
             for diff, stats in self.summary_stats['by_difficulty'].items():
                 f.write(f"{diff:10} | Total: {stats['total']:3} | Hallucinations: {stats['hallucinations']:3} | Rate: {stats['rate']:6.2f}%\n")
+            
+            performance = self.summary_stats['performance']
+            f.write("\nPERFORMANCE\n")
+            f.write("-"*30 + "\n")
+            f.write(f"Elapsed: {performance['elapsed_s']}s | Questions/s: {performance['questions_per_s']} | "
+                    f"Tokens/s: {performance['tokens_per_s']}\n")
+            for stage, stats in performance['stages'].items():
+                f.write(f"{stage:32} | n: {stats['count']:5} | p50: {stats['p50_s'] * 1000:9.3f}ms | "
+                        f"p95: {stats['p95_s'] * 1000:9.3f}ms | p99: {stats['p99_s'] * 1000:9.3f}ms\n")
+        
+        # 5. Optional Prometheus / Chrome-trace exports
+        exported = self.telemetry.export(run_dir, self.export_metrics)
         
         # Print summary
         print("\nRESULTS SAVED:")
@@ -236,7 +318,10 @@ class DatasetTester:
         print(f"  - Raw results: raw_results.json")
         print(f"  - Summary stats: summary_statistics.json")
         print(f"  - CSV file: results.csv")
+        print(f"  - Columnar results: {PARQUET_FILE}")
         print(f"  - Summary report: summary_report.txt")
+        for path in exported:
+            print(f"  - Metrics export: {os.path.basename(path)}")
         
         # Display key findings
         print("\nKEY FINDINGS:")
@@ -249,23 +334,62 @@ class DatasetTester:
         print(f"\n  Highest hallucination rate: {sorted_cats[0][0]} ({sorted_cats[0][1]['rate']}%)")
         print(f"  Lowest hallucination rate: {sorted_cats[-1][0]} ({sorted_cats[-1][1]['rate']}%)")
         
-        # Clean up temp files
-        temp_files = [f for f in os.listdir(self.results_dir) if f.startswith(f"temp_{self.timestamp}")]
-        for temp_file in temp_files:
-            os.remove(os.path.join(self.results_dir, temp_file))
+        # Keep vectors of newly seen reference answers for the next run
+        self.detector.similarity.save()
+        
+        # The journal is only needed until the final results are on disk
+        self.journal.remove()
 
 def main():
     """Main function to run the dataset test"""
+    parser = argparse.ArgumentParser(description="Run the hallucination test dataset against the model")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="maximum number of model requests in flight")
+    parser.add_argument("--rpm", type=float, default=DEFAULT_REQUESTS_PER_MINUTE,
+                        help="requests-per-minute limit")
+    parser.add_argument("--tpm", type=float, default=DEFAULT_TOKENS_PER_MINUTE,
+                        help="tokens-per-minute limit")
+    parser.add_argument("--cache-mode", choices=CACHE_MODES, default="readwrite",
+                        help="response cache behaviour (replay never calls the API)")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH,
+                        help="SQLite file holding cached model responses")
+    parser.add_argument("--cache-max-age-days", type=float, default=None,
+                        help="ignore and evict cached responses older than this")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None,
+                        help="continue an interrupted run, skipping questions already answered")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="interval",
+                        help="how often the run journal is synced to disk")
+    parser.add_argument("--consistency-samples", type=int, default=0,
+                        help="re-ask each question up to N times and flag inconsistent answers")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH,
+                        help="dataset JSON, JSONL file or glob, or a directory of JSONL shards")
+    parser.add_argument("--category", action="append", default=[],
+                        help="only test this category (repeatable)")
+    parser.add_argument("--subcategory", action="append", default=[],
+                        help="only test this subcategory (repeatable)")
+    parser.add_argument("--difficulty", action="append", default=[],
+                        help="only test this difficulty (repeatable)")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="i/N",
+                        help="only test shard i of N; each question lands in exactly one shard")
+    parser.add_argument("--export-metrics", choices=EXPORT_FORMATS, action="append", default=[],
+                        help="also write run timings as Prometheus text (metrics.prom) or a Chrome trace (trace.json)")
+    args = parser.parse_args()
+    
     print("EduGuard Dataset Testing Framework")
     print("="*70)
     
     # Check if dataset exists
-    if not os.path.exists("data/hallucination_test_dataset.json"):
+    if not glob.glob(args.dataset):
         print("ERROR: Dataset not found. Please run create_dataset.py first.")
         return
     
+    dataset = DatasetSource(args.dataset, args.category, args.subcategory, args.difficulty, args.shard)
+    
     # Confirm before starting
-    print("\nThis will test 70 questions and may take 5-10 minutes.")
+    if dataset.total is not None:
+        print(f"\nThis will test {dataset.total} questions.")
+    else:
+        print("\nThis will test the questions matching the given filters/shard.")
     response = input("Do you want to continue? (y/n): ")
     
     if response.lower() != 'y':
@@ -273,7 +397,19 @@ def main():
         return
     
     # Run tests
-    tester = DatasetTester()
+    tester = DatasetTester(
+        concurrency=args.concurrency,
+        rate_limiter=RateLimiter(requests_per_minute=args.rpm, tokens_per_minute=args.tpm),
+        cache=ResponseCache(args.cache_path, mode=args.cache_mode, max_age_days=args.cache_max_age_days),
+        run_id=args.resume,
+        fsync=args.fsync,
+        consistency_samples=args.consistency_samples,
+        export_metrics=args.export_metrics,
+        dataset=dataset
+    )
+    if args.resume and not os.path.exists(tester.journal.path):
+        print(f"ERROR: No journal found for run {args.resume} ({tester.journal.path}).")
+        return
     tester.run_tests()
 
 if __name__ == "__main__":
@@ -0,0 +1,61 @@
+# serve_detector.py
+import argparse
+
+from src.memo import DetectionMemo, DEFAULT_MAX_ENTRIES
+from src.server import (DetectionServer, bounded_detector, DEFAULT_HOST, DEFAULT_PORT, DEFAULT_MAX_BATCH,
+                        DEFAULT_MAX_WAIT_MS, DEFAULT_STATS_WINDOW, DEFAULT_REFERENCE_CACHE)
+from src.similarity import DEFAULT_VECTOR_CACHE
+
+
+def main():
+    """Serve the detector over HTTP for live answers"""
+    parser = argparse.ArgumentParser(description="Run hallucination detection as a local HTTP/JSON service")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="interface to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="port to listen on (0 picks a free one)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help="most answers scored together in one batch")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="longest an answer waits for others to join its batch")
+    parser.add_argument("--stats-window", type=int, default=DEFAULT_STATS_WINDOW,
+                        help="recent requests /stats computes latency percentiles over")
+    parser.add_argument("--reference-cache", type=int, default=DEFAULT_REFERENCE_CACHE,
+                        help="parsed reference answers and their vectors kept in memory")
+    parser.add_argument("--no-memo", action="store_true",
+                        help="score every answer, even ones identical (up to markdown) to an earlier one")
+    parser.add_argument("--memo-size", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="verdicts kept in memory for reuse")
+    parser.add_argument("--memo-path", default=None,
+                        help="SQLite file that keeps verdicts across restarts")
+    args = parser.parse_args()
+
+    memo = None if args.no_memo else DetectionMemo(args.memo_size, args.memo_path)
+    detector = bounded_detector(args.reference_cache, DEFAULT_VECTOR_CACHE, memo)
+    similarity = detector.similarity
+    server = DetectionServer(
+        detector,
+        host=args.host,
+        port=args.port,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        stats_window=args.stats_window
+    )
+
+    print("EduGuard Detection Service")
+    print("=" * 70)
+    print(f"Listening on {args.host}:{args.port} "
+          f"(batches of up to {args.max_batch}, {args.max_wait_ms}ms wait budget)")
+    print("POST /detect, POST /detect_batch, GET /health, GET /stats; Ctrl-C to stop")
+    try:
+        server.serve_forever()
+    finally:
+        # Keep vectors of newly seen reference answers for the next start
+        similarity.save()
+        if memo is not None:
+            memo.close()
+    print("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
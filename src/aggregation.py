@@ -0,0 +1,73 @@
+# src/aggregation.py
+from typing import Dict, Iterable
+
+GROUP_FIELDS = {
+    'by_category': 'category',
+    'by_subcategory': 'subcategory',
+    'by_difficulty': 'difficulty'
+}
+
+
+class HallucinationAggregator:
+    """Running hallucination counts overall and per group.
+
+    `add` is O(1) per result and only counters are kept, so summaries are
+    available live during a run and over result streams of any size. The
+    output has the same shape as DatasetTester.summary_stats; groups are
+    listed in order of first appearance.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.hallucinations = 0
+        # section -> group value -> [total, hallucinations]
+        self.groups = {section: {} for section in GROUP_FIELDS}
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict]) -> 'HallucinationAggregator':
+        aggregator = cls()
+        for result in results:
+            aggregator.add(result)
+        return aggregator
+
+    def add(self, result: Dict):
+        """Count one result record"""
+        # Errored results (hallucination_detected None) count towards totals only
+        hit = 1 if result.get('hallucination_detected') is True else 0
+        self.total += 1
+        self.hallucinations += hit
+
+        for section, field in GROUP_FIELDS.items():
+            counts = self.groups[section].get(result.get(field))
+            if counts is None:
+                counts = self.groups[section][result.get(field)] = [0, 0]
+            counts[0] += 1
+            counts[1] += hit
+
+    @property
+    def hallucination_rate(self) -> float:
+        return _rate(self.hallucinations, self.total)
+
+    def summary(self) -> Dict:
+        """Summary statistics in the summary_statistics.json layout"""
+        stats = {
+            'overall': {
+                'total_questions': self.total,
+                'total_hallucinations': self.hallucinations,
+                'hallucination_rate': self.hallucination_rate
+            }
+        }
+        for section, groups in self.groups.items():
+            stats[section] = {
+                value: {
+                    'total': total,
+                    'hallucinations': hallucinations,
+                    'rate': _rate(hallucinations, total)
+                }
+                for value, (total, hallucinations) in groups.items()
+            }
+        return stats
+
+
+def _rate(hallucinations: int, total: int) -> float:
+    return round(hallucinations / total * 100, 2) if total > 0 else 0
@@ -0,0 +1,432 @@
+# src/analyzers.py
+import math
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+_END = ''      # trie key marking the end of a marker
+_SPACE = ' '   # trie key for a run of whitespace inside a marker
+_MATCH_CACHE_SIZE = 10000
+# Joins texts scanned in one regex pass; no pattern here matches it
+_ROW_SEPARATOR = '\x00'
+
+
+class MarkerMatcher:
+    """Finds every marker from a set of lexicons in a single regex pass.
+
+    All markers are compiled into one trie-shaped regex, so the work per
+    response depends on the text length and trie depth rather than on how
+    many markers are loaded. Matching is case-insensitive, respects word
+    boundaries ("about" does not match inside "roundabout") and treats any
+    run of whitespace inside a marker as a single space.
+    """
+
+    def __init__(self, lexicons: Dict[str, Iterable[str]]):
+        self.lexicons = {name: list(markers) for name, markers in lexicons.items()}
+
+        # normalized marker text -> [(lexicon, position, marker as written)]
+        self._entries = {}
+        trie = {}
+        for name, markers in self.lexicons.items():
+            for position, marker in enumerate(markers):
+                key = _normalize(marker)
+                if not key:
+                    continue
+                self._entries.setdefault(key, []).append((name, position, marker))
+                node = trie
+                for ch in key:
+                    node = node.setdefault(ch, {})
+                node[_END] = True
+
+        self._trie = trie
+        self._match_cache = {}
+        body = _trie_regex(trie) if trie else r'(?!)'
+        # Only positions starting some marker are tried further; the second
+        # lookahead lets markers nested inside longer ones still be found
+        first = '(?=[' + ''.join(re.escape(ch) for ch in sorted(trie)) + '])' if trie else ''
+        self.pattern = re.compile(first + r'(?<!\w)(?=(' + body + r')(?!\w))', re.IGNORECASE)
+
+    def find(self, text: str) -> Dict[str, List[str]]:
+        """Return the markers found in text, per lexicon, in lexicon order"""
+
+        return self._collect(self.pattern.finditer(text))
+
+    def find_batch(self, texts: Sequence[str]) -> List[Optional[Dict[str, List[str]]]]:
+        """find for many texts in one regex pass; None for texts without markers"""
+
+        found = [None] * len(texts)
+        joined = _join_rows(texts)
+        if joined is None:
+            for i, text in enumerate(texts):
+                if self.pattern.search(text):
+                    found[i] = self.find(text)
+            return found
+
+        matches = list(self.pattern.finditer(joined))
+        if not matches:
+            return found
+        rows = _rows_of(texts, [match.start() for match in matches])
+        start = 0
+        for end in range(1, len(matches) + 1):
+            if end == len(matches) or rows[end] != rows[start]:
+                found[rows[start]] = self._collect(matches[start:end])
+                start = end
+        return found
+
+    def _collect(self, matches) -> Dict[str, List[str]]:
+        hits = {name: {} for name in self.lexicons}
+        cache = self._match_cache
+
+        for match in matches:
+            matched = match.group(1)
+            found = cache.get(matched)
+            if found is None:
+                if len(cache) >= _MATCH_CACHE_SIZE:
+                    cache.clear()
+                found = cache[matched] = [
+                    entry
+                    for key in self._prefix_markers(_normalize(matched))
+                    for entry in self._entries[key]
+                ]
+            for name, position, marker in found:
+                hits[name][position] = marker
+
+        return {name: [markers[p] for p in sorted(markers)] for name, markers in hits.items()}
+
+    def _prefix_markers(self, matched: str) -> List[str]:
+        """All markers that are word-bounded prefixes of the longest match"""
+
+        keys = []
+        node = self._trie
+        for i, ch in enumerate(matched):
+            node = node.get(ch)
+            if node is None:
+                break
+            if _END in node and (i + 1 == len(matched) or not _is_word_pair(matched[i], matched[i + 1])):
+                keys.append(matched[:i + 1])
+        return keys
+
+
+def load_lexicon(path: str) -> List[str]:
+    """Load a marker lexicon file: one marker per line, '#' starts a comment"""
+
+    markers = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            marker = line.split('#', 1)[0].strip()
+            if marker:
+                markers.append(marker)
+    return markers
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def _join_rows(texts: Sequence[str]) -> Optional[str]:
+    """texts joined for a single regex pass, or None if one contains the separator"""
+    joined = _ROW_SEPARATOR.join(texts)
+    if joined.count(_ROW_SEPARATOR) != max(len(texts) - 1, 0):
+        return None
+    return joined
+
+
+def _rows_of(texts: Sequence[str], positions: List[int]) -> List[int]:
+    """Index of the text each position of _join_rows(texts) falls in"""
+    starts = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]])
+    return (np.searchsorted(starts, positions, side='right') - 1).tolist()
+
+
+def _is_word_pair(left: str, right: str) -> bool:
+    return (left.isalnum() or left == '_') and (right.isalnum() or right == '_')
+
+
+def _trie_regex(node: Dict) -> str:
+    """Compile a character trie into an equivalent regex"""
+
+    branches = []
+    for ch in sorted(k for k in node if k != _END):
+        prefix = r'\s+' if ch == _SPACE else re.escape(ch)
+        branches.append(prefix + _trie_regex(node[ch]))
+
+    if not branches:
+        return ''
+
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if _END in node:
+        # Prefer the longer marker, fall back to the one ending here
+        body = '(?:' + body + ')?'
+    return body
+
+
+class NumberToken(NamedTuple):
+    """A number found in text with the precision it was written to"""
+    text: str
+    value: float
+    resolution: float   # half a unit in the last written digit; 0 for exact fractions
+
+
+_SUPERSCRIPTS = str.maketrans('⁰¹²³⁴⁵⁶⁷⁸⁹⁻⁺', '0123456789-+')
+_MINUS_SIGNS = str.maketrans({'−': '-'})
+# Resolution of a plain number by its count of decimal places
+_RESOLUTIONS = tuple(0.5 * 10.0 ** -places for places in range(16))
+_SIGNS = '-+−'
+# Number text as matched -> its NumberToken, when not read after a bracket
+_TOKEN_CACHE = {}
+
+NUMBER_PATTERN = re.compile(r"""
+    (?=[-+−\d])        # cheap first test; most positions start no number
+    (?<![\w.])
+    (?P<sign>[-+−])?
+    (?P<int>\d{1,3}(?:,\d{3})+(?!\d)|\d+)
+    (?:\.(?P<frac>\d+))?
+    (?:
+        [eE](?P<exp>[-+−]?\d+)
+      | \s*[×xX*·⋅]\s*10\s*(?:\^|\*\*)\s*\(?(?P<pow>[-+−]?\d+)\)?
+      | \s*[×xX*·⋅]\s*10(?P<sup>[⁻⁺]?[⁰¹²³⁴⁵⁶⁷⁸⁹]+)
+      | \s*/\s*(?P<den>[1-9]\d*)(?![\d.,/])
+    )?
+""", re.VERBOSE)
+
+
+def extract_numbers(text: str) -> List[NumberToken]:
+    """Find every number in text.
+
+    Handles thousands separators (36,504), decimals, signs, e-notation
+    (1.6e-19), "× 10^n" / "x 10⁻ⁿ" scientific notation and simple
+    fractions (19/12). Units and markdown around a number are ignored, and
+    a '-' directly after a digit is read as subtraction or a range
+    ("380-700"), not a sign.
+    """
+    return _extract_numbers(text)
+
+
+def extract_numbers_batch(texts: Sequence[str]) -> List[List[NumberToken]]:
+    """extract_numbers of every text, from one regex pass over all of them"""
+    joined = _join_rows(texts)
+    if joined is None:
+        return [extract_numbers(text) for text in texts]
+    positions = []
+    tokens = _extract_numbers(joined, positions)
+    found = [[] for _ in texts]
+    for row, token in zip(_rows_of(texts, positions), tokens):
+        found[row].append(token)
+    return found
+
+
+def _extract_numbers(text: str, positions: List[int] = None) -> List[NumberToken]:
+    """extract_numbers, also appending each number's start to `positions`"""
+    tokens = []
+    cache = _TOKEN_CACHE
+    for match in NUMBER_PATTERN.finditer(text):
+        # The same number text always parses the same, except for a sign
+        # right after a bracket, so parsed tokens are shared
+        written = match.group(0)
+        if written[0] in _SIGNS and match.start() > 0 and text[match.start() - 1] in ')]':
+            token = _parse_number(match, text)
+        else:
+            token = cache.get(written)
+            if token is None:
+                if len(cache) >= _MATCH_CACHE_SIZE:
+                    cache.clear()
+                token = cache[written] = _parse_number(match, text)
+        tokens.append(token)
+        if positions is not None:
+            positions.append(match.start())
+    return tokens
+
+
+def _parse_number(match: re.Match, text: str) -> NumberToken:
+    sign, digits, frac, exp, power, sup, den = match.groups()
+    if sign and match.start() > 0 and text[match.start() - 1] in ')]':
+        sign = None
+
+    if ',' in digits:
+        digits = digits.replace(',', '')
+    frac = frac or ''
+    negative = sign == '-' or sign == '−'
+
+    exponent = exp or power or sup
+    if exponent is None:
+        # Plain numbers, by far the most common, skip the exponent handling
+        value = float(f"{digits}.{frac}" if frac else digits)
+        resolution = _RESOLUTIONS[len(frac)] if len(frac) < len(_RESOLUTIONS) else 0.5 * 10.0 ** -len(frac)
+    else:
+        exponent = int(exponent.translate(_SUPERSCRIPTS).translate(_MINUS_SIGNS))
+        value = float(f"{digits}.{frac or '0'}e{exponent}")
+        try:
+            resolution = 0.5 * 10.0 ** (exponent - len(frac))
+        except OverflowError:
+            # "1e999": the value is inf too, and numbers_match rejects it
+            resolution = math.inf
+    if negative:
+        value = -value
+
+    if den:
+        value /= int(den)
+        resolution = 0.0
+
+    return NumberToken(match.group(0).strip(), value, resolution)
+
+
+def exact_integers(tokens: Iterable[NumberToken]) -> Tuple[NumberToken, ...]:
+    """Reference values: integers are exact, decimals keep their rounding slack"""
+    return tuple(
+        token._replace(resolution=0.0) if token.resolution == 0.5 else token
+        for token in tokens
+    )
+
+
+def numbers_match(expected: NumberToken, found: NumberToken,
+                  rel_tol: float = 1e-6, abs_tol: float = 0.0) -> bool:
+    """True if found equals expected to the precision expected was written to.
+
+    Only the expected value's precision counts: a response rounded more
+    coarsely than the reference ("3" for 2.5) does not match, beyond
+    rel_tol / abs_tol. Numbers too large for a float never match.
+    """
+    tolerance = max(expected.resolution, rel_tol * abs(expected.value), abs_tol)
+    return math.isfinite(tolerance) and abs(found.value - expected.value) <= tolerance
+
+
+def compare_numbers(found: List[NumberToken], expected: List[NumberToken],
+                    rel_tol: float = 1e-6, abs_tol: float = 0.0) -> Dict:
+    """Single-row version of compare_numbers_batch with scalar results"""
+    result = {
+        'matched': False,
+        'found_index': -1,
+        'expected_index': -1,
+        'difference': float('nan'),
+        'error_rate': float('nan')
+    }
+    for i, f in enumerate(found):
+        for j, e in enumerate(expected):
+            if numbers_match(e, f, rel_tol, abs_tol):
+                result['matched'] = True
+            difference = abs(f.value - e.value)
+            error_rate = difference / abs(e.value) if e.value != 0 else float('inf')
+            # NaN (inf against inf) ranks last, as in the batch version
+            if (result['found_index'] < 0 or error_rate < result['error_rate']
+                    or math.isnan(result['error_rate']) and not math.isnan(error_rate)):
+                result.update(found_index=i, expected_index=j,
+                              difference=difference, error_rate=error_rate)
+    return result
+
+
+def compare_numbers_batch(found: List[List[NumberToken]], expected: List[List[NumberToken]],
+                          rel_tol: float = 1e-6, abs_tol: float = 0.0) -> Dict[str, np.ndarray]:
+    """Compare every found number against every expected value, row by row.
+
+    Returns per-row arrays: 'matched' (any pair within tolerance), and for
+    the closest pair by relative error 'found_index', 'expected_index',
+    'difference' and 'error_rate' (-1 / NaN when a row has no pairs).
+    All pairwise work is done in NumPy over the flattened batch.
+    """
+    n = len(found)
+    found_counts = np.fromiter((len(row) for row in found), dtype=np.int64, count=n)
+    expected_counts = np.fromiter((len(row) for row in expected), dtype=np.int64, count=n)
+
+    found_values = np.array([t.value for row in found for t in row], dtype=np.float64)
+    expected_values = np.array([t.value for row in expected for t in row], dtype=np.float64)
+    expected_res = np.array([t.resolution for row in expected for t in row], dtype=np.float64)
+
+    found_start = np.concatenate(([0], np.cumsum(found_counts)[:-1])) if n else found_counts
+    expected_start = np.concatenate(([0], np.cumsum(expected_counts)[:-1])) if n else expected_counts
+
+    # Every (found, expected) pair within the same row, in found-major order
+    found_row = np.repeat(np.arange(n), found_counts)
+    pairs_per_found = expected_counts[found_row]
+    pair_found = np.repeat(np.arange(len(found_values)), pairs_per_found)
+    pair_row = found_row[pair_found]
+    pair_offset = np.arange(len(pair_found)) - np.repeat(np.cumsum(pairs_per_found) - pairs_per_found, pairs_per_found)
+    pair_expected = expected_start[pair_row] + pair_offset
+
+    f = found_values[pair_found]
+    e = expected_values[pair_expected]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        difference = np.abs(f - e)
+        error_rate = np.where(e != 0, difference / np.abs(e), np.inf)
+    tolerance = np.maximum(np.maximum(expected_res[pair_expected], rel_tol * np.abs(e)), abs_tol)
+    # Numbers too large for a float never match
+    hits = (difference <= tolerance) & np.isfinite(tolerance)
+
+    matched = np.bincount(pair_row, weights=hits, minlength=n) > 0
+
+    best_found = np.full(n, -1, dtype=np.int64)
+    best_expected = np.full(n, -1, dtype=np.int64)
+    best_difference = np.full(n, np.nan)
+    best_error_rate = np.full(n, np.nan)
+    if len(pair_row):
+        # Stable sort keeps the first pair among equally close ones
+        order = np.lexsort((error_rate, pair_row))
+        first = order[np.r_[True, pair_row[order][1:] != pair_row[order][:-1]]]
+        rows = pair_row[first]
+        best_found[rows] = pair_found[first] - found_start[rows]
+        best_expected[rows] = pair_expected[first] - expected_start[rows]
+        best_difference[rows] = difference[first]
+        best_error_rate[rows] = error_rate[first]
+
+    return {
+        'matched': matched,
+        'found_index': best_found,
+        'expected_index': best_expected,
+        'difference': best_difference,
+        'error_rate': best_error_rate
+    }
+
+
+_BOLD_PATTERN = re.compile(r'\*\*(.+?)\*\*', re.DOTALL)
+_NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+
+
+def extract_answer(response: str):
+    """Reduce a free-text response to the answer it gives.
+
+    Models usually bold their final answer, so the last **bold** span is
+    used when there is one. Returns the last number in it as a
+    NumberToken, or else its normalized words as a frozenset.
+    """
+    bold = _BOLD_PATTERN.findall(response)
+    text = bold[-1] if bold else response
+
+    numbers = extract_numbers(text)
+    if numbers:
+        return numbers[-1]
+    return frozenset(_NON_WORD_PATTERN.sub(' ', text.lower()).split())
+
+
+def answers_agree(a, b, rel_tol: float = 1e-6, abs_tol: float = 0.0,
+                  min_overlap: float = 0.6) -> bool:
+    """Whether two extracted answers say the same thing"""
+    if isinstance(a, NumberToken) and isinstance(b, NumberToken):
+        # Neither sample is the reference: agree if either one, read as
+        # the reference, accepts the other
+        a_ref, b_ref = exact_integers((a, b))
+        return numbers_match(a_ref, b, rel_tol, abs_tol) or numbers_match(b_ref, a, rel_tol, abs_tol)
+    if isinstance(a, frozenset) and isinstance(b, frozenset):
+        if not a or not b:
+            return a == b
+        return len(a & b) / len(a | b) >= min_overlap
+    return False
+
+
+def cluster_answers(responses: Iterable[str], rel_tol: float = 1e-6,
+                    abs_tol: float = 0.0) -> List[Dict]:
+    """Greedily group responses whose extracted answers agree.
+
+    Returns clusters largest first, each with the first response's answer
+    as its representative and the indices of its members.
+    """
+    clusters = []
+    for index, response in enumerate(responses):
+        answer = extract_answer(response)
+        for cluster in clusters:
+            if answers_agree(cluster['key'], answer, rel_tol, abs_tol):
+                cluster['members'].append(index)
+                break
+        else:
+            clusters.append({'key': answer, 'answer': response, 'members': [index]})
+
+    clusters.sort(key=lambda cluster: -len(cluster['members']))
+    return clusters
@@ -0,0 +1,248 @@
+# src/benchmark.py
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from src.aggregation import HallucinationAggregator
+from src.analyzers import extract_numbers
+from src.dataset_loader import DatasetSource
+from src.detector import EduHallucinationDetector
+from src.rate_limit import RateLimiter
+from src.records import ResultStore
+from src.storage import write_results_csv, write_results_json, write_results_parquet
+from src.stub_server import StubModelServer
+
+# Share of synthetic answers that are deliberately wrong
+WRONG_ANSWER_RATE = 0.3
+
+# Extra answers per question for the consistency check
+CONSISTENCY_SAMPLES = 5
+
+# How synthetic answers are phrased; plain, formatted, confident and hedged
+ANSWER_TEMPLATES = [
+    "{answer}",
+    "The answer is **{answer}**.",
+    "It is definitely {answer}.",
+    "I think it's probably {answer}, but I'm not sure.",
+    "Based on standard references, the answer is {answer}. This is well established."
+]
+
+
+def _wrong_answer(rng: random.Random, answer: str, answers: List[str]) -> str:
+    """A plausible but incorrect answer: a perturbed number or another question's answer"""
+    numbers = extract_numbers(answer)
+    if numbers:
+        value = numbers[0].value * rng.choice([0.9, 1.1, 2, 0.5]) + rng.randint(1, 9)
+        return f"{value:g}"
+    return rng.choice(answers)
+
+
+def synthetic_corpus(dataset: Dict, size: int, seed: int = 0) -> List[Dict]:
+    """Build `size` result-like rows from the questions in a dataset dict.
+
+    Questions are drawn with replacement and paired with synthetic model
+    answers (plain, formatted, confident and hedged; WRONG_ANSWER_RATE of
+    them wrong) plus CONSISTENCY_SAMPLES re-asked answers. The same seed
+    always gives the same corpus.
+    """
+    rng = random.Random(seed)
+    questions = [
+        (category, subcategory, question_data)
+        for category, subcategories in dataset["categories"].items()
+        for subcategory, items in subcategories.items()
+        for question_data in items
+    ]
+    answers = [str(question_data["a"]) for _, _, question_data in questions]
+
+    corpus = []
+    for i in range(size):
+        category, subcategory, question_data = rng.choice(questions)
+        expected = str(question_data["a"])
+        given = _wrong_answer(rng, expected, answers) if rng.random() < WRONG_ANSWER_RATE else expected
+
+        corpus.append({
+            "category": category,
+            "subcategory": subcategory,
+            "difficulty": question_data.get("difficulty", "medium"),
+            # Numbered so no two rows are identical; detect_batch still scores
+            # rows differing only in the question once, as no built-in check reads it
+            "question": f"{question_data['q']} (#{i})",
+            "expected_answer": expected,
+            "ai_answer": rng.choice(ANSWER_TEMPLATES).format(answer=given),
+            "samples": [
+                rng.choice(ANSWER_TEMPLATES).format(
+                    answer=given if rng.random() < 0.7 else _wrong_answer(rng, expected, answers)
+                )
+                for _ in range(CONSISTENCY_SAMPLES)
+            ]
+        })
+    return corpus
+
+
+def time_best(run: Callable[[], object], repeats: int = 3, setup: Callable[[], object] = None) -> float:
+    """Best wall time of `repeats` runs; `setup` (untimed) runs before each one"""
+    best = float('inf')
+    for _ in range(repeats):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _measurement(items: int, seconds: float) -> Dict:
+    return {
+        'items': items,
+        'seconds': round(seconds, 6),
+        'items_per_s': round(items / seconds, 2) if seconds > 0 else None
+    }
+
+
+def benchmark_detector(corpus: List[Dict], repeats: int = 3) -> Dict[str, Dict]:
+    """Time full detection, each individual check, aggregation and result writing"""
+    questions = [row["question"] for row in corpus]
+    responses = [row["ai_answer"] for row in corpus]
+    expected = [row["expected_answer"] for row in corpus]
+    types = [row["subcategory"] for row in corpus]
+    numeric = [row for row in corpus if extract_numbers(row["expected_answer"])]
+
+    # A fresh detector per repeat so its match caches start cold every time
+    state = {}
+
+    def fresh_detector():
+        state['detector'] = EduHallucinationDetector()
+
+    def timed(run: Callable[[EduHallucinationDetector], object], items: int) -> Dict:
+        return _measurement(items, time_best(lambda: run(state['detector']), repeats, fresh_detector))
+
+    results = {
+        'detect_hallucination': timed(
+            lambda d: [d.detect_hallucination(q, r, e, t)
+                       for q, r, e, t in zip(questions, responses, expected, types)],
+            len(corpus)
+        ),
+        'detect_batch': timed(
+            lambda d: d.detect_batch(questions, responses, expected, types), len(corpus)
+        ),
+        'check_calculation': timed(
+            lambda d: [d.check_calculation(row["question"], row["ai_answer"], row["expected_answer"])
+                       for row in numeric],
+            len(numeric)
+        ),
+        'analyze_confidence': timed(
+            lambda d: [d.analyze_confidence(r) for r in responses], len(corpus)
+        ),
+        'verify_facts': timed(
+            lambda d: [d.verify_facts(r, e) for r, e in zip(responses, expected)], len(corpus)
+        ),
+        'check_consistency': timed(
+            lambda d: [d.check_consistency(row["samples"]) for row in corpus], len(corpus)
+        ),
+    }
+
+    # Aggregation and writing work on finished result records
+    detector = EduHallucinationDetector()
+    batch = detector.detect_batch(questions, responses, expected, types)
+    records = [
+        {
+            "category": row["category"],
+            "subcategory": row["subcategory"],
+            "difficulty": row["difficulty"],
+            "question": row["question"],
+            "expected_answer": row["expected_answer"],
+            "ai_answer": row["ai_answer"],
+            "hallucination_detected": batch['hallucination_detected'][i],
+            "detection_confidence": batch['confidence'][i],
+            "detection_details": batch['detection_details'][i]
+        }
+        for i, row in enumerate(corpus)
+    ]
+
+    results['aggregation'] = _measurement(
+        len(records), time_best(lambda: HallucinationAggregator.from_results(records).summary(), repeats)
+    )
+
+    # Written from a ResultStore, as DatasetTester.save_final_results does
+    store = ResultStore(records)
+    with tempfile.TemporaryDirectory() as tmp:
+        results['write_json'] = _measurement(len(store), time_best(
+            lambda: write_results_json(store, os.path.join(tmp, "raw_results.json")), repeats
+        ))
+        results['write_csv'] = _measurement(len(store), time_best(
+            lambda: write_results_csv(store, os.path.join(tmp, "results.csv")), repeats
+        ))
+        results['write_parquet'] = _measurement(len(store), time_best(
+            lambda: write_results_parquet(store, os.path.join(tmp, "results.parquet")), repeats
+        ))
+
+    return results
+
+
+def benchmark_runner(corpus: List[Dict], requests: int = 200, concurrency: int = 16,
+                     latency: float = 0.02) -> Dict:
+    """Questions per second through a full DatasetTester run against a local stub server.
+
+    The run streams the questions from a JSONL dataset, queries the stub
+    through the rate limiter, scores and journals every answer and saves
+    the final results, all inside a temporary directory.
+    """
+    # Imported here so the detector benchmarks don't need the SDK
+    from openai import AsyncOpenAI
+    from run_test_dataset import DatasetTester
+
+    rows = corpus[:requests]
+    answers = {row["question"]: row["ai_answer"] for row in rows}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_path = os.path.join(tmp, "questions.jsonl")
+        with open(dataset_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps({
+                    "q": row["question"], "a": row["expected_answer"], "difficulty": row["difficulty"],
+                    "category": row["category"], "subcategory": row["subcategory"]
+                }) + "\n")
+
+        with StubModelServer(answers=answers, latency=latency) as server:
+            tester = DatasetTester(
+                concurrency=concurrency,
+                client=AsyncOpenAI(base_url=server.base_url, api_key="stub", max_retries=0),
+                # Limits far above what the stub can serve, so only our code is measured
+                rate_limiter=RateLimiter(requests_per_minute=1e9, tokens_per_minute=1e12),
+                dataset=DatasetSource(dataset_path),
+                results_dir=os.path.join(tmp, "results"),
+                vector_cache=os.path.join(tmp, "reference_vectors")
+            )
+            started = time.perf_counter()
+            # The run prints a line per question
+            with contextlib.redirect_stdout(io.StringIO()):
+                tester.run_tests()
+            seconds = time.perf_counter() - started
+
+    result = _measurement(len(rows), seconds)
+    result.update({'concurrency': concurrency, 'stub_latency_s': latency})
+    return result
+
+
+def compare_to_baseline(current: Dict[str, Dict], baseline: Dict[str, Dict],
+                        threshold: float = 0.2) -> List[Dict]:
+    """Benchmarks whose throughput fell more than `threshold` below the baseline"""
+    regressions = []
+    for name, before in baseline.items():
+        after = current.get(name)
+        if not after or not before.get('items_per_s') or not after.get('items_per_s'):
+            continue
+        change = after['items_per_s'] / before['items_per_s'] - 1
+        if change < -threshold:
+            regressions.append({
+                'benchmark': name,
+                'baseline_items_per_s': before['items_per_s'],
+                'items_per_s': after['items_per_s'],
+                'change': round(change, 4)
+            })
+    return regressions
@@ -0,0 +1,185 @@
+# src/cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+DEFAULT_CACHE_PATH = "cache/responses.sqlite"
+DEFAULT_MAX_BYTES = 1024 ** 3   # 1 GB of answer text
+
+CACHE_MODES = ('readwrite', 'replay', 'refresh', 'off')
+
+# How many writes between size checks
+_EVICTION_INTERVAL = 100
+
+
+class CacheMiss(LookupError):
+    """Raised in replay mode when a prompt has no cached answer"""
+
+
+class ResponseCache:
+    """Content-addressed SQLite cache of model answers.
+
+    Entries are keyed by a SHA-256 of (model, prompt, parameters), so any
+    change to the prompt template or model misses cleanly. Modes:
+
+    - readwrite: serve hits, call the model on misses and store the answer
+    - replay:    serve hits only; a miss raises CacheMiss (no network)
+    - refresh:   always call the model and overwrite the stored answer
+    - off:       bypass the cache entirely
+
+    The oldest-accessed entries are evicted once the stored text exceeds
+    `max_bytes`, and entries older than `max_age_days` are dropped.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, mode: str = 'readwrite',
+                 max_bytes: int = DEFAULT_MAX_BYTES, max_age_days: float = None):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}; expected one of {CACHE_MODES}")
+
+        self.path = path
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+        self._lock = threading.Lock()
+        self._writes_since_check = 0
+        self._conn = None
+
+        if mode != 'off':
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed_at)")
+            self._conn.commit()
+            self.evict()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, params: Dict = None) -> str:
+        """Stable hash of everything that determines the model's answer"""
+        payload = json.dumps({'model': model, 'prompt': prompt, 'params': params or {}},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached answer for key, or None"""
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1]):
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        """Store an answer, evicting old entries when the cache grows too big"""
+        if self._conn is None or self.mode == 'replay':
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode('utf-8')), now, now)
+            )
+            self._conn.commit()
+            self.stats['writes'] += 1
+            self._writes_since_check += 1
+            check = self._writes_since_check >= _EVICTION_INTERVAL
+        if check:
+            self.evict()
+
+    def fetch(self, model: str, prompt: str, call: Callable[[], str], **params) -> str:
+        """Return the cached answer or call() the model and cache the result"""
+        key = self.make_key(model, prompt, params)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = call()
+        self.put(key, model, response)
+        return response
+
+    async def fetch_async(self, model: str, prompt: str,
+                          call: Callable[[], Awaitable[str]], **params) -> str:
+        """Async version of fetch; call() returns an awaitable"""
+        key = self.make_key(model, prompt, params)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = await call()
+        self.put(key, model, response)
+        return response
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones over max_bytes"""
+        if self._conn is None or self.mode == 'replay':
+            return
+        with self._lock:
+            self._writes_since_check = 0
+            removed = 0
+            if self.max_age_days is not None:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (cutoff,)
+                ).rowcount
+
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if self.max_bytes is not None and total > self.max_bytes:
+                # Trim to 90% so we don't evict again on the very next write
+                target = total - int(self.max_bytes * 0.9)
+                freed = 0
+                stale = []
+                for key, size in self._conn.execute(
+                        "SELECT key, size FROM responses ORDER BY accessed_at"):
+                    stale.append((key,))
+                    freed += size
+                    if freed >= target:
+                        break
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+                removed += len(stale)
+
+            self._conn.commit()
+            self.stats['evictions'] += removed
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _lookup(self, key: str) -> Optional[str]:
+        if self.mode == 'off':
+            return None
+        cached = None if self.mode == 'refresh' else self.get(key)
+        if cached is not None:
+            self.stats['hits'] += 1
+            return cached
+        self.stats['misses'] += 1
+        if self.mode == 'replay':
+            raise CacheMiss(f"No cached response for key {key[:12]}")
+        return None
+
+    def _expired(self, created_at: float) -> bool:
+        return (self.max_age_days is not None and
+                created_at < time.time() - self.max_age_days * 86400)
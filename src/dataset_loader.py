@@ -0,0 +1,221 @@
+# src/dataset_loader.py
+import glob
+import json
+import os
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.question_generators import MANIFEST_FILE
+
+DEFAULT_DATASET_PATH = "data/hallucination_test_dataset.json"
+# Bytes read from a JSON dataset at a time
+READ_SIZE = 1 << 16
+
+# (question_data, category, subcategory), as DatasetTester consumes them
+QuestionItem = Tuple[Dict, str, str]
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse "i/N" (0 <= i < N) into (i, N)"""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N, got {spec!r}")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Shard index must satisfy 0 <= i < N, got {spec!r}")
+    return index, count
+
+
+def shard_of(category: str, subcategory: str, question: str, count: int) -> int:
+    """Stable shard number of a question, the same on every machine and format"""
+    return zlib.crc32(f"{category}\x1f{subcategory}\x1f{question}".encode('utf-8')) % count
+
+
+class _JsonReader:
+    """Incremental reader for the nested dataset JSON.
+
+    Only the structure around questions is walked by hand; each question
+    object (and the small metadata block) is decoded on its own, so at
+    most one READ_SIZE buffer plus one record is held at a time.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(READ_SIZE)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Malformed dataset JSON: expected {char!r}, found {self.peek()!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number may continue past the end of the buffer
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def items(self) -> Iterator[str]:
+        """Walk an object's keys; the caller consumes each value"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
+
+    def elements(self) -> Iterator:
+        """Decode an array's elements one at a time"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+
+def _iter_json(path: str) -> Iterator[QuestionItem]:
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _JsonReader(f)
+        for key in reader.items():
+            if key != 'categories':
+                reader.value()
+                continue
+            for category in reader.items():
+                for subcategory in reader.items():
+                    for question_data in reader.elements():
+                        yield question_data, category, subcategory
+
+
+def _read_manifest(directory: str) -> Optional[Dict]:
+    manifest = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(manifest):
+        return None
+    with open(manifest, 'r') as f:
+        return json.load(f)
+
+
+def _shard_files(path: str) -> List[str]:
+    if os.path.isdir(path):
+        # A manifest lists exactly the shards of its dataset; other JSONL
+        # files in the directory (results, old shards) are not questions
+        manifest = _read_manifest(path)
+        if manifest is not None:
+            return [os.path.join(path, shard['file']) for shard in manifest['shards']]
+        return sorted(glob.glob(os.path.join(path, '*.jsonl')))
+    return sorted(glob.glob(path)) if glob.has_magic(path) else [path]
+
+
+def _iter_jsonl(files: Iterable[str]) -> Iterator[QuestionItem]:
+    for file in files:
+        with open(file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                yield record, record.pop('category'), record.pop('subcategory')
+
+
+def read_metadata(path: str) -> Dict:
+    """Dataset metadata (total_questions etc.) without reading the questions"""
+    if os.path.isdir(path):
+        return (_read_manifest(path) or {}).get('metadata', {})
+    if not path.endswith('.json'):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _JsonReader(f)
+        for key in reader.items():
+            if key == 'metadata':
+                return reader.value()
+            # Older files may list metadata after the questions; stop rather than scan them
+            break
+    return {}
+
+
+class DatasetSource:
+    """Lazily iterated dataset questions with optional filters and sharding.
+
+    `path` is the nested dataset JSON, a JSONL file, a glob, or a directory
+    of JSONL shards (as written by create_dataset.py --generate). Iterating
+    yields (question_data, category, subcategory) one at a time, so memory
+    stays flat whatever the dataset size. `shard=(i, N)` keeps the questions
+    whose stable hash falls in shard i, so N machines split a dataset
+    without overlap.
+    """
+
+    def __init__(self, path: str = DEFAULT_DATASET_PATH,
+                 categories: Iterable[str] = None, subcategories: Iterable[str] = None,
+                 difficulties: Iterable[str] = None, shard: Tuple[int, int] = None):
+        self.path = path
+        self.categories = set(categories) if categories else None
+        self.subcategories = set(subcategories) if subcategories else None
+        self.difficulties = set(difficulties) if difficulties else None
+        self.shard = shard
+
+    @property
+    def filtered(self) -> bool:
+        return bool(self.categories or self.subcategories or self.difficulties or self.shard)
+
+    @property
+    def total(self) -> Optional[int]:
+        """Number of questions when known up front (unfiltered, with metadata)"""
+        if self.filtered:
+            return None
+        return read_metadata(self.path).get('total_questions')
+
+    def _iter_all(self) -> Iterator[QuestionItem]:
+        if os.path.isfile(self.path) and self.path.endswith('.json'):
+            return _iter_json(self.path)
+        return _iter_jsonl(_shard_files(self.path))
+
+    def __iter__(self) -> Iterator[QuestionItem]:
+        for question_data, category, subcategory in self._iter_all():
+            if self.categories and category not in self.categories:
+                continue
+            if self.subcategories and subcategory not in self.subcategories:
+                continue
+            if self.difficulties and question_data.get('difficulty', 'medium') not in self.difficulties:
+                continue
+            if self.shard and shard_of(category, subcategory, question_data['q'], self.shard[1]) != self.shard[0]:
+                continue
+            yield question_data, category, subcategory
@@ -1,145 +1,580 @@
 # src/detector.py
 import re
-from typing import Dict, List, Tuple
+import asyncio
+import gc
+import hashlib
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import repeat
+from typing import Awaitable, Callable, Dict, List, Tuple
 import json
+from src.analyzers import (MarkerMatcher, NumberToken, extract_numbers, exact_integers,
+                           compare_numbers, compare_numbers_batch, cluster_answers)
+from src.knowledge_base import AnswerIndex
+from src.memo import DetectionMemo, memo_key, normalize_response
+from src.pipeline import (DetectionBatch, DetectionContext, DetectionStage, PreparedBatch,
+                          PreparedResponse, run_stages, run_stages_batch)
+from src.question_bank import question_id
+from src.records import Detection
+from src.similarity import NEGATION_WORDS, SemanticIndex, negated
+
+# Bump whenever a change to the checks can change a verdict, so memoized
+# verdicts from older versions are no longer used
+DETECTOR_VERSION = "2.5"
 
 class EduHallucinationDetector:
     """Framework for detecting hallucinations in educational AI responses"""
     
-    def __init__(self):
-        self.detection_methods = {
-            'calculation_check': self.check_calculation,
-            'consistency_check': self.check_consistency,
-            'confidence_analysis': self.analyze_confidence,
-            'factual_verification': self.verify_facts
-        }
+    HIGH_CONFIDENCE_MARKERS = [
+        'definitely', 'certainly', 'exactly', 'precisely', 
+        'without a doubt', 'absolutely'
+    ]
+    
+    LOW_CONFIDENCE_MARKERS = [
+        'approximately', 'about', 'roughly', 'around',
+        'I think', 'perhaps', 'might be', 'possibly',
+        'not yet been announced', 'as of now'
+    ]
+    
+    def __init__(self, high_confidence_markers: List[str] = None,
+                 low_confidence_markers: List[str] = None,
+                 rel_tol: float = 1e-6, abs_tol: float = 0.0,
+                 agreement_threshold: float = 0.6,
+                 short_circuit: bool = False,
+                 answer_index: AnswerIndex = None,
+                 similarity: SemanticIndex = None,
+                 semantic_threshold: float = 0.6,
+                 memo: DetectionMemo = None):
+        # Numeric answers match when equal to the precision the expected
+        # answer was written to, or within these tolerances
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+        
+        # Below this share of samples agreeing, an answer is likely made up
+        self.agreement_threshold = agreement_threshold
+        
+        # Reference answers are parsed once here and reused for every response
+        self.answer_index = answer_index or AnswerIndex()
+        
+        # Offline similarity of mismatching responses to the reference; a
+        # close enough paraphrase of a non-numeric answer counts as a match
+        self.similarity = similarity or SemanticIndex()
+        self.semantic_threshold = semantic_threshold
+        
+        # Compiled once; custom lexicons can be loaded with analyzers.load_lexicon
+        self.confidence_matcher = MarkerMatcher({
+            'high': high_confidence_markers or self.HIGH_CONFIDENCE_MARKERS,
+            'low': low_confidence_markers or self.LOW_CONFIDENCE_MARKERS
+        })
+        
+        # Stop at the first decisive stage that flags a response; off by
+        # default so detection_details always lists every applicable check
+        self.short_circuit = short_circuit
+        
+        # Set to a Telemetry to time every check as detect.<stage name>
+        self.telemetry = None
+        
+        # Verdicts of responses seen before (up to markdown and whitespace)
+        # are reused instead of recomputed
+        self.memo = memo
+        self._fingerprint = None
+        self._stages_fingerprint = (None, None)
+        
+        # Detection pipeline, run in registration order
+        self.detection_methods = {}
+        self.register_detector(DetectionStage(
+            'calculation_check', self._check_calculation, 'calculation',
+            flag_key='error_detected', confidence_key='confidence',
+            question_types=['calculation'], decisive=True,
+            batch_check=self._check_calculation_batch, uses_question=False
+        ))
+        self.register_detector(DetectionStage(
+            'consistency_check', lambda ctx: self.check_consistency(ctx.samples), 'consistency',
+            flag_key='likely_hallucination', requires_samples=True,
+            uses_question=False
+        ))
+        self.register_detector(DetectionStage(
+            'confidence_analysis', lambda ctx: self.analyze_confidence(ctx.response.lower), 'confidence',
+            batch_check=self._analyze_confidence_batch, uses_question=False
+        ))
+        self.register_detector(DetectionStage(
+            'factual_verification', self._verify_facts, 'factual',
+            flag_key='mismatch', requires_expected=True,
+            batch_check=self._verify_facts_batch, uses_question=False
+        ))
+    
+    def register_detector(self, stage: DetectionStage, before: str = None):
+        """Add a stage to the pipeline, at the end or ahead of `before`"""
+        
+        if before is None:
+            self.detection_methods[stage.name] = stage
+            return
+        
+        stages = list(self.detection_methods.values())
+        names = [existing.name for existing in stages]
+        stages.insert(names.index(before), stage)
+        self.detection_methods = {existing.name: existing for existing in stages}
+    
+    @property
+    def fingerprint(self) -> str:
+        """Version plus every setting a verdict depends on, for memo keys"""
+        if self._fingerprint is None:
+            settings = [
+                DETECTOR_VERSION, self.rel_tol, self.abs_tol, self.agreement_threshold,
+                self.semantic_threshold, self.short_circuit, self.similarity.vectorizer.fingerprint,
+                sorted(self.answer_index.aliases.items()), self.confidence_matcher.lexicons
+            ]
+            self._fingerprint = hashlib.sha1(repr(settings).encode('utf-8')).hexdigest()[:16]
+        # Custom or replaced stages change verdicts too
+        stages = tuple(self.detection_methods.values())
+        cached_stages, stages_fingerprint = self._stages_fingerprint
+        if cached_stages != stages:
+            digest = hashlib.sha1('\n'.join(stage.fingerprint for stage in stages).encode('utf-8'))
+            stages_fingerprint = digest.hexdigest()[:16]
+            self._stages_fingerprint = (stages, stages_fingerprint)
+        return f"{self._fingerprint}:{stages_fingerprint}"
+    
+    def memo_key(self, question: str, ai_response: str, expected_answer=None, question_type=None) -> str:
+        return self._memo_key(question, normalize_response(ai_response), expected_answer, question_type)
+    
+    def _memo_key(self, question: str, text: str, expected_answer, question_type) -> str:
+        return memo_key(self.fingerprint, question_id(str(question)), expected_answer, question_type, text)
     
     def detect_hallucination(self, question: str, ai_response: str, 
                            expected_answer: str = None, 
-                           question_type: str = None) -> Dict:
-        """Main detection method that combines multiple techniques"""
-        
-        results = {
-            'question': question,
-            'ai_response': ai_response,
-            'expected_answer': expected_answer,
-            'hallucination_detected': False,
-            'confidence': 0.0,
-            'detection_details': {}
+                           question_type: str = None,
+                           samples: List[str] = None) -> Detection:
+        """Main detection method that combines multiple techniques
+        
+        `samples` are optional extra answers to the same question; when
+        given, the consistency check runs over them. The checks read the
+        response without markdown emphasis ("**1**,000" is 1,000), the
+        same text memo keys are built from.
+        """
+        
+        text = normalize_response(ai_response)
+        # Extra samples make a verdict specific to this call
+        key = None
+        if self.memo is not None and not samples:
+            key = self._memo_key(question, text, expected_answer, question_type)
+            verdict = self.memo.get(key)
+        if key is None or verdict is None:
+            verdict = self._score(
+                DetectionContext(question, text, expected_answer, question_type, samples)
+            )
+            if key is not None:
+                self.memo.put(key, verdict)
+        return Detection(question, ai_response, expected_answer, *verdict)
+    
+    def detect_batch(self, questions, ai_responses=None, 
+                     expected_answers=None, question_types=None) -> Dict[str, List]:
+        """Run detection over whole columns and return columnar results.
+        
+        Takes lists, pandas Series or a single DataFrame (with question /
+        ai_response / expected_answer / question_type columns, or the
+        ai_answer / subcategory names used in raw_results.json). Returns a
+        dict of equal-length lists with the same fields and values as
+        detect_hallucination's Detection, each row with its own
+        detection_details dict.
+        
+        Rows are scored once per distinct input the pipeline reads (the
+        question is left out when no stage reads it), and the distinct
+        ones go through the pipeline a stage at a time rather than a row
+        at a time: confidence markers and answer phrases are found with
+        one regex per response, numbers extracted in one regex pass and
+        compared in one NumPy batch, and similarity scored for all
+        mismatches at once. Words and numbers are only extracted where a
+        response doesn't already give the expected answer word for word.
+        """
+        
+        if hasattr(questions, 'columns'):
+            questions, ai_responses, expected_answers, question_types = \
+                self._columns_from_frame(questions)
+        
+        questions = _as_column(questions)
+        n = len(questions)
+        ai_responses = _as_column(ai_responses, n)
+        expected_answers = _as_column(expected_answers, n)
+        question_types = _as_column(question_types, n)
+        
+        if not (len(ai_responses) == len(expected_answers) == len(question_types) == n):
+            raise ValueError("detect_batch columns must all have the same length")
+        
+        with _gc_paused():
+            return self._detect_columns(questions, ai_responses, expected_answers, question_types)
+    
+    def _detect_columns(self, questions: List, ai_responses: List,
+                        expected_answers: List, question_types: List) -> Dict[str, List]:
+        n = len(questions)
+        # Score each distinct row once, as detect_hallucination scores it;
+        # archives repeat the same answers a lot. Memo keys include the
+        # question, so with a memo rows keep theirs too.
+        stages = list(self.detection_methods.values())
+        by_question = self.memo is not None or any(stage.uses_question for stage in stages)
+        texts = {response: normalize_response(response) for response in set(ai_responses)}
+        # Each row as the position of its first occurrence among the distinct rows
+        distinct = {}
+        row_ids = [
+            distinct.setdefault(row, len(distinct))
+            for row in zip(questions if by_question else repeat(None, n),
+                           map(texts.__getitem__, ai_responses), expected_answers, question_types)
+        ]
+        verdicts = [None] * len(distinct)
+        memo_keys = {}
+        if self.memo is not None:
+            for row, row_id in distinct.items():
+                memo_keys[row] = self._memo_key(*row)
+                verdicts[row_id] = self.memo.get(memo_keys[row])
+        
+        misses = [row for row, row_id in distinct.items() if verdicts[row_id] is None]
+        if misses:
+            batch_questions, batch_texts, batch_expected, batch_types = (list(column) for column in zip(*misses))
+            batch = DetectionBatch(batch_questions, PreparedBatch(batch_texts), batch_expected, batch_types)
+            for row, verdict in zip(misses, run_stages_batch(stages, batch, self.short_circuit, self.telemetry)):
+                verdicts[distinct[row]] = verdict
+                if self.memo is not None:
+                    self.memo.put(memo_keys[row], verdict)
+        
+        # Repeats of a row get their own copy of its details, so callers can
+        # modify one row's details without changing the others
+        details_col = []
+        copiers = [None] * len(verdicts)
+        seen = [False] * len(verdicts)
+        for row_id in row_ids:
+            details = verdicts[row_id][2]
+            if seen[row_id]:
+                copy = copiers[row_id]
+                if copy is None:
+                    copy = copiers[row_id] = _copier(details)
+                details = copy()
+            else:
+                seen[row_id] = True
+            details_col.append(details)
+        
+        return {
+            'question': questions,
+            'ai_response': ai_responses,
+            'expected_answer': expected_answers,
+            'hallucination_detected': [verdicts[row_id][0] for row_id in row_ids],
+            'confidence': [verdicts[row_id][1] for row_id in row_ids],
+            'detection_details': details_col
         }
+    
+    @staticmethod
+    def _columns_from_frame(frame) -> Tuple:
+        """Pick detect_batch input columns out of a DataFrame"""
         
-        # Run different detection methods based on question type
-        if question_type == 'calculation':
-            calc_result = self.check_calculation(question, ai_response, expected_answer)
-            results['detection_details']['calculation'] = calc_result
-            if calc_result['error_detected']:
-                results['hallucination_detected'] = True
-                results['confidence'] = calc_result['confidence']
-        
-        # Check for confidence markers
-        confidence_result = self.analyze_confidence(ai_response)
-        results['detection_details']['confidence'] = confidence_result
-        
-        # Check for factual accuracy if we have expected answer
-        if expected_answer:
-            fact_result = self.verify_facts(ai_response, expected_answer)
-            results['detection_details']['factual'] = fact_result
-            if fact_result['mismatch']:
-                results['hallucination_detected'] = True
+        def pick(*names):
+            for name in names:
+                if name in frame.columns:
+                    return frame[name]
+            return None
         
-        return results
+        return (
+            pick('question'),
+            pick('ai_response', 'ai_answer'),
+            pick('expected_answer', 'expected'),
+            pick('question_type', 'subcategory', 'type')
+        )
+    
+    def _score(self, context: DetectionContext, 
+               precomputed: Dict = None) -> Tuple[bool, float, Dict]:
+        """Run the pipeline for one response and return (detected, confidence, details)"""
+        
+        return run_stages(self.detection_methods.values(), context, 
+                          self.short_circuit, precomputed, self.telemetry)
     
     def check_calculation(self, question: str, response: str, expected: str) -> Dict:
         """Check mathematical calculations for errors"""
         
-        # Extract numbers from response
-        numbers_in_response = re.findall(r'[\d,]+', response)
-        numbers_in_response = [n.replace(',', '') for n in numbers_in_response]
+        return self._check_calculation(DetectionContext(question, response, expected))
+    
+    def check_calculation_batch(self, questions: List[str], responses: List[str], 
+                                expecteds: List[str]) -> List[Dict]:
+        """check_calculation over many responses with one vectorized comparison"""
         
-        result = {
-            'error_detected': False,
-            'confidence': 0.0,
-            'details': {}
-        }
+        batch = DetectionBatch(list(questions), PreparedBatch(list(responses)),
+                               list(expecteds), [None] * len(questions))
+        return self._check_calculation_batch(batch, list(range(len(batch))))
+    
+    def _check_calculation(self, context: DetectionContext) -> Dict:
+        found = context.response.numbers
+        expected_numbers = _expected_numbers(str(context.expected)) if context.expected else ()
+        comparison = compare_numbers(found, expected_numbers, self.rel_tol, self.abs_tol)
         
-        if expected and str(expected) not in numbers_in_response:
-            result['error_detected'] = True
-            result['confidence'] = 0.9
-            
-            # Try to find the incorrect number
-            for num in numbers_in_response:
-                if len(num) >= len(str(expected)) - 2:  # Similar length
-                    try:
-                        diff = abs(int(num) - int(expected))
-                        error_rate = diff / int(expected)
-                        result['details'] = {
-                            'found_number': num,
-                            'expected': expected,
-                            'difference': diff,
-                            'error_rate': f"{error_rate*100:.2f}%"
-                        }
-                        break
-                    except:
-                        pass
+        return _calculation_result(context.expected, found, expected_numbers, comparison)
+    
+    def _check_calculation_batch(self, batch: DetectionBatch, rows: List[int]) -> List[Dict]:
+        found = batch.responses.numbers_at(rows)
+        expected = [batch.expected[i] for i in rows]
+        expected_numbers = [_expected_numbers(str(value)) if value else () for value in expected]
+        comparison = compare_numbers_batch(found, expected_numbers, self.rel_tol, self.abs_tol)
+        # Plain lists index far faster than NumPy arrays one element at a time
+        comparison = {key: column.tolist() for key, column in comparison.items()}
         
-        return result
+        return [
+            _calculation_result(expected[k], found[k], expected_numbers[k],
+                                {key: column[k] for key, column in comparison.items()})
+            for k in range(len(rows))
+        ]
     
     def analyze_confidence(self, response: str) -> Dict:
         """Analyze confidence markers in the response"""
         
-        high_confidence_markers = [
-            'definitely', 'certainly', 'exactly', 'precisely', 
-            'without a doubt', 'absolutely'
-        ]
+        return _confidence_result(self.confidence_matcher.find(response))
+    
+    def _analyze_confidence_batch(self, batch: DetectionBatch, rows: List[int]) -> List[Dict]:
+        lower = batch.responses.lower
+        return [_confidence_result(found) for found in self.confidence_matcher.find_batch([lower[i] for i in rows])]
+    
+    def check_consistency(self, responses: List[str], total_samples: int = None) -> Dict:
+        """Check consistency across multiple responses to same question
         
-        low_confidence_markers = [
-            'approximately', 'about', 'roughly', 'around',
-            'I think', 'perhaps', 'might be', 'possibly',
-            'not yet been announced', 'as of now'
-        ]
+        Responses are clustered by their extracted answer (numerically or by
+        normalized words). Agreement is the share of responses in the
+        largest cluster. `total_samples` is the planned sample count when
+        only some of the responses are in; `settled` then says whether the
+        remaining samples could still change the verdict.
+        """
         
-        result = {
-            'confidence_level': 'neutral',
-            'markers_found': []
+        total = max(total_samples or len(responses), len(responses))
+        clusters = cluster_answers(responses, self.rel_tol, self.abs_tol)
+        largest = len(clusters[0]['members']) if clusters else 0
+        agreement = largest / len(responses) if responses else 0.0
+        
+        # Verdict on the full sample: fixed once the remaining samples can't
+        # push the largest cluster across the threshold either way
+        remaining = total - len(responses)
+        settled_consistent = total > 0 and largest / total >= self.agreement_threshold
+        settled_inconsistent = total > 0 and (largest + remaining) / total < self.agreement_threshold
+        
+        return {
+            'agreement': round(agreement, 4),
+            'n_samples': len(responses),
+            'n_clusters': len(clusters),
+            'majority_answer': clusters[0]['answer'] if clusters else None,
+            'likely_hallucination': bool(responses) and agreement < self.agreement_threshold,
+            'settled': settled_consistent or settled_inconsistent
         }
+    
+    async def sample_consistency(self, prompt: str, sample: Callable[[str, int], Awaitable[str]],
+                                 n_samples: int = 5, parallel: int = 3) -> Dict:
+        """Ask the same prompt up to n_samples times and check consistency
         
-        response_lower = response.lower()
+        `sample(prompt, index)` returns one model answer. Up to `parallel`
+        samples run at once, and sampling stops as soon as the remaining
+        samples could no longer change the verdict, so easy questions
+        usually cost `parallel` calls rather than n_samples.
+        """
         
-        for marker in high_confidence_markers:
-            if marker in response_lower:
-                result['confidence_level'] = 'high'
-                result['markers_found'].append(marker)
+        responses = []
+        pending = set()
+        next_index = 0
         
-        for marker in low_confidence_markers:
-            if marker in response_lower:
-                result['confidence_level'] = 'low'
-                result['markers_found'].append(marker)
+        try:
+            while True:
+                while next_index < n_samples and len(pending) < parallel:
+                    pending.add(asyncio.ensure_future(sample(prompt, next_index)))
+                    next_index += 1
+                if not pending:
+                    break
+                
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                responses.extend(task.result() for task in done)
+                
+                if self.check_consistency(responses, n_samples)['settled']:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
         
+        result = self.check_consistency(responses, n_samples)
+        result['stopped_early'] = len(responses) < n_samples
         return result
     
-    def check_consistency(self, responses: List[str]) -> Dict:
-        """Check consistency across multiple responses to same question"""
-        # This would be used when we ask the same question multiple times
-        pass
-    
     def verify_facts(self, response: str, expected: str) -> Dict:
         """Basic factual verification"""
         
-        result = {
-            'mismatch': False,
-            'similarity': 0.0
-        }
+        return self._verify_facts(DetectionContext(None, response, expected))
+    
+    def _verify_facts(self, context: DetectionContext) -> Dict:
+        return self._verify_facts_batch(DetectionBatch.of(context), [0])[0]
+    
+    def _verify_facts_batch(self, batch: DetectionBatch, rows: List[int]) -> List[Dict]:
+        responses = batch.responses
+        lower = responses.lower
+        references = [self.answer_index.get(str(batch.expected[i])) for i in rows]
+        results = []
+        numeric = []
+        worded = []
+        
+        for k, (i, reference) in enumerate(zip(rows, references)):
+            results.append({
+                'mismatch': False,
+                'similarity': 0.0,
+                'semantic_match': False
+            })
+            # Any alternative ("Nile or Amazon") given as a phrase or alias
+            # counts; only the rest need the response's words and numbers
+            if self.answer_index.mentions(reference, lower[i]):
+                continue
+            if _is_numeric(reference):
+                numeric.append(k)
+            else:
+                results[k]['mismatch'] = True
+                worded.append(k)
         
-        # Simple check - in real implementation, this would be more sophisticated
-        if expected.lower() not in response.lower():
-            result['mismatch'] = True
-            
-            # Calculate simple similarity
-            expected_words = set(expected.lower().split())
-            response_words = set(response.lower().split())
-            
-            if expected_words and response_words:
-                overlap = len(expected_words & response_words)
-                result['similarity'] = overlap / len(expected_words)
+        if numeric:
+            numeric_rows = [rows[k] for k in numeric]
+            normalized = responses.normalized_at(numeric_rows)
+            found = responses.numbers_at(numeric_rows)
+            for k, text, numbers in zip(numeric, normalized, found):
+                i = rows[k]
+                matched, _ = self.answer_index.verify(references[k], text, numbers,
+                                                      self.rel_tol, self.abs_tol, lower[i])
+                if matched:
+                    continue
+                result = results[k]
+                result['mismatch'] = True
+                # Numbers decide numeric answers; similarity is plain word overlap
+                response_words = responses.response(i).word_set
+                if response_words:
+                    result['similarity'] = max(
+                        (len(alternative.tokens & response_words) / len(alternative.tokens)
+                         for alternative in references[k].alternatives if alternative.tokens),
+                        default=0.0
+                    )
+        
+        if worded:
+            # Closest wording of any alternative, scored for all worded mismatches at once
+            responses.normalized_at([rows[k] for k in worded])
+            prepared = {k: responses.response(rows[k]) for k in worded}
+            scores = self.similarity.score([
+                (prepared[k].content_words, [alternative.text for alternative in references[k].alternatives])
+                for k in worded
+            ])
+            for k, score in zip(worded, scores):
+                result = results[k]
+                result['similarity'] = round(float(score), 4)
+                if score >= self.semantic_threshold and _same_polarity(references[k], prepared[k]):
+                    result['mismatch'] = False
+                    result['semantic_match'] = True
+        
+        return results
+
+
+def _is_numeric(reference) -> bool:
+    return any(alternative.numbers or alternative.numeric_range for alternative in reference.alternatives)
+
+
+def _same_polarity(reference, response: PreparedResponse) -> bool:
+    """A paraphrase can't add or drop a negation"""
+    response_negated = not NEGATION_WORDS.isdisjoint(response.word_set)
+    return response_negated == any(negated(alternative.text) for alternative in reference.alternatives)
+
+
+@lru_cache(maxsize=65536)
+def _expected_numbers(expected: str) -> Tuple[NumberToken, ...]:
+    """Parsed numeric alternatives of an expected answer (reused across rows).
+    
+    Integer answers are exact; only answers written with decimals or in
+    scientific notation get rounding slack from their written precision.
+    """
+    return exact_integers(extract_numbers(expected))
+
+
+def _confidence_result(found: Dict[str, List[str]]) -> Dict:
+    """analyze_confidence's result from the markers found (None when there are none)"""
+    
+    if not found:
+        return {'confidence_level': 'neutral', 'markers_found': []}
+    
+    result = {
+        'confidence_level': 'neutral',
+        'markers_found': found['high'] + found['low']
+    }
+    
+    if found['low']:
+        result['confidence_level'] = 'low'
+    elif found['high']:
+        result['confidence_level'] = 'high'
+    
+    return result
+
+
+def _calculation_result(expected, found: List[NumberToken], 
+                        expected_numbers: Tuple[NumberToken, ...], comparison: Dict) -> Dict:
+    """Build the check_calculation result from a number comparison"""
+    
+    result = {
+        'error_detected': False,
+        'confidence': 0.0,
+        'details': {}
+    }
+    
+    if expected_numbers and not comparison['matched']:
+        result['error_detected'] = True
+        result['confidence'] = 0.9
         
+        # Report the number closest to the expected answer
+        best = int(comparison['found_index'])
+        if best >= 0:
+            result['details'] = {
+                'found_number': found[best].text,
+                'expected': expected,
+                'difference': float(comparison['difference']),
+                'error_rate': f"{comparison['error_rate']*100:.2f}%"
+            }
+    
+    return result
+
+
+def _copier(value) -> Callable[[], object]:
+    """Function returning a fresh copy of a detection_details structure.
+    
+    Nested dicts and lists of plain values are copied, and which of them
+    are nested is worked out once, here, rather than on every copy.
+    """
+    items = value.items() if isinstance(value, dict) else enumerate(value)
+    nested = [(key, _copier(item)) for key, item in items if isinstance(item, (dict, list))]
+    if not nested:
+        return value.copy
+    
+    def copy():
+        result = value.copy()
+        for key, copy_item in nested:
+            result[key] = copy_item()
         return result
+    return copy
+
+
+@contextmanager
+def _gc_paused():
+    """Pause the cyclic garbage collector for a batch.
+    
+    A batch allocates a tuple and a few dicts per row, none of them in
+    reference cycles, and would otherwise trigger full rescans of a heap
+    holding the whole corpus.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _as_column(values, length: int = None) -> List:
+    """Turn a list / tuple / pandas Series (or None) into a plain list.
+    
+    Missing pandas values (NaN / None) become None so they behave like an
+    omitted argument to detect_hallucination.
+    """
+    if values is None:
+        return [None] * (length or 0)
+    if getattr(values, 'hasnans', False):
+        values = values.astype(object).where(values.notna(), None)
+    if hasattr(values, 'tolist'):
+        return values.tolist()
+    return list(values)
@@ -1 +1,191 @@
- 
+# src/evaluation.py
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RESAMPLES = 1000
+DEFAULT_CONFIDENCE_LEVEL = 0.95
+
+METRICS = ('accuracy', 'precision', 'recall', 'f1')
+
+# Confusion cells in the order of confusion_cells(): code = 2 * expected + detected
+CELLS = ('true_negatives', 'false_positives', 'false_negatives', 'true_positives')
+
+# Score given to answers the detector did not flag, below every confidence
+UNDETECTED_SCORE = -1.0
+
+
+def _labels(values) -> np.ndarray:
+    return np.asarray(values, dtype=bool)
+
+
+def confusion_cells(expected, detected) -> np.ndarray:
+    """Cell code per item: 0 TN, 1 FP, 2 FN, 3 TP"""
+    return _labels(expected).astype(np.int8) * 2 + _labels(detected)
+
+
+def confusion_matrix(expected, detected) -> np.ndarray:
+    """2x2 counts, rows expected (no, yes) and columns detected (no, yes)"""
+    return np.bincount(confusion_cells(expected, detected), minlength=4).reshape(2, 2)
+
+
+def classification_metrics(counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """Accuracy, precision, recall and F1 from counts in CELLS order.
+
+    `counts` may have any leading shape (..., 4), e.g. one row per group
+    or per bootstrap resample; a ratio with nothing to divide by is 0.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    tn, fp, fn, tp = np.moveaxis(counts, -1, 0)
+    precision = _ratio(tp, tp + fp)
+    recall = _ratio(tp, tp + fn)
+    return {
+        'accuracy': _ratio(tp + tn, counts.sum(axis=-1)),
+        'precision': precision,
+        'recall': recall,
+        'f1': _ratio(2 * precision * recall, precision + recall)
+    }
+
+
+def _ratio(numerator, denominator) -> np.ndarray:
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape),
+                     where=denominator > 0)
+
+
+def group_counts(cells: np.ndarray, groups) -> Tuple[List, np.ndarray]:
+    """(group values, counts of shape (groups, 4)) in order of first appearance"""
+    codes, values = pd.factorize(np.asarray(groups, dtype=object), use_na_sentinel=False)
+    counts = np.bincount(codes * 4 + cells, minlength=len(values) * 4).reshape(-1, 4)
+    # factorize reports a missing group as NaN; keep it as None
+    return [None if pd.isna(value) else value for value in values], counts
+
+
+def detection_scores(detected, confidence) -> np.ndarray:
+    """Ranking score per answer: its confidence if flagged, else UNDETECTED_SCORE"""
+    return np.where(_labels(detected), np.asarray(confidence, dtype=np.float64), UNDETECTED_SCORE)
+
+
+def _curve_counts(expected, scores):
+    """Thresholds (descending) and TP / FP counts when flagging scores >= each"""
+    expected = _labels(expected)
+    scores = np.asarray(scores, dtype=np.float64)
+    order = np.argsort(-scores, kind='stable')
+    scores = scores[order]
+    last = np.r_[np.flatnonzero(np.diff(scores)), scores.size - 1]
+    true_positives = np.cumsum(expected[order])[last]
+    false_positives = last + 1 - true_positives
+    return scores[last], true_positives, false_positives
+
+
+def roc_curve(expected, scores) -> Dict:
+    """ROC points over every distinct score threshold, plus the AUC"""
+    if len(scores) == 0:
+        return {'thresholds': [], 'fpr': [], 'tpr': [], 'auc': None}
+    thresholds, tp, fp = _curve_counts(expected, scores)
+    tpr = np.r_[0.0, _ratio(tp, tp[-1])]
+    fpr = np.r_[0.0, _ratio(fp, fp[-1])]
+    # Undefined with only one class present
+    auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1])) / 2) if tp[-1] and fp[-1] else None
+    return {'thresholds': thresholds, 'fpr': fpr[1:], 'tpr': tpr[1:], 'auc': auc}
+
+
+def pr_curve(expected, scores) -> Dict:
+    """Precision/recall over every distinct score threshold, plus average precision"""
+    if len(scores) == 0:
+        return {'thresholds': [], 'precision': [], 'recall': [], 'average_precision': None}
+    thresholds, tp, fp = _curve_counts(expected, scores)
+    precision = _ratio(tp, tp + fp)
+    recall = _ratio(tp, tp[-1])
+    average_precision = float(np.sum(np.diff(np.r_[0.0, recall]) * precision)) if tp[-1] else None
+    return {'thresholds': thresholds, 'precision': precision, 'recall': recall,
+            'average_precision': average_precision}
+
+
+def bootstrap_counts(counts: np.ndarray, resamples: int = DEFAULT_RESAMPLES, seed: int = 0) -> np.ndarray:
+    """Confusion counts of `resamples` bootstrap resamples of the items.
+
+    The metrics only depend on how many items fall in each cell (per
+    group), and resampling n items with replacement puts a
+    multinomial(n, observed proportions) number of them in each cell, so
+    the counts are drawn directly instead of resampling item indices.
+    That keeps a 1000-resample bootstrap over millions of items at a few
+    milliseconds. `counts` has shape (..., 4); the result adds a leading
+    resample axis.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros((resamples,) + counts.shape, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    flat = rng.multinomial(total, counts.ravel() / total, size=resamples)
+    return flat.reshape((resamples,) + counts.shape)
+
+
+def confidence_intervals(counts: np.ndarray, resamples: int = DEFAULT_RESAMPLES,
+                         level: float = DEFAULT_CONFIDENCE_LEVEL, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Percentile bootstrap intervals per metric, shape (..., 2) for (low, high)"""
+    metrics = classification_metrics(bootstrap_counts(counts, resamples, seed))
+    tail = (1 - level) / 2
+    return {
+        name: np.moveaxis(np.quantile(values, [tail, 1 - tail], axis=0), 0, -1)
+        for name, values in metrics.items()
+    }
+
+
+def _report(counts: np.ndarray, intervals: Dict[str, np.ndarray]) -> Dict:
+    metrics = classification_metrics(counts)
+    return {
+        **{cell: int(count) for cell, count in zip(CELLS, counts)},
+        'total': int(counts.sum()),
+        **{name: round(float(metrics[name]), 4) for name in METRICS},
+        'ci': {name: [round(float(bound), 4) for bound in intervals[name]] for name in METRICS}
+    }
+
+
+def evaluate(expected, detected, confidence=None, groups: Dict[str, Sequence] = None,
+             resamples: int = DEFAULT_RESAMPLES, level: float = DEFAULT_CONFIDENCE_LEVEL,
+             seed: int = 0) -> Dict:
+    """Full metrics report for labelled detection results.
+
+    `expected` and `detected` are per-item booleans (is it really a
+    hallucination / did the detector flag it), `confidence` the detection
+    confidences, and `groups` maps a section name such as 'by_category'
+    to one group value per item. The report has confusion counts,
+    accuracy / precision / recall / F1 with bootstrap intervals overall
+    and per group, and, with confidences, ROC and PR curves.
+    """
+    cells = confusion_cells(expected, detected)
+    overall = np.bincount(cells, minlength=4)
+    sections = {name: group_counts(cells, values) for name, values in (groups or {}).items()}
+
+    report = {
+        'overall': _report(overall, confidence_intervals(overall, resamples, level, seed)),
+        'confidence_level': level,
+        'resamples': resamples
+    }
+    # Each section is resampled as a whole, so its groups' sizes vary
+    # between resamples as they would when resampling items
+    for name, (values, counts) in sections.items():
+        group_intervals = confidence_intervals(counts, resamples, level, seed)
+        report[name] = {
+            value: _report(counts[i], {metric: bounds[i] for metric, bounds in group_intervals.items()})
+            for i, value in enumerate(values)
+        }
+
+    if confidence is not None:
+        scores = detection_scores(detected, confidence)
+        report['roc'] = _listed(roc_curve(expected, scores))
+        report['pr'] = _listed(pr_curve(expected, scores))
+    return report
+
+
+def _listed(curve: Dict) -> Dict:
+    """Curve arrays as rounded lists for JSON"""
+    return {
+        key: [round(float(v), 4) for v in value] if isinstance(value, (np.ndarray, list)) else
+        (round(value, 4) if value is not None else None)
+        for key, value in curve.items()
+    }
@@ -0,0 +1,187 @@
+# src/fanout.py
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.aggregation import HallucinationAggregator
+from src.cache import ResponseCache
+from src.detector import EduHallucinationDetector
+from src.providers import Provider
+from src.question_bank import QuestionIndex
+from src.runner import AsyncQueryEngine
+from src.telemetry import Telemetry
+
+# Columns identifying one row of a comparative run
+KEY_COLUMNS = ['question_id', 'model']
+
+
+class FanOutRunner:
+    """Ask every question of a dataset to several models at once.
+
+    Each question goes to all providers concurrently, and questions
+    overlap up to the largest provider concurrency, while each provider
+    stays within its own concurrency cap and rate limiter. A run over
+    five models therefore takes about as long as the slowest of them
+    rather than the sum. Results are one row per (question_id, model), in
+    dataset order and then in the order the models were given.
+
+    Question IDs come from `questions`, a QuestionIndex (e.g. of the
+    merged question bank), so a reworded copy of a question gets the ID
+    of the original. Questions it doesn't know are added as they are
+    asked.
+    """
+
+    def __init__(self, providers: Sequence[Provider], detector: EduHallucinationDetector = None,
+                 cache: ResponseCache = None, telemetry: Telemetry = None,
+                 questions: QuestionIndex = None):
+        model_ids = [provider.model_id for provider in providers]
+        if not model_ids:
+            raise ValueError("At least one model is needed")
+        if len(set(model_ids)) != len(model_ids):
+            raise ValueError(f"Models listed more than once: {model_ids}")
+
+        self.providers = list(providers)
+        self.detector = detector or EduHallucinationDetector()
+        self.cache = cache or ResponseCache(mode='off')
+        self.telemetry = telemetry or Telemetry()
+        self.questions = questions or QuestionIndex()
+        self.detector.telemetry = self.telemetry
+        for provider in self.providers:
+            provider.telemetry = self.telemetry
+        self.engine = AsyncQueryEngine(max(provider.concurrency for provider in self.providers))
+
+        # model id -> running counts, so per-model rates are available live
+        self.aggregators: Dict[str, HallucinationAggregator] = {
+            model_id: HallucinationAggregator() for model_id in model_ids
+        }
+        self.latencies: Dict[str, List[float]] = {model_id: [] for model_id in model_ids}
+        self.errors: Dict[str, int] = {model_id: 0 for model_id in model_ids}
+
+    def build_prompt(self, question_data: Dict) -> str:
+        """Same prompt DatasetTester sends, so results are comparable"""
+        return f"{question_data['q']} Please provide a direct, numerical answer where applicable."
+
+    async def ask(self, provider: Provider, prompt: str) -> str:
+        async def query():
+            with self.telemetry.span(f'model_call.{provider.model_id}'):
+                return await provider.complete(prompt)
+
+        return (await self.cache.fetch_async(provider.model_id, prompt, query)).strip()
+
+    async def query_model(self, provider: Provider, question_data: Dict,
+                          category: str, subcategory: str, qid: str = None) -> Dict:
+        """One (question, model) result row"""
+        question = question_data["q"]
+        expected_answer = str(question_data["a"])
+        row = {
+            "question_id": qid or self.questions.resolve(question, expected_answer),
+            "model": provider.model_id,
+            "provider": provider.name,
+            "category": category,
+            "subcategory": subcategory,
+            "difficulty": question_data.get("difficulty", "medium"),
+            "question": question,
+            "expected_answer": expected_answer
+        }
+
+        started = time.perf_counter()
+        try:
+            ai_answer = await self.ask(provider, self.build_prompt(question_data))
+        except Exception as e:
+            row.update({
+                "ai_answer": f"ERROR: {str(e)}",
+                "hallucination_detected": None,
+                "error": True,
+                "latency_s": round(time.perf_counter() - started, 4)
+            })
+            return row
+        latency = time.perf_counter() - started
+
+        with self.telemetry.span('detection'):
+            detection = self.detector.detect_hallucination(
+                question=question,
+                ai_response=ai_answer,
+                expected_answer=expected_answer,
+                question_type=subcategory
+            )
+        row.update({
+            "ai_answer": ai_answer,
+            "hallucination_detected": detection.hallucination_detected,
+            "detection_confidence": detection.confidence,
+            "detection_details": detection.detection_details,
+            "latency_s": round(latency, 4)
+        })
+        return row
+
+    def resolve(self, item) -> str:
+        """Question ID of one (question_data, category, subcategory) item"""
+        question_data = item[0]
+        return self.questions.resolve(question_data["q"], str(question_data["a"]))
+
+    async def query_all(self, item, qid: str = None) -> List[Dict]:
+        """Rows for one (question_data, category, subcategory) item, one per model"""
+        # Resolved once, so every model's row carries the same ID
+        qid = qid or self.resolve(item)
+        rows = await asyncio.gather(*(self.query_model(provider, *item, qid) for provider in self.providers))
+        self.telemetry.count_question()
+        return list(rows)
+
+    async def map(self, questions: Iterable) -> AsyncIterator[List[Dict]]:
+        """Yield each question's rows in dataset order as they complete"""
+        # IDs are resolved up front, in dataset order, rather than by the
+        # question tasks while other questions' requests are in flight
+        items = [(item, self.resolve(item)) for item in questions]
+
+        async def query(pair):
+            return await self.query_all(*pair)
+
+        async for rows in self.engine.map(query, items):
+            for row in rows:
+                self.aggregators[row['model']].add(row)
+                self.latencies[row['model']].append(row['latency_s'])
+                if row.get('error'):
+                    self.errors[row['model']] += 1
+            yield rows
+
+    async def gather(self, questions: Iterable) -> List[Dict]:
+        return [row async for rows in self.map(questions) for row in rows]
+
+    def run(self, questions: Iterable) -> List[Dict]:
+        """Blocking wrapper around gather"""
+        return asyncio.run(self.gather(questions))
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per-model hallucination rate, errors, latency and rate limiting"""
+        providers = {provider.model_id: provider for provider in self.providers}
+        models = {}
+        for model_id, aggregator in self.aggregators.items():
+            latencies = np.asarray(self.latencies[model_id])
+            p50, p95 = np.percentile(latencies, [50, 95]) if latencies.size else (0.0, 0.0)
+            models[model_id] = {
+                **aggregator.summary(),
+                'errors': self.errors[model_id],
+                'latency_s': {
+                    'mean': round(float(latencies.mean()), 4) if latencies.size else 0.0,
+                    'p50': round(float(p50), 4),
+                    'p95': round(float(p95), 4)
+                },
+                'rate_limit': providers[model_id].rate_limiter.summary()
+            }
+        return models
+
+
+def results_table(rows: List[Dict]) -> pd.DataFrame:
+    """Result rows as one DataFrame indexed by (question_id, model)"""
+    return pd.DataFrame(rows).set_index(KEY_COLUMNS)
+
+
+def comparison_matrix(rows: List[Dict], value: str = 'hallucination_detected') -> pd.DataFrame:
+    """One row per question and one column per model holding `value`"""
+    frame = pd.DataFrame(rows)
+    models = list(dict.fromkeys(frame['model']))
+    matrix = frame.pivot_table(index='question_id', columns='model', values=value,
+                               aggfunc='first', dropna=False, sort=False)
+    return matrix.reindex(columns=models)
@@ -0,0 +1,89 @@
+# src/journal.py
+import json
+import os
+from typing import Dict, List, Tuple
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+
+class RunJournal:
+    """Append-only JSONL journal of finished results for crash-safe runs.
+
+    Each result is written as one line as soon as it is known, so the cost
+    per result is constant instead of rewriting the whole run. `fsync`
+    controls durability: 'always' syncs every record, 'interval' every
+    `fsync_every` records and 'never' leaves it to the OS.
+    """
+
+    def __init__(self, path: str, fsync: str = 'interval', fsync_every: int = 10):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}; expected one of {FSYNC_POLICIES}")
+
+        self.path = path
+        self.fsync = fsync
+        self.fsync_every = fsync_every
+        self._file = None
+        self._unsynced = 0
+
+    def load(self) -> List[Dict]:
+        """Read back every complete record, dropping a torn final line"""
+        if not os.path.exists(self.path):
+            return []
+
+        records = []
+        good_bytes = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                good_bytes += len(line)
+
+        # Cut off a partially written record so new appends start cleanly
+        if good_bytes < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_bytes)
+
+        return records
+
+    def append(self, record: Dict):
+        """Write one record and sync according to the fsync policy"""
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+        self._file.write(json.dumps(record) + '\n')
+        self._unsynced += 1
+
+        if self.fsync == 'always' or (self.fsync == 'interval' and self._unsynced >= self.fsync_every):
+            self.sync()
+
+    def sync(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        if self.fsync != 'never':
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Delete the journal once the run's final results are saved"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def result_key(record: Dict) -> Tuple[str, str, str]:
+    """Identity of a dataset question within a run"""
+    return record['category'], record['subcategory'], record['question']
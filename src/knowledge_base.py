@@ -0,0 +1,227 @@
+# src/knowledge_base.py
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.analyzers import NUMBER_PATTERN, NumberToken, exact_integers, extract_numbers, numbers_match
+
+# Words that may stand in for small numeric answers ("seven continents")
+NUMBER_WORDS = [
+    'zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine',
+    'ten', 'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen',
+    'seventeen', 'eighteen', 'nineteen', 'twenty'
+]
+
+_ALTERNATIVE_SPLIT = re.compile(r'\s+or\s+|\s*;\s*', re.IGNORECASE)
+_DECADE_PATTERN = re.compile(r'^\s*(\d{2,3}0)s\s*$')
+_NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+_NON_WORD_OR_SEPARATOR = re.compile(r'[^\w\s\x00]')
+_LEADING_ARTICLE = re.compile(r'^(?:the|a|an) ')
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation/markdown and collapse whitespace"""
+    return ' '.join(_NON_WORD_PATTERN.sub(' ', text.lower()).split())
+
+
+def normalize_texts(texts: List[str]) -> List[str]:
+    """normalize_text of every text, with one regex pass over all of them"""
+    joined = '\x00'.join(texts)
+    if joined.count('\x00') != max(len(texts) - 1, 0):
+        return [normalize_text(text) for text in texts]
+    stripped = _NON_WORD_OR_SEPARATOR.sub(' ', joined.lower())
+    return [' '.join(text.split()) for text in stripped.split('\x00')]
+
+
+class AnswerAlternative:
+    """One acceptable form of a reference answer, pre-parsed for lookups"""
+
+    __slots__ = ('text', 'phrases', 'tokens', 'numbers', 'numeric_range', 'template')
+
+    def __init__(self, text: str, aliases: Iterable[str] = ()):
+        self.text = text
+        normalized = normalize_text(text)
+        self.tokens = frozenset(normalized.split())
+
+        self.numeric_range = None
+        self.template = None
+        decade = _DECADE_PATTERN.match(text)
+        if decade:
+            start = int(decade.group(1))
+            self.numeric_range = (start, start + 9)
+            self.numbers = []
+        else:
+            self.numbers = list(exact_integers(extract_numbers(text)))
+            if self.numbers:
+                self.template = _number_template(text)
+
+        # Text forms that count as a match, padded for word-bounded lookups
+        phrases = {normalized, _LEADING_ARTICLE.sub('', normalized)}
+        phrases.update(normalize_text(alias) for alias in aliases)
+        if len(self.numbers) == 1 and normalized == normalize_text(self.numbers[0].text):
+            value = self.numbers[0].value
+            if value.is_integer() and 0 <= value < len(NUMBER_WORDS):
+                phrases.add(NUMBER_WORDS[int(value)])
+        self.phrases = [f" {phrase} " for phrase in phrases if phrase]
+
+    def matches(self, response_text: str, response_numbers: List[NumberToken],
+                rel_tol: float = 1e-6, abs_tol: float = 0.0, response_lower: str = None) -> bool:
+        """Whether a (normalized, padded) response gives this alternative.
+
+        Purely numeric alternatives match when each of their numbers is
+        somewhere in the response. Alternatives mixing words and numbers
+        ("Apollo 11", "5 minutes") need the words and numbers in order,
+        found in the lowercased response text `response_lower`, or the
+        phrase itself.
+        """
+        if self.numeric_range:
+            low, high = self.numeric_range
+            return any(low <= n.value <= high for n in response_numbers)
+
+        if self.template is not None:
+            if response_lower is not None and self._template_matches(response_lower, rel_tol, abs_tol):
+                return True
+        elif self.numbers and all(
+            any(numbers_match(expected, found, rel_tol, abs_tol) for found in response_numbers)
+            for expected in self.numbers
+        ):
+            return True
+
+        return any(phrase in response_text for phrase in self.phrases)
+
+    def _template_matches(self, response_lower: str, rel_tol: float, abs_tol: float) -> bool:
+        for match in self.template.finditer(response_lower):
+            found = [extract_numbers(slot) for slot in match.groups()]
+            if all(
+                tokens and numbers_match(expected, tokens[0], rel_tol, abs_tol)
+                for expected, tokens in zip(self.numbers, found)
+            ):
+                return True
+        return False
+
+
+# A number in a template slot; parsed with extract_numbers once matched
+_NUMBER_SLOT = r'(?<![\w.])([-+−]?\d[\d,]*(?:\.\d+)?(?:e[-+−]?\d+|\s*/\s*\d+)?)(?!\d)'
+
+
+def _number_template(text: str) -> Optional[re.Pattern]:
+    """Regex for an alternative's words and numbers in order ("apollo <n>").
+
+    None when the alternative is only numbers (and punctuation), or when
+    its numbers can't each be given a slot (e.g. "6.02 × 10^23").
+    """
+    parts = []   # escaped words, None for a number
+    position = 0
+    for match in NUMBER_PATTERN.finditer(text):
+        if match.group('pow') or match.group('sup'):
+            return None
+        parts.extend(re.escape(word) for word in normalize_text(text[position:match.start()]).split())
+        parts.append(None)
+        position = match.end()
+    parts.extend(re.escape(word) for word in normalize_text(text[position:]).split())
+    if all(part is None for part in parts):
+        return None
+
+    pattern = r'(?<!\w)' if parts[0] is not None else ''
+    for i, part in enumerate(parts):
+        if i:
+            # Words need something between them; a unit may follow a number directly
+            pattern += r'[\W_]+' if part is not None and parts[i - 1] is not None else r'[\W_]*'
+        pattern += _NUMBER_SLOT if part is None else part
+    if parts[-1] is not None:
+        pattern += r'(?!\w)'
+    return re.compile(pattern)
+
+
+def _phrase_pattern(phrases: List[str]) -> re.Pattern:
+    """Regex finding any (normalized, padded) phrase in lowercased text.
+
+    It matches exactly when `phrase in f" {normalize_text(text)} "` does
+    for the text before lowercasing: the phrase's words as whole words,
+    with only non-word characters between them.
+    """
+    words = [phrase.split() for phrase in dict.fromkeys(phrases)]
+    first = ''.join(sorted({re.escape(phrase[0][0]) for phrase in words}))
+    branches = '|'.join(r'\W+'.join(re.escape(word) for word in phrase) for phrase in words)
+    return re.compile(r'(?=[' + first + r'])(?<!\w)(?:' + branches + r')(?!\w)')
+
+
+class ReferenceAnswer:
+    """A dataset answer split into its acceptable alternatives"""
+
+    __slots__ = ('raw', 'alternatives', '_mention')
+
+    def __init__(self, raw: str, aliases: Dict[str, List[str]] = None):
+        self.raw = raw
+        aliases = aliases or {}
+        parts = [part for part in _ALTERNATIVE_SPLIT.split(raw) if part.strip()] or [raw]
+        self.alternatives = [
+            AnswerAlternative(part, aliases.get(normalize_text(part), ()))
+            for part in parts
+        ]
+        self._mention = None
+
+    @property
+    def mention(self) -> Optional[re.Pattern]:
+        """Regex for the phrases of every alternative but decade ranges; None if there are none"""
+        if self._mention is None:
+            phrases = [
+                phrase
+                for alternative in self.alternatives if alternative.numeric_range is None
+                for phrase in alternative.phrases
+            ]
+            self._mention = _phrase_pattern(phrases) if phrases else False
+        return self._mention or None
+
+
+class AnswerIndex:
+    """Pre-parsed reference answers for fast factual verification.
+
+    Each distinct answer string is parsed once into alternatives ("Nile or
+    Amazon"), normalized phrases, numbers with their written precision,
+    decade ranges ("1450s") and aliases, and reused for every response.
+    With `max_answers`, only that many recently used answers are kept
+    (for long-running services that see unbounded distinct answers).
+    """
+
+    def __init__(self, aliases: Dict[str, List[str]] = None, max_answers: int = None):
+        if max_answers is not None and max_answers < 1:
+            raise ValueError("max_answers must be at least 1")
+        # normalized answer text -> other accepted spellings
+        self.aliases = {normalize_text(k): list(v) for k, v in (aliases or {}).items()}
+        self.max_answers = max_answers
+        self.answers: Dict[str, ReferenceAnswer] = OrderedDict() if max_answers else {}
+
+    def get(self, answer: str) -> ReferenceAnswer:
+        """The parsed form of an answer string, parsing it on first use"""
+        reference = self.answers.get(answer)
+        if reference is None:
+            reference = self.answers[answer] = ReferenceAnswer(answer, self.aliases)
+            if self.max_answers and len(self.answers) > self.max_answers:
+                self.answers.popitem(last=False)
+        elif self.max_answers:
+            self.answers.move_to_end(answer)
+        return reference
+
+    def mentions(self, reference: ReferenceAnswer, response_lower: str) -> bool:
+        """Whether a lowercased response gives an alternative word for word.
+
+        A cheap first test that needs neither the response's normalized
+        text nor its numbers: when it holds, verify matches too.
+        """
+        mention = reference.mention
+        return mention is not None and mention.search(response_lower) is not None
+
+    def verify(self, reference: ReferenceAnswer, response_text: str,
+               response_numbers: List[NumberToken], rel_tol: float = 1e-6,
+               abs_tol: float = 0.0, response_lower: str = None) -> Tuple[bool, Optional[str]]:
+        """(matched, matching alternative) for a normalized, padded response.
+
+        Numbers match within the same rel_tol / abs_tol as check_calculation.
+        Pass the lowercased response as `response_lower` so alternatives
+        mixing words and numbers can match with number tolerance too.
+        """
+        for alternative in reference.alternatives:
+            if alternative.matches(response_text, response_numbers, rel_tol, abs_tol, response_lower):
+                return True, alternative.text
+        return False, None
@@ -0,0 +1,142 @@
+# src/memo.py
+import hashlib
+import json
+import operator
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+# How many writes to the disk store between commits
+_COMMIT_INTERVAL = 500
+
+# Paired bold/italic/code delimiters (**x**, __x__, *x*, _x_, `x`). Only
+# a delimiter with a matching partner around text counts, so "6*7",
+# "3 * 4" and snake_case are left alone; group 1 is the text inside. The
+# leading lookaheads let the regex engine skip positions without the
+# delimiter cheaply. Applied in this order, each only to text holding
+# its delimiter.
+_EMPHASIS_PATTERNS = [
+    ('`', re.compile(r'`([^`\n]+)`')),
+    ('*', re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')),
+    ('_', re.compile(r'(?=_)(?<!\w)__(?=\S)(.+?)(?<=\S)__(?!\w)')),
+    ('*', re.compile(r'(?=\*)(?<![\w*])\*(?=[^\s*])(.+?)(?<=[^\s*])\*(?![\w*])')),
+    ('_', re.compile(r'(?=_)(?<!\w)_(?=[^\s_])(.+?)(?<=[^\s_])_(?!\w)')),
+]
+# Replaces a match by group 1 without going through re's template expansion
+_INNER_TEXT = operator.itemgetter(1)
+
+# (hallucination_detected, confidence, detection_details)
+Verdict = Tuple[bool, float, Dict]
+
+
+def normalize_response(text: str) -> str:
+    """Response text without markdown emphasis and with whitespace collapsed"""
+    for delimiter, pattern in _EMPHASIS_PATTERNS:
+        if delimiter in text:
+            text = pattern.sub(_INNER_TEXT, text)
+    return ' '.join(text.split())
+
+
+def memo_key(version: str, question_id: str, expected, question_type, response: str) -> str:
+    """Hash of everything a verdict depends on.
+
+    `response` is hashed as given: pass the normalize_response text the
+    verdict is computed from, so responses sharing a key share a verdict.
+    """
+    payload = '\x1f'.join((version, question_id, str(expected), str(question_type), response))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class DetectionMemo:
+    """LRU memo of detection verdicts, optionally backed by SQLite.
+
+    Keys come from memo_key over the normalized response the detector
+    scores, so "9876 - 5432 = **4444**" and "9876 - 5432 = 4444" share an
+    entry (and a verdict) while any change to the detector
+    (its fingerprint) misses cleanly. The most recently used
+    `max_entries` verdicts are kept in memory; with a `path` every verdict
+    is also written to disk and looked up there on a memory miss, so
+    reruns start warm. Verdicts are stored as JSON, and every hit returns
+    a fresh copy that callers may modify.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, path: str = None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.path = path
+        self.entries: OrderedDict = OrderedDict()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pending_writes = 0
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS verdicts (key TEXT PRIMARY KEY, verdict TEXT NOT NULL)")
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Verdict]:
+        """The memoized verdict for a key, or None"""
+        with self._lock:
+            stored = self.entries.get(key)
+            if stored is not None:
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+            elif self._conn is not None:
+                row = self._conn.execute("SELECT verdict FROM verdicts WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    stored = row[0]
+                    self._remember(key, stored)
+                    self.stats['hits'] += 1
+                    self.stats['disk_hits'] += 1
+            if stored is None:
+                self.stats['misses'] += 1
+                return None
+        detected, confidence, details = json.loads(stored)
+        return detected, confidence, details
+
+    def put(self, key: str, verdict: Verdict):
+        stored = json.dumps(verdict, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, stored)
+            if self._conn is not None:
+                self._conn.execute("INSERT OR REPLACE INTO verdicts VALUES (?, ?)", (key, stored))
+                self._pending_writes += 1
+                if self._pending_writes >= _COMMIT_INTERVAL:
+                    self._conn.commit()
+                    self._pending_writes = 0
+
+    def _remember(self, key: str, stored: str):
+        self.entries[key] = stored
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+    def summary(self) -> Dict:
+        """Counters and hit rate for reports"""
+        return {**self.stats, 'entries': len(self.entries), 'hit_rate': round(self.hit_rate, 4)}
+
+    def close(self):
+        """Commit pending disk writes and close the store"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,171 @@
+# src/parallel.py
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from src.detector import EduHallucinationDetector, _as_column
+from src.memo import DetectionMemo
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Keys of detect_batch's output
+BATCH_COLUMNS = ('question', 'ai_response', 'expected_answer',
+                 'hallucination_detected', 'confidence', 'detection_details')
+
+# (questions, ai_responses, expected_answers, question_types) for one chunk
+Chunk = Tuple[Sequence, Sequence, Sequence, Sequence]
+
+# One detector per worker process, built by _init_worker
+_detector = None
+
+
+def _init_worker(detector_options: Dict):
+    global _detector
+    _detector = EduHallucinationDetector(**detector_options)
+
+
+def _score_chunk(chunk: Chunk) -> Dict[str, List]:
+    return _detector.detect_batch(*chunk)
+
+
+class ParallelScorer:
+    """Scores large corpora with detect_batch spread over worker processes.
+
+    Inputs are cut into chunks of `chunk_size` rows and handed to a
+    ProcessPoolExecutor whose workers each build their detector (and its
+    compiled matchers) once. Only a bounded number of chunks is in flight
+    and results come back in input order. With `workers=1` everything runs
+    in this process without a pool.
+
+    A `memo` is consulted here, in the parent, before a chunk is sent out:
+    workers only see rows without a memoized verdict, and one memo (and
+    its hit rate) covers the whole corpus.
+    """
+
+    def __init__(self, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 detector_options: Dict = None, memo: DetectionMemo = None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.detector_options = detector_options or {}
+        self.memo = memo
+        self._executor = None
+        self._detector = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    @property
+    def detector(self) -> EduHallucinationDetector:
+        """Detector in this process: scores with workers=1, builds memo keys otherwise"""
+        if self._detector is None:
+            self._detector = EduHallucinationDetector(**self.detector_options)
+            self._detector.memo = self.memo
+        return self._detector
+
+    def score_chunks(self, chunks: Iterable[Chunk]) -> Iterator[Dict[str, List]]:
+        """Yield detect_batch's columns for every chunk, in input order"""
+        if self.workers == 1:
+            for chunk in chunks:
+                yield self.detector.detect_batch(*chunk)
+            return
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(self.detector_options,)
+            )
+
+        # A couple of chunks queued per worker keeps them busy without
+        # holding the whole corpus in memory
+        window_size = self.workers * 2
+        window = deque()
+        try:
+            for chunk in chunks:
+                window.append(self._submit(chunk))
+                if len(window) >= window_size:
+                    yield self._collect(*window.popleft())
+            while window:
+                yield self._collect(*window.popleft())
+        finally:
+            for future, *_ in window:
+                if future is not None:
+                    future.cancel()
+
+    def _submit(self, chunk: Chunk) -> Tuple:
+        """Send a chunk's rows without a memoized verdict to a worker"""
+        if self.memo is None:
+            return self._executor.submit(_score_chunk, chunk), chunk, None, None
+
+        rows = list(zip(*chunk))
+        keys = {}
+        verdicts = {}
+        for row in dict.fromkeys(rows):
+            keys[row] = self.detector.memo_key(*row)
+            verdict = self.memo.get(keys[row])
+            if verdict is not None:
+                verdicts[row] = verdict
+        misses = [row for row in keys if row not in verdicts]
+        future = self._executor.submit(_score_chunk, tuple(zip(*misses))) if misses else None
+        return future, chunk, (rows, keys, misses), verdicts
+
+    def _collect(self, future, chunk: Chunk, memo_state, verdicts) -> Dict[str, List]:
+        """detect_batch's columns for a submitted chunk, memoizing new verdicts"""
+        if memo_state is None:
+            return future.result()
+
+        rows, keys, misses = memo_state
+        if future is not None:
+            scored = future.result()
+            for i, row in enumerate(misses):
+                verdict = (scored['hallucination_detected'][i], scored['confidence'][i],
+                           scored['detection_details'][i])
+                verdicts[row] = verdict
+                self.memo.put(keys[row], verdict)
+
+        questions, ai_responses, expected_answers, _ = chunk
+        return {
+            'question': list(questions),
+            'ai_response': list(ai_responses),
+            'expected_answer': list(expected_answers),
+            'hallucination_detected': [verdicts[row][0] for row in rows],
+            'confidence': [verdicts[row][1] for row in rows],
+            'detection_details': [verdicts[row][2] for row in rows]
+        }
+
+    def score(self, questions, ai_responses=None, expected_answers=None,
+              question_types=None) -> Dict[str, List]:
+        """detect_batch over the whole corpus: same inputs, same columnar output"""
+        if hasattr(questions, 'columns'):
+            questions, ai_responses, expected_answers, question_types = \
+                EduHallucinationDetector._columns_from_frame(questions)
+
+        questions = _as_column(questions)
+        n = len(questions)
+        ai_responses = _as_column(ai_responses, n)
+        expected_answers = _as_column(expected_answers, n)
+        question_types = _as_column(question_types, n)
+
+        chunks = (
+            (questions[start:start + self.chunk_size],
+             ai_responses[start:start + self.chunk_size],
+             expected_answers[start:start + self.chunk_size],
+             question_types[start:start + self.chunk_size])
+            for start in range(0, n, self.chunk_size)
+        )
+
+        output = {key: [] for key in BATCH_COLUMNS}
+        for batch in self.score_chunks(chunks):
+            for key in BATCH_COLUMNS:
+                output[key].extend(batch[key])
+        return output
@@ -0,0 +1,349 @@
+# src/pipeline.py
+import hashlib
+import time
+import types
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.analyzers import NumberToken, extract_numbers, extract_numbers_batch
+from src.knowledge_base import normalize_text, normalize_texts
+from src.similarity import drop_stop_words
+
+
+class PreparedResponse:
+    """A model response with its derived forms computed at most once.
+
+    Every detection stage reads the same lowercased text, normalized
+    words and extracted numbers from here instead of redoing the work
+    itself. Each form is computed lazily, so stages that don't run cost
+    nothing.
+    """
+
+    __slots__ = ('text', '_lower', '_words', '_word_set', '_content_words', '_numbers', '_normalized')
+
+    def __init__(self, text: str):
+        self.text = text
+        self._lower = None
+        self._words = None
+        self._word_set = None
+        self._content_words = None
+        self._numbers = None
+        self._normalized = None
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def words(self) -> List[str]:
+        """Words with punctuation and markdown stripped, in order"""
+        if self._words is None:
+            self._words = self.normalized.split()
+        return self._words
+
+    @property
+    def word_set(self) -> frozenset:
+        """Distinct words with punctuation and markdown stripped"""
+        if self._word_set is None:
+            self._word_set = frozenset(self.words)
+        return self._word_set
+
+    @property
+    def content_words(self) -> List[str]:
+        """words minus stop words, as used for similarity"""
+        if self._content_words is None:
+            self._content_words = drop_stop_words(self.words)
+        return self._content_words
+
+    @property
+    def normalized(self) -> str:
+        """Punctuation-free text padded with spaces for word-bounded lookups"""
+        if self._normalized is None:
+            self._normalized = f" {normalize_text(self.text)} "
+        return self._normalized
+
+    @property
+    def numbers(self) -> List[NumberToken]:
+        if self._numbers is None:
+            self._numbers = extract_numbers(self.text)
+        return self._numbers
+
+
+class PreparedBatch:
+    """PreparedResponse for many responses, one list per derived form.
+
+    lower is computed for every response when first read; normalized_at
+    and numbers_at compute their form, in one regex pass, only for the
+    rows asked for. response(i) is row i as a PreparedResponse that
+    starts with whatever was computed here. A batch made from
+    PreparedResponses reads its forms from them instead.
+    """
+
+    __slots__ = ('texts', '_lower', '_normalized', '_numbers', '_responses')
+
+    def __init__(self, texts: List[str], responses: List[PreparedResponse] = None):
+        self.texts = texts
+        self._lower = None
+        self._normalized = None
+        self._numbers = None
+        self._responses = responses
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def lower(self) -> List[str]:
+        if self._lower is None:
+            if self._responses is not None:
+                self._lower = [response.lower for response in self._responses]
+            else:
+                self._lower = [text.lower() for text in self.texts]
+        return self._lower
+
+    def normalized_at(self, rows: List[int]) -> List[str]:
+        """PreparedResponse.normalized of the given rows, normalizing those not done yet"""
+        if self._responses is not None:
+            return [self._responses[i].normalized for i in rows]
+        if self._normalized is None:
+            self._normalized = [None] * len(self.texts)
+        normalized = self._normalized
+        missing = [i for i in rows if normalized[i] is None]
+        for i, text in zip(missing, normalize_texts([self.texts[i] for i in missing])):
+            normalized[i] = f" {text} "
+        return [normalized[i] for i in rows]
+
+    def numbers_at(self, rows: List[int]) -> List[List[NumberToken]]:
+        """Numbers of the given rows, extracting those not extracted yet"""
+        if self._responses is not None:
+            return [self._responses[i].numbers for i in rows]
+        if self._numbers is None:
+            self._numbers = [None] * len(self.texts)
+        numbers = self._numbers
+        missing = [i for i in rows if numbers[i] is None]
+        for i, found in zip(missing, extract_numbers_batch([self.texts[i] for i in missing])):
+            numbers[i] = found
+        return [numbers[i] for i in rows]
+
+    def response(self, i: int) -> PreparedResponse:
+        if self._responses is not None:
+            return self._responses[i]
+        response = PreparedResponse(self.texts[i])
+        if self._lower is not None:
+            response._lower = self._lower[i]
+        if self._normalized is not None and self._normalized[i] is not None:
+            response._normalized = self._normalized[i]
+        if self._numbers is not None and self._numbers[i] is not None:
+            response._numbers = self._numbers[i]
+        return response
+
+
+class DetectionContext:
+    """Everything a stage may look at for one (question, response) pair"""
+
+    __slots__ = ('question', 'response', 'expected', 'question_type', 'samples')
+
+    def __init__(self, question: str, response, expected: str = None,
+                 question_type: str = None, samples: List[str] = None):
+        self.question = question
+        # Text, or a PreparedResponse to share its derived forms
+        self.response = response if isinstance(response, PreparedResponse) else PreparedResponse(response)
+        self.expected = expected
+        self.question_type = question_type
+        self.samples = samples
+
+
+class DetectionBatch:
+    """Columns of many DetectionContexts without samples, for batch checks"""
+
+    __slots__ = ('questions', 'responses', 'expected', 'question_types')
+
+    def __init__(self, questions: List[str], responses: PreparedBatch,
+                 expected: List[str], question_types: List[str]):
+        self.questions = questions
+        self.responses = responses
+        self.expected = expected
+        self.question_types = question_types
+
+    @classmethod
+    def of(cls, context: DetectionContext) -> 'DetectionBatch':
+        """A batch of one context, sharing its PreparedResponse"""
+        return cls([context.question], PreparedBatch([context.response.text], [context.response]),
+                   [context.expected], [context.question_type])
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def context(self, i: int) -> DetectionContext:
+        return DetectionContext(self.questions[i], self.responses.response(i),
+                                self.expected[i], self.question_types[i])
+
+
+class DetectionStage:
+    """One registered check in the detection pipeline.
+
+    `check(context)` returns the stage's result dict, stored under
+    `detail_key` in detection_details. Routing: the stage only runs for
+    `question_types` (all types when None), and only when an expected
+    answer / extra samples exist if it requires them. If the result's
+    `flag_key` is true the response is flagged, taking the detection
+    confidence from `confidence_key` when set. A `decisive` stage that
+    flags a response ends the pipeline early when short-circuiting.
+
+    An optional `batch_check(batch, rows)` returns the same results as
+    `check` for the given rows of a DetectionBatch at once; detect_batch
+    uses it for every row the stage applies to. Stages that don't look at
+    the question say so with `uses_question=False`; when no stage does,
+    detect_batch scores rows differing only in their question once.
+    """
+
+    def __init__(self, name: str, check: Callable[[DetectionContext], Dict], detail_key: str,
+                 flag_key: str = None, confidence_key: str = None,
+                 question_types: Iterable[str] = None, requires_expected: bool = False,
+                 requires_samples: bool = False, decisive: bool = False,
+                 batch_check: Callable[['DetectionBatch', List[int]], List[Dict]] = None,
+                 uses_question: bool = True):
+        self.name = name
+        self.check = check
+        self.batch_check = batch_check
+        self.detail_key = detail_key
+        self.flag_key = flag_key
+        self.confidence_key = confidence_key
+        self.question_types = set(question_types) if question_types is not None else None
+        self.requires_expected = requires_expected
+        self.requires_samples = requires_samples
+        self.decisive = decisive
+        self.uses_question = uses_question
+
+    def applies(self, context: DetectionContext) -> bool:
+        if self.question_types is not None and context.question_type not in self.question_types:
+            return False
+        if self.requires_expected and not context.expected:
+            return False
+        if self.requires_samples and not context.samples:
+            return False
+        return True
+
+    def rows_for(self, batch: DetectionBatch, rows: Iterable[int]) -> List[int]:
+        """The rows among `rows` the stage applies to (batches have no samples)"""
+        if self.requires_samples:
+            return []
+        types = self.question_types
+        expected = batch.expected
+        question_types = batch.question_types
+        return [
+            i for i in rows
+            if (types is None or question_types[i] in types) and (not self.requires_expected or expected[i])
+        ]
+
+    def __call__(self, context: DetectionContext) -> Dict:
+        return self.check(context)
+
+    @property
+    def fingerprint(self) -> str:
+        """The stage's settings and check code, stable across processes"""
+        question_types = sorted(self.question_types) if self.question_types is not None else None
+        return repr((self.name, self.detail_key, self.flag_key, self.confidence_key, question_types,
+                     self.requires_expected, self.requires_samples, self.decisive,
+                     _code_identity(self.check), _code_identity(self.batch_check)))
+
+
+def _code_identity(func) -> Optional[str]:
+    """Qualified name plus a hash of the bytecode of a check callable"""
+    if func is None:
+        return None
+    func = getattr(func, '__func__', func)
+    name = getattr(func, '__qualname__', type(func).__qualname__)
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return name
+    digest = hashlib.sha1(code.co_code)
+    for const in code.co_consts:
+        # Nested code objects (lambdas) by their bytecode; their repr holds an address
+        digest.update(const.co_code if isinstance(const, types.CodeType) else repr(const).encode('utf-8'))
+    digest.update(repr(code.co_names).encode('utf-8'))
+    return f"{name}:{digest.hexdigest()[:12]}"
+
+
+def run_stages(stages: Iterable[DetectionStage], context: DetectionContext,
+               short_circuit: bool = False,
+               precomputed: Optional[Dict[str, Dict]] = None,
+               telemetry=None) -> Tuple[bool, float, Dict]:
+    """Run the applicable stages in order and combine their verdicts.
+
+    Returns (hallucination_detected, confidence, detection_details).
+    `precomputed` maps stage names to results already computed elsewhere
+    (e.g. by a vectorized batch), which are used instead of re-running.
+    With a `telemetry` each stage that runs is timed as detect.<name>.
+    """
+    detected = False
+    confidence = 0.0
+    details = {}
+
+    for stage in stages:
+        if not stage.applies(context):
+            continue
+
+        result = precomputed.get(stage.name) if precomputed else None
+        if result is None:
+            if telemetry is None:
+                result = stage.check(context)
+            else:
+                started = time.perf_counter()
+                result = stage.check(context)
+                telemetry.record(f"detect.{stage.name}", time.perf_counter() - started, started)
+        details[stage.detail_key] = result
+
+        if stage.flag_key and result[stage.flag_key]:
+            detected = True
+            if stage.confidence_key:
+                confidence = result[stage.confidence_key]
+            if short_circuit and stage.decisive:
+                break
+
+    return detected, confidence, details
+
+
+def run_stages_batch(stages: Iterable[DetectionStage], batch: DetectionBatch,
+                     short_circuit: bool = False, telemetry=None) -> List[Tuple[bool, float, Dict]]:
+    """run_stages for every row of a batch, one stage at a time.
+
+    Stages with a batch_check score all their rows in one call; others
+    run row by row (timed with a `telemetry`, as in run_stages). Returns
+    one (hallucination_detected, confidence, detection_details) per row.
+    """
+    n = len(batch)
+    detected = [False] * n
+    confidence = [0.0] * n
+    details = [{} for _ in range(n)]
+    active = range(n)
+
+    for stage in stages:
+        rows = stage.rows_for(batch, active)
+        if not rows:
+            continue
+        if stage.batch_check is not None:
+            results = stage.batch_check(batch, rows)
+        elif telemetry is None:
+            results = [stage.check(batch.context(i)) for i in rows]
+        else:
+            results = []
+            for i in rows:
+                started = time.perf_counter()
+                results.append(stage.check(batch.context(i)))
+                telemetry.record(f"detect.{stage.name}", time.perf_counter() - started, started)
+
+        detail_key, flag_key, confidence_key = stage.detail_key, stage.flag_key, stage.confidence_key
+        stopped = set()
+        for i, result in zip(rows, results):
+            details[i][detail_key] = result
+            if flag_key and result[flag_key]:
+                detected[i] = True
+                if confidence_key:
+                    confidence[i] = result[confidence_key]
+                if short_circuit and stage.decisive:
+                    stopped.add(i)
+        if stopped:
+            active = [i for i in active if i not in stopped]
+
+    return list(zip(detected, confidence, details))
@@ -0,0 +1,176 @@
+# src/providers.py
+import asyncio
+from typing import Callable, Dict, Optional, Tuple
+
+from src.rate_limit import RateLimiter, estimate_tokens
+
+PROVIDERS = ('openai', 'anthropic', 'stub')
+
+# (requests per minute, tokens per minute) each provider gets unless overridden
+DEFAULT_PROVIDER_LIMITS = {
+    'openai': (500, 30000),
+    'anthropic': (50, 30000),
+    'stub': (60000, None)
+}
+
+# Concurrent requests per provider
+DEFAULT_PROVIDER_CONCURRENCY = 8
+
+# Anthropic requires an explicit answer length
+DEFAULT_MAX_TOKENS = 512
+
+
+def parse_model_spec(spec: str) -> Tuple[str, str]:
+    """Parse "provider:model" ("openai:gpt-4.1") into (provider, model)"""
+    provider, sep, model = spec.partition(':')
+    if not sep or not model:
+        raise ValueError(f"Model must look like provider:model, got {spec!r}")
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown provider {provider!r}; expected one of {PROVIDERS}")
+    return provider, model
+
+
+class Provider:
+    """One model behind one provider's API.
+
+    `complete(prompt)` returns the answer text. Every provider has its own
+    RateLimiter and concurrency cap, so a slow or throttled provider never
+    holds back requests to the others. Several models of one provider may
+    share a limiter (pass the same instance), matching account-wide limits.
+    """
+
+    name = None
+
+    def __init__(self, model: str, rate_limiter: RateLimiter = None,
+                 concurrency: int = DEFAULT_PROVIDER_CONCURRENCY, telemetry=None):
+        self.model = model
+        if rate_limiter is None:
+            requests_per_minute, tokens_per_minute = DEFAULT_PROVIDER_LIMITS[self.name]
+            rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.telemetry = telemetry
+        self._semaphore = None
+
+    @property
+    def model_id(self) -> str:
+        """ "provider:model", the key results and cache entries are stored under"""
+        return f"{self.name}:{self.model}"
+
+    async def complete(self, prompt: str, temperature: float = None) -> str:
+        """Answer one prompt under this provider's concurrency and rate limits"""
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            response = await self.rate_limiter.call_async(
+                self._request, prompt, temperature,
+                estimated_tokens=estimate_tokens(prompt)
+            )
+        if self.telemetry is not None:
+            self.telemetry.add_usage(getattr(response, 'usage', None))
+        return self._text(response)
+
+    async def _request(self, prompt: str, temperature: Optional[float]):
+        raise NotImplementedError
+
+    def _text(self, response) -> str:
+        raise NotImplementedError
+
+
+class OpenAIProvider(Provider):
+    """OpenAI Responses API (also any compatible server, e.g. StubModelServer)"""
+
+    name = 'openai'
+
+    def __init__(self, model: str, client=None, **kwargs):
+        super().__init__(model, **kwargs)
+        if client is None:
+            from openai import AsyncOpenAI
+            # Retries are handled by our RateLimiter, not the SDK
+            client = AsyncOpenAI(max_retries=0)
+        self.client = client
+
+    async def _request(self, prompt, temperature):
+        params = {} if temperature is None else {'temperature': temperature}
+        return await self.client.responses.create(model=self.model, input=prompt, **params)
+
+    def _text(self, response) -> str:
+        return response.output_text
+
+
+class AnthropicProvider(Provider):
+    """Anthropic Messages API"""
+
+    name = 'anthropic'
+
+    def __init__(self, model: str, client=None, max_tokens: int = DEFAULT_MAX_TOKENS, **kwargs):
+        super().__init__(model, **kwargs)
+        if client is None:
+            try:
+                from anthropic import AsyncAnthropic
+            except ImportError:
+                raise ImportError("Anthropic models need the anthropic package: pip install anthropic")
+            client = AsyncAnthropic(max_retries=0)
+        self.client = client
+        self.max_tokens = max_tokens
+
+    async def _request(self, prompt, temperature):
+        params = {} if temperature is None else {'temperature': temperature}
+        return await self.client.messages.create(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            messages=[{"role": "user", "content": prompt}],
+            **params
+        )
+
+    def _text(self, response) -> str:
+        return "".join(block.text for block in response.content if getattr(block, 'type', None) == 'text')
+
+
+class StubProvider(Provider):
+    """In-process stand-in for a model, for tests and dry runs.
+
+    Answers come from `answers` (question text -> answer) or
+    `answer_fn(prompt)`, as with StubModelServer, after `latency` seconds.
+    """
+
+    name = 'stub'
+
+    def __init__(self, model: str, answers: Dict[str, str] = None,
+                 answer_fn: Callable[[str], str] = None, latency: float = 0.0, **kwargs):
+        super().__init__(model, **kwargs)
+        self.answers = answers or {}
+        self.answer_fn = answer_fn
+        self.latency = latency
+        self.request_count = 0
+
+    def answer(self, prompt: str) -> str:
+        if self.answer_fn:
+            return self.answer_fn(prompt)
+        for question, answer in self.answers.items():
+            if prompt.startswith(question):
+                return f"The answer is {answer}."
+        return "I don't know."
+
+    async def _request(self, prompt, temperature):
+        self.request_count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.answer(prompt)
+
+    def _text(self, response) -> str:
+        return response
+
+
+PROVIDER_CLASSES = {
+    'openai': OpenAIProvider,
+    'anthropic': AnthropicProvider,
+    'stub': StubProvider
+}
+
+
+def make_provider(spec: str, **kwargs) -> Provider:
+    """Provider for a "provider:model" spec; kwargs go to its constructor"""
+    provider, model = parse_model_spec(spec)
+    return PROVIDER_CLASSES[provider](model, **kwargs)
@@ -0,0 +1,271 @@
+# src/question_bank.py
+import hashlib
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.analyzers import extract_numbers
+from src.knowledge_base import AnswerIndex, normalize_text
+
+# MinHash signature length, split into BANDS bands of ROWS rows for LSH
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Character n-grams of the normalized question
+SHINGLE_SIZE = 4
+
+# Estimated Jaccard similarity at or above which two questions are near-duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.6
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def question_id(question: str) -> str:
+    """Stable ID of a question: a hash of its normalized text"""
+    return "q" + hashlib.sha1(normalize_text(question).encode('utf-8')).hexdigest()[:12]
+
+
+def shingle_hashes(normalized: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """CRC32 of every character n-gram of the text"""
+    if len(normalized) <= size:
+        grams = {normalized}
+    else:
+        grams = {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def _number_key(question: str) -> Tuple[float, ...]:
+    """The numbers a question asks about; questions differing in them never match"""
+    return tuple(sorted(token.value for token in extract_numbers(question)))
+
+
+def _band_keys(signature: np.ndarray, numbers: Tuple[float, ...]) -> List[Tuple]:
+    """LSH bucket key of a signature in every band.
+
+    The numbers are part of the key, so questions about different numbers
+    never share a bucket.
+    """
+    return [(numbers, signature[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+
+class MinHasher:
+    """MinHash signatures from NUM_PERM seeded universal hash functions"""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # a, x < 2^31 keeps a * x + b inside uint64
+        self.a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        x = (hashes % _MERSENNE_PRIME)[:, None]
+        return ((x * self.a + self.b) % _MERSENNE_PRIME).min(axis=0).astype(np.uint32)
+
+
+class QuestionIndex:
+    """Exact and near-duplicate detection over questions from many sources.
+
+    Questions are keyed by normalized text for exact duplicates. Each
+    distinct text also gets a MinHash signature, filed under one LSH
+    bucket per band as it is added; near-duplicates are only compared
+    with questions sharing a bucket, so neither building the index nor a
+    lookup scans every question. Questions that ask about different numbers ("156 × 234" vs
+    "156 × 235") are never near duplicates however similar the wording,
+    and near-duplicates are only merged when their answers agree ("World
+    War I" / "World War II").
+    """
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD, minhasher: MinHasher = None):
+        self.threshold = threshold
+        self.minhasher = minhasher or MinHasher()
+        self.records: List[Dict] = []
+        # normalized text -> positions of every record with that text
+        self.exact: Dict[str, List[int]] = {}
+        # One entry per distinct normalized text, in order of first appearance
+        self.representatives: List[int] = []
+        self.signatures: List[np.ndarray] = []
+        self.number_keys: List[Tuple[float, ...]] = []
+        self.answer_index = AnswerIndex()
+        # One dict per band: band key -> indices (into representatives) in that bucket
+        self.buckets: List[Dict[Tuple, List[int]]] = [{} for _ in range(BANDS)]
+
+    @classmethod
+    def from_bank(cls, entries: Iterable[Dict], threshold: float = NEAR_DUPLICATE_THRESHOLD) -> 'QuestionIndex':
+        """Index a merged bank (as written by build_question_bank.py).
+
+        Every source variant of an entry is indexed under the entry's ID,
+        so lookups of any variant, or of a near-duplicate of one, give
+        the bank ID.
+        """
+        index = cls(threshold)
+        for entry in entries:
+            for source in entry.get('sources') or [entry]:
+                index.add({'q': source['q'], 'a': source['a'], 'id': entry['id']})
+        return index
+
+    def add(self, record: Dict) -> int:
+        """Index one record (a dict with at least 'q'); returns its position"""
+        position = len(self.records)
+        self.records.append(record)
+
+        normalized = normalize_text(record['q'])
+        positions = self.exact.get(normalized)
+        if positions is not None:
+            positions.append(position)
+            return position
+
+        self.exact[normalized] = [position]
+        signature = self.minhasher.signature(shingle_hashes(normalized))
+        numbers = _number_key(record['q'])
+        index = len(self.representatives)
+        for bucket, key in zip(self.buckets, _band_keys(signature, numbers)):
+            bucket.setdefault(key, []).append(index)
+        self.representatives.append(position)
+        self.signatures.append(signature)
+        self.number_keys.append(numbers)
+        return position
+
+    def extend(self, records: Iterable[Dict]):
+        for record in records:
+            self.add(record)
+
+    def answers_agree(self, i: int, j: int) -> bool:
+        """Whether either record's answer is an accepted form of the other's"""
+        return self._answers_agree(str(self.records[i]['a']), str(self.records[j]['a']))
+
+    def _answers_agree(self, first: str, second: str) -> bool:
+        for reference, answer in ((first, second), (second, first)):
+            matched, _ = self.answer_index.verify(
+                self.answer_index.get(reference),
+                f" {normalize_text(answer)} ", extract_numbers(answer), response_lower=answer.lower()
+            )
+            if matched:
+                return True
+        return False
+
+    def lookup(self, question: str, answer=None) -> Optional[int]:
+        """Position of an indexed record that is the same question, or None.
+
+        An exact match (same normalized text) wins; otherwise the most
+        similar near-duplicate above the threshold with the same numbers
+        is used, and with an `answer`, only one whose answer agrees.
+        """
+        normalized = normalize_text(question)
+        positions = self.exact.get(normalized)
+        if positions is not None:
+            return positions[0]
+        if not self.signatures:
+            return None
+
+        numbers = _number_key(question)
+        signature = self.minhasher.signature(shingle_hashes(normalized))
+        candidates = set()
+        for bucket, key in zip(self.buckets, _band_keys(signature, numbers)):
+            candidates.update(bucket.get(key, ()))
+        scored = [(float(np.mean(self.signatures[i] == signature)), i) for i in candidates]
+        for similarity, i in sorted(scored, key=lambda pair: (-pair[0], pair[1])):
+            if similarity < self.threshold:
+                break
+            position = self.representatives[i]
+            if answer is None or self._answers_agree(str(self.records[position]['a']), str(answer)):
+                return position
+        return None
+
+    def resolve(self, question: str, answer=None) -> str:
+        """Question ID shared by a question and its exact and near duplicates.
+
+        Questions found by `lookup` get the ID of the record they match
+        (its bank 'id' when it has one); new questions are added, so later
+        near-duplicates of them resolve to the same ID.
+        """
+        position = self.lookup(question, answer)
+        if position is None:
+            position = self.add({'q': question, 'a': answer})
+        record = self.records[position]
+        return record.get('id') or question_id(record['q'])
+
+    def exact_duplicates(self) -> List[List[int]]:
+        return [positions for positions in self.exact.values() if len(positions) > 1]
+
+    def _candidate_pairs(self) -> Set[Tuple[int, int]]:
+        """Pairs of distinct texts sharing at least one LSH bucket"""
+        candidates = set()
+        for band in self.buckets:
+            for bucket in band.values():
+                for n, i in enumerate(bucket):
+                    for j in bucket[n + 1:]:
+                        candidates.add((i, j))
+        return candidates
+
+    def near_duplicates(self) -> List[Tuple[int, int, float]]:
+        """(i, j, similarity) record positions of near-duplicate pairs with different text"""
+        if len(self.signatures) < 2:
+            return []
+
+        signatures = np.vstack(self.signatures)
+        pairs = []
+        for i, j in sorted(self._candidate_pairs()):
+            similarity = float(np.mean(signatures[i] == signatures[j]))
+            if similarity >= self.threshold:
+                pairs.append((self.representatives[i], self.representatives[j], similarity))
+        return pairs
+
+    def clusters(self) -> List[List[int]]:
+        """Groups of positions that are exact or near duplicates of each other"""
+        parent = list(range(len(self.records)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i, j):
+            i, j = find(i), find(j)
+            if i != j:
+                # The earlier record stays the root, so it becomes canonical
+                parent[max(i, j)] = min(i, j)
+
+        for positions in self.exact_duplicates():
+            for other in positions[1:]:
+                union(positions[0], other)
+        for i, j, _ in self.near_duplicates():
+            if self.answers_agree(i, j):
+                union(i, j)
+
+        groups: Dict[int, List[int]] = {}
+        for position in range(len(self.records)):
+            groups.setdefault(find(position), []).append(position)
+        return list(groups.values())
+
+    def merge(self) -> List[Dict]:
+        """One canonical bank entry per cluster, in order of first appearance.
+
+        The earliest record in a cluster (so the highest-priority source,
+        when sources are added in priority order) provides the text, answer
+        and ID; every variant is listed under `sources`. `answers_agree` is
+        False when a variant's answer doesn't match the canonical one.
+        """
+        bank = []
+        for cluster in sorted(self.clusters(), key=lambda positions: positions[0]):
+            canonical = self.records[cluster[0]]
+            agree = all(self.answers_agree(cluster[0], position) for position in cluster[1:])
+
+            bank.append({
+                'id': question_id(canonical['q']),
+                'q': canonical['q'],
+                'a': canonical['a'],
+                'category': canonical.get('category'),
+                'subcategory': canonical.get('subcategory'),
+                'difficulty': canonical.get('difficulty', 'medium'),
+                'answers_agree': agree,
+                'sources': [
+                    {'source': self.records[position].get('source'),
+                     'q': self.records[position]['q'],
+                     'a': self.records[position]['a']}
+                    for position in cluster
+                ]
+            })
+        return bank
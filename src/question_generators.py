@@ -0,0 +1,262 @@
+# src/question_generators.py
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from fractions import Fraction
+from typing import Callable, Dict, Iterator, List, Tuple
+
+DEFAULT_SHARD_SIZE = 100_000
+
+# Questions drawn from one seeded generator; slices start on any question
+BLOCK_SIZE = 1000
+MANIFEST_FILE = "manifest.json"
+
+# Bump when generated questions change for the same seed
+GENERATOR_VERSION = "1.0"
+
+
+def format_number(value: Fraction):
+    """Exact answer value: an int, an exact decimal string, or "p/q or ~decimal" """
+    if value.denominator == 1:
+        return value.numerator
+
+    # Terminating decimals (denominator 2^a 5^b) are written out exactly
+    denominator = value.denominator
+    for factor in (2, 5):
+        while denominator % factor == 0:
+            denominator //= factor
+    if denominator == 1:
+        exact = Decimal(value.numerator) / Decimal(value.denominator)
+        return format(exact.normalize(), 'f')
+
+    return f"{value.numerator}/{value.denominator} or {float(value):.3f}"
+
+
+def _difficulty(size: int, easy: int, hard: int) -> str:
+    if size < easy:
+        return "easy"
+    if size < hard:
+        return "medium"
+    return "hard"
+
+
+def _signed(value: int) -> str:
+    """ "+ 5" or "- 5", for writing terms after the first"""
+    return f"+ {value}" if value >= 0 else f"- {-value}"
+
+
+# ARITHMETIC
+
+def arithmetic_question(rng: random.Random) -> Dict:
+    kind = rng.choice(['add', 'subtract', 'multiply', 'divide', 'power', 'percent'])
+    if kind == 'add':
+        a, b = rng.randint(10, 99999), rng.randint(10, 99999)
+        return {"q": f"What is {a} + {b}?", "a": a + b, "difficulty": _difficulty(max(a, b), 1000, 10000)}
+    if kind == 'subtract':
+        a, b = sorted((rng.randint(10, 99999), rng.randint(10, 99999)), reverse=True)
+        return {"q": f"What is {a} - {b}?", "a": a - b, "difficulty": _difficulty(a, 1000, 10000)}
+    if kind == 'multiply':
+        a, b = rng.randint(2, 9999), rng.randint(2, 9999)
+        return {"q": f"What is {a} × {b}?", "a": a * b, "difficulty": _difficulty(a * b, 1000, 100000)}
+    if kind == 'divide':
+        # The dividend is built from the quotient so the answer is exact
+        divisor, quotient = rng.randint(2, 999), rng.randint(2, 9999)
+        return {"q": f"What is {divisor * quotient} ÷ {divisor}?", "a": quotient,
+                "difficulty": _difficulty(divisor, 10, 100)}
+    if kind == 'power':
+        base, exponent = rng.randint(2, 30), rng.randint(2, 5)
+        return {"q": f"What is {base}^{exponent}?", "a": base ** exponent,
+                "difficulty": _difficulty(base ** exponent, 1000, 100000)}
+
+    percent, whole = rng.choice([5, 10, 12.5, 15, 20, 25, 30, 40, 50, 75]), rng.randint(1, 999) * 8
+    return {"q": f"What is {percent}% of {whole}?",
+            "a": format_number(Fraction(str(percent)) * whole / 100), "difficulty": "easy"}
+
+
+# ALGEBRA
+
+def algebra_question(rng: random.Random) -> Dict:
+    kind = rng.choice(['linear', 'linear_both_sides', 'quadratic'])
+    if kind == 'linear':
+        x, a, b = rng.randint(-50, 50), rng.randint(2, 20), rng.randint(-100, 100)
+        return {"q": f"Solve for x: {a}x {_signed(b)} = {a * x + b}", "a": x,
+                "difficulty": _difficulty(a, 5, 12)}
+    if kind == 'linear_both_sides':
+        # ax + b = cx + d with a != c; x may be fractional
+        a, c = rng.sample(range(2, 15), 2)
+        b, d = rng.randint(-60, 60), rng.randint(-60, 60)
+        x = Fraction(d - b, a - c)
+        return {"q": f"Solve for x: {a}x {_signed(b)} = {c}x {_signed(d)}", "a": format_number(x),
+                "difficulty": "medium" if x.denominator == 1 else "hard"}
+
+    r1, r2 = rng.randint(-20, 20), rng.randint(-20, 20)
+    b, c = -(r1 + r2), r1 * r2
+    return {"q": f"What is the larger root of x² {_signed(b)}x {_signed(c)} = 0?",
+            "a": max(r1, r2), "difficulty": "hard"}
+
+
+# UNIT CONVERSION
+
+# (from unit, to unit, exact factor)
+UNIT_FACTORS = [
+    ("kilometers", "meters", Fraction(1000)),
+    ("meters", "centimeters", Fraction(100)),
+    ("centimeters", "millimeters", Fraction(10)),
+    ("miles", "kilometers", Fraction("1.609344")),
+    ("inches", "centimeters", Fraction("2.54")),
+    ("feet", "inches", Fraction(12)),
+    ("yards", "feet", Fraction(3)),
+    ("kilograms", "grams", Fraction(1000)),
+    ("pounds", "kilograms", Fraction("0.45359237")),
+    ("liters", "milliliters", Fraction(1000)),
+    ("hours", "minutes", Fraction(60)),
+    ("days", "hours", Fraction(24)),
+    ("minutes", "seconds", Fraction(60)),
+]
+
+
+def unit_conversion_question(rng: random.Random) -> Dict:
+    if rng.random() < 0.15:
+        celsius = rng.randint(-40, 120)
+        if rng.random() < 0.5:
+            return {"q": f"What is {celsius}°C in Fahrenheit?",
+                    "a": format_number(Fraction(celsius) * 9 / 5 + 32), "difficulty": "medium"}
+        return {"q": f"What is {celsius}°C in Kelvin?",
+                "a": format_number(Fraction(celsius) + Fraction("273.15")), "difficulty": "easy"}
+
+    source, target, factor = rng.choice(UNIT_FACTORS)
+    amount = rng.randint(1, 500)
+    if rng.random() < 0.5:
+        return {"q": f"How many {target} are in {amount} {source}?",
+                "a": format_number(amount * factor),
+                "difficulty": "easy" if factor.denominator == 1 else "medium"}
+    # Reverse direction, from a whole number of the larger unit so the answer is exact
+    return {"q": f"How many {source} is {format_number(amount * factor)} {target}?",
+            "a": amount, "difficulty": "medium"}
+
+
+# SEQUENCES
+
+def sequence_question(rng: random.Random) -> Dict:
+    kind = rng.choice(['arithmetic', 'geometric', 'squares', 'fibonacci'])
+    length = rng.randint(4, 6)
+    if kind == 'arithmetic':
+        start, step = rng.randint(-50, 100), rng.choice([i for i in range(-15, 16) if i])
+        terms = [start + step * i for i in range(length + 1)]
+        difficulty = "easy"
+    elif kind == 'geometric':
+        start, ratio = rng.randint(1, 9), rng.randint(2, 5)
+        terms = [start * ratio ** i for i in range(length + 1)]
+        difficulty = "medium"
+    elif kind == 'squares':
+        offset = rng.randint(1, 30)
+        terms = [(offset + i) ** 2 for i in range(length + 1)]
+        difficulty = "medium"
+    else:
+        terms = [rng.randint(1, 10), rng.randint(1, 10)]
+        while len(terms) < length + 1:
+            terms.append(terms[-1] + terms[-2])
+        difficulty = "hard"
+
+    shown = ", ".join(str(term) for term in terms[:-1])
+    return {"q": f"What comes next in the sequence: {shown}, ?", "a": terms[-1], "difficulty": difficulty}
+
+
+# (category, subcategory, generator, weight)
+GENERATORS: List[Tuple[str, str, Callable[[random.Random], Dict], float]] = [
+    ("mathematics", "arithmetic", arithmetic_question, 0.35),
+    ("mathematics", "algebra", algebra_question, 0.25),
+    ("mathematics", "unit_conversion", unit_conversion_question, 0.2),
+    ("reasoning", "sequences", sequence_question, 0.2),
+]
+
+
+def generate_questions(count: int, seed: int = 0, start: int = 0) -> Iterator[Dict]:
+    """Yield questions start..start+count-1 of the stream for `seed`.
+
+    The stream is made of blocks of BLOCK_SIZE questions, each drawn from
+    its own generator seeded with (seed, block). Any slice (one shard, say)
+    can therefore be produced on its own and always comes out the same.
+    """
+    weights = [weight for *_, weight in GENERATORS]
+    end = start + count
+    for block in range(start // BLOCK_SIZE, -(-end // BLOCK_SIZE)):
+        rng = random.Random(f"{seed}:{block}")
+        for i in range(block * BLOCK_SIZE, min((block + 1) * BLOCK_SIZE, end)):
+            category, subcategory, generate, _ = rng.choices(GENERATORS, weights)[0]
+            question = generate(rng)
+            # Questions before `start` in the first block are drawn only to advance the generator
+            if i >= start:
+                yield {"category": category, "subcategory": subcategory, **question}
+
+
+def shard_name(index: int) -> str:
+    return f"questions-{index:05d}.jsonl"
+
+
+def _remove_previous_output(output_dir: str):
+    """Delete the manifest and shards of an earlier run into `output_dir`"""
+    for name in os.listdir(output_dir):
+        if name == MANIFEST_FILE or (name.startswith("questions-") and name.endswith(".jsonl")):
+            os.remove(os.path.join(output_dir, name))
+
+
+def _write_shard(output_dir: str, index: int, start: int, size: int, seed: int) -> Dict:
+    """Write one shard and return its question counts per category/subcategory"""
+    counts = {}
+    with open(os.path.join(output_dir, shard_name(index)), "w", encoding="utf-8") as f:
+        for question in generate_questions(size, seed, start):
+            f.write(json.dumps(question, ensure_ascii=False) + "\n")
+            by_sub = counts.setdefault(question["category"], {})
+            by_sub[question["subcategory"]] = by_sub.get(question["subcategory"], 0) + 1
+    return counts
+
+
+def write_sharded_dataset(count: int, output_dir: str, seed: int = 0,
+                          shard_size: int = DEFAULT_SHARD_SIZE, workers: int = 1) -> Dict:
+    """Stream `count` generated questions to JSONL shards plus a manifest.
+
+    Questions are written as they are generated, so memory use doesn't grow
+    with `count`; with `workers` > 1 shards are written in parallel
+    processes. The output is the same for a given seed and shard size
+    either way. The manifest records the seed, shard files and counts per
+    category/subcategory. Shards left by an earlier, larger run into the
+    same directory are removed first.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    _remove_previous_output(output_dir)
+    jobs = [
+        (output_dir, index, start, min(shard_size, count - start), seed)
+        for index, start in enumerate(range(0, count, shard_size))
+    ]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            shard_counts = list(executor.map(_write_shard, *zip(*jobs))) if jobs else []
+    else:
+        shard_counts = [_write_shard(*job) for job in jobs]
+
+    counts = {}
+    for shard in shard_counts:
+        for category, by_sub in shard.items():
+            for subcategory, n in by_sub.items():
+                counts.setdefault(category, {})
+                counts[category][subcategory] = counts[category].get(subcategory, 0) + n
+
+    manifest = {
+        "metadata": {
+            "created_date": datetime.now().isoformat(),
+            "version": GENERATOR_VERSION,
+            "seed": seed,
+            "total_questions": count,
+            "shard_size": shard_size
+        },
+        "shards": [{"file": shard_name(index), "questions": size} for _, index, _, size, _ in jobs],
+        "counts": counts
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -0,0 +1,203 @@
+# src/rate_limit.py
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+# Conservative defaults for gpt-4.1 on a low usage tier
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 30000
+
+# Rough allowance for the answer when estimating a request's token cost
+DEFAULT_COMPLETION_TOKENS = 150
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Per-minute budget that refills continuously.
+
+    Reservations may drive the level negative; the caller then waits until
+    the debt has refilled. That keeps reservations strictly first-come
+    first-served without a queue.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` from the bucket and return how long to wait for it"""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def adjust(self, amount: float):
+        """Correct an earlier reservation once the real cost is known"""
+        self.level = min(self.capacity, self.level - amount)
+
+
+class RateLimiter:
+    """Shared requests-per-minute / tokens-per-minute limiter with retries.
+
+    `call` (sync) and `call_async` wait for both buckets, run the request
+    and retry retryable failures with jittered exponential backoff. A
+    Retry-After header on the error takes precedence over the computed
+    delay, and a 429 pauses every caller sharing the limiter.
+    """
+
+    def __init__(self, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+                 max_retries: int = 5, base_delay: float = 1.0,
+                 max_delay: float = 60.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'rate_limited': 0,
+            'errors': 0,
+            'throttled_seconds': 0.0,
+            'backoff_seconds': 0.0
+        }
+
+    def call(self, fn: Callable, *args, estimated_tokens: int = None, **kwargs):
+        """Run fn(*args, **kwargs) under the limiter, retrying on failure"""
+        attempt = 0
+        while True:
+            time.sleep(self._reserve(estimated_tokens))
+            try:
+                response = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._record_usage(response, estimated_tokens)
+            return response
+
+    async def call_async(self, fn: Callable, *args, estimated_tokens: int = None, **kwargs):
+        """Async version of call for coroutine functions"""
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._reserve(estimated_tokens))
+            try:
+                response = await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._record_usage(response, estimated_tokens)
+            return response
+
+    def summary(self) -> Dict:
+        """Counters rounded for reports"""
+        return {key: round(value, 3) if isinstance(value, float) else value
+                for key, value in self.stats.items()}
+
+    def _reserve(self, estimated_tokens: Optional[int]) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = self.requests.reserve(1, now)
+            if self.tokens and estimated_tokens:
+                wait = max(wait, self.tokens.reserve(estimated_tokens, now))
+            wait = max(wait, self._paused_until - now)
+            self.stats['requests'] += 1
+            self.stats['throttled_seconds'] += wait
+        return wait
+
+    def _record_usage(self, response, estimated_tokens: Optional[int]):
+        usage = getattr(response, 'usage', None)
+        actual = getattr(usage, 'total_tokens', None)
+        if self.tokens and estimated_tokens and actual is not None:
+            with self._lock:
+                self.tokens.adjust(actual - estimated_tokens)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error is final"""
+        status = _status_code(error)
+        if not _is_transient(error, status):
+            return None
+        if attempt >= self.max_retries:
+            with self._lock:
+                self.stats['errors'] += 1
+            return None
+
+        delay = _retry_after(error)
+        if delay is None:
+            # Full jitter: uniform over [0, base * 2^attempt]
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        delay = min(delay, self.max_delay)
+
+        with self._lock:
+            self.stats['retries'] += 1
+            self.stats['backoff_seconds'] += delay
+            if status == 429:
+                self.stats['rate_limited'] += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+
+def estimate_tokens(prompt: str, completion_tokens: int = DEFAULT_COMPLETION_TOKENS) -> int:
+    """Cheap token estimate (~4 characters per token) for bucket reservations"""
+    return len(prompt) // 4 + completion_tokens
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+
+def _is_transient(error: Exception, status: Optional[int]) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections"""
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    # SDK errors (openai.APIConnectionError, APITimeoutError, ...) carry no status
+    return type(error).__name__.endswith(('ConnectionError', 'TimeoutError'))
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read Retry-After / retry-after-ms from the error's HTTP response"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+
+    value = headers.get('retry-after-ms')
+    if value is not None:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+
+    value = headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
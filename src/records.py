@@ -0,0 +1,194 @@
+# src/records.py
+import json
+import sys
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, List, Union
+
+from src.question_bank import question_id
+
+# Keys of a result record, in the order they are written to JSON/CSV.
+# Successful results have no 'error'; errored ones have no detection fields.
+RESULT_FIELDS = (
+    'category', 'subcategory', 'difficulty', 'question', 'expected_answer', 'ai_answer',
+    'hallucination_detected', 'detection_confidence', 'detection_details', 'error', 'latency_s'
+)
+
+# Few distinct values repeated across every result
+LABEL_FIELDS = ('category', 'subcategory', 'difficulty', 'expected_answer')
+
+
+def intern_label(value):
+    """One shared copy of a low-cardinality string"""
+    return sys.intern(value) if type(value) is str else value
+
+
+def pack_details(details: Dict) -> str:
+    """detection_details as compact JSON; identical details share one string"""
+    return sys.intern(json.dumps(details, separators=(',', ':')))
+
+
+class Detection(MutableMapping):
+    """Verdict of detect_hallucination for one response.
+
+    Holds references to the caller's question/response/expected answer
+    rather than copies. It is also a mutable mapping with the keys of the
+    old result dict, so `detection['confidence']` and
+    `detection['hallucination_detected'] = True` keep working, and keys
+    the old dict didn't have can be added (and removed again). json can't
+    serialize a Mapping, so pass `to_dict()`, a plain dict, to json.dumps.
+    """
+
+    FIELDS = ('question', 'ai_response', 'expected_answer', 'hallucination_detected',
+              'confidence', 'detection_details')
+
+    __slots__ = FIELDS + ('extra',)
+
+    def __init__(self, question: str, ai_response: str, expected_answer, hallucination_detected: bool,
+                 confidence: float, detection_details: Dict):
+        self.question = question
+        self.ai_response = ai_response
+        self.expected_answer = expected_answer
+        self.hallucination_detected = hallucination_detected
+        self.confidence = confidence
+        self.detection_details = detection_details
+        # Keys set beyond FIELDS; created on first use
+        self.extra = None
+
+    @property
+    def question_id(self) -> str:
+        return question_id(self.question)
+
+    def to_dict(self) -> Dict:
+        result = {field: getattr(self, field) for field in self.FIELDS}
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+    def __getitem__(self, key: str):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __setitem__(self, key: str, value):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+            return
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in self.FIELDS:
+            raise TypeError(f"{key!r} is part of every Detection and can't be removed")
+        if self.extra is None:
+            raise KeyError(key)
+        del self.extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.FIELDS
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return len(self.FIELDS) + (len(self.extra) if self.extra else 0)
+
+    def __repr__(self) -> str:
+        return f"Detection({self.to_dict()!r})"
+
+
+class ResultRecord:
+    """One stored result with the fields of a result dict as slots.
+
+    The question is a question ID resolved through the owning
+    ResultStore; labels are interned and detection_details is kept as
+    interned compact JSON. A field the result dict did not have stays
+    unset, so `ResultStore.unpack` restores the exact original keys.
+    """
+
+    __slots__ = ('question_id', 'question', 'category', 'subcategory', 'difficulty', 'expected_answer',
+                 'ai_answer', 'hallucination_detected', 'detection_confidence', 'detection_details',
+                 'error', 'latency_s', 'extra')
+
+
+_UNSET = object()
+
+
+class ResultStore:
+    """Append-only list of results kept as compact ResultRecords.
+
+    Takes and gives result dicts in the raw_results.json shape, so it can
+    stand in for a list of dicts: iterating and slicing yield dicts built
+    on demand, one at a time. Each question's text is stored once and
+    records refer to it by question ID. A record whose text differs from
+    the stored one for its ID (same normalized text) keeps its own copy.
+    """
+
+    def __init__(self, results: Iterable[Dict] = ()):
+        self.questions: Dict[str, str] = {}
+        self.records: List[ResultRecord] = []
+        for result in results:
+            self.append(result)
+
+    def pack(self, result: Dict) -> ResultRecord:
+        """Compact record for a result dict"""
+        record = ResultRecord()
+        extra = None
+        for key, value in result.items():
+            if key == 'question':
+                qid = question_id(value)
+                stored = self.questions.setdefault(qid, value)
+                record.question_id = qid
+                if stored != value:
+                    record.question = value
+            elif key == 'detection_details':
+                record.detection_details = None if value is None else pack_details(value)
+            elif key in LABEL_FIELDS:
+                setattr(record, key, intern_label(value))
+            elif key in RESULT_FIELDS:
+                setattr(record, key, value)
+            else:
+                # Anything else (e.g. from older journals) is kept as is
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        if extra is not None:
+            record.extra = extra
+        return record
+
+    def unpack(self, record: ResultRecord) -> Dict:
+        """The result dict a record was packed from"""
+        result = {}
+        for field in RESULT_FIELDS:
+            if field == 'question':
+                qid = getattr(record, 'question_id', _UNSET)
+                if qid is _UNSET:
+                    continue
+                value = getattr(record, 'question', _UNSET)
+                result['question'] = self.questions[qid] if value is _UNSET else value
+                continue
+            value = getattr(record, field, _UNSET)
+            if value is _UNSET:
+                continue
+            if field == 'detection_details' and value is not None:
+                value = json.loads(value)
+            result[field] = value
+        extra = getattr(record, 'extra', None)
+        if extra:
+            result.update(extra)
+        return result
+
+    def append(self, result: Union[Dict, ResultRecord]):
+        self.records.append(result if isinstance(result, ResultRecord) else self.pack(result))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return map(self.unpack, self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.unpack(record) for record in self.records[index]]
+        return self.unpack(self.records[index])
@@ -0,0 +1,166 @@
+# src/replay.py
+import json
+import os
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from src.memo import DetectionMemo
+from src.parallel import DEFAULT_CHUNK_SIZE, ParallelScorer
+from src.storage import PARQUET_FILE, RAW_RESULTS_FILE, load_results
+
+# Result files written by the older scripts, next to the dataset run dirs
+RESULT_FILE_PREFIXES = ('hallucination_test_', 'comprehensive_test_')
+
+# Columns read from a dataset run (Parquet or raw_results.json)
+RUN_COLUMNS = ['category', 'subcategory', 'difficulty', 'question',
+               'expected_answer', 'ai_answer', 'hallucination_detected']
+
+
+def find_sources(paths: Iterable[str]) -> List[str]:
+    """Expand paths into the run directories and result files under them"""
+    sources = []
+    for path in paths:
+        if os.path.isfile(path):
+            sources.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            if RAW_RESULTS_FILE in files or PARQUET_FILE in files:
+                sources.append(root)
+                continue
+            sources.extend(
+                os.path.join(root, name) for name in sorted(files)
+                if name.endswith('.json') and name.startswith(RESULT_FILE_PREFIXES)
+            )
+    return sources
+
+
+def normalize_record(record: Dict) -> Dict:
+    """Map any stored result layout onto the fields replay needs.
+
+    Dataset runs store `subcategory`, hallucination_test files `type` and
+    `is_correct`, and comprehensive_test files `expected` with the category
+    doubling as the question type.
+    """
+    stored = record.get('hallucination_detected')
+    if stored is None and record.get('is_correct') is not None:
+        stored = not record['is_correct']
+
+    expected = record.get('expected_answer', record.get('expected'))
+    ai_answer = record.get('ai_answer')
+    return {
+        'category': record.get('category'),
+        'subcategory': record.get('subcategory'),
+        'difficulty': record.get('difficulty'),
+        'question': record['question'],
+        'expected_answer': None if expected is None else str(expected),
+        'ai_answer': ai_answer,
+        'question_type': record.get('subcategory') or record.get('type') or record.get('category'),
+        # None when the old script never judged the answer
+        'stored': stored,
+        # Failed requests were stored with the exception text as the answer
+        'error': bool(record.get('error')) or ai_answer is None or ai_answer.startswith('ERROR: ')
+    }
+
+
+def iter_records(source: str) -> Iterator[Dict]:
+    """Stream the normalized records of one run directory or result file"""
+    if os.path.isdir(source):
+        table = load_results(source, columns=RUN_COLUMNS)
+        for batch in table.to_batches():
+            for record in batch.to_pylist():
+                yield normalize_record(record)
+        return
+
+    with open(source, 'r') as f:
+        data = json.load(f)
+    for record in data['detailed_results'] if isinstance(data, dict) else data:
+        yield normalize_record(record)
+
+
+def _iter_chunks(sources: List[str], chunk_size: int) -> Iterator[Tuple[str, List[Dict]]]:
+    for source in sources:
+        chunk = []
+        for record in iter_records(source):
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield source, chunk
+                chunk = []
+        if chunk:
+            yield source, chunk
+
+
+def _new_source_summary() -> Dict:
+    return {
+        'total': 0,
+        'skipped': 0,
+        'unjudged': 0,
+        'stored_hallucinations': 0,
+        'replayed_hallucinations': 0,
+        'new_hallucinations': 0,
+        'cleared_hallucinations': 0
+    }
+
+
+def replay(sources: List[str], diff_file, workers: int = None,
+           chunk_size: int = DEFAULT_CHUNK_SIZE, memo: DetectionMemo = None) -> Dict:
+    """Re-score stored answers with the current detector and diff the verdicts.
+
+    Records are streamed from each source in chunks and scored across
+    `workers` processes, with only a bounded number of chunks in flight.
+    Every record whose verdict changed is written to `diff_file` as one
+    JSON line; the per-source counts are returned. Errored answers are
+    skipped and answers without a stored verdict are only counted. With a
+    `memo`, answers already scored (up to markdown) reuse their verdict.
+    """
+    summary = {source: _new_source_summary() for source in sources}
+
+    # Chunks the scorer has pulled but whose results haven't come back yet
+    pending = deque()
+
+    def chunk_columns():
+        for source, records in _iter_chunks(sources, chunk_size):
+            scored = [record for record in records if not record['error']]
+            pending.append((source, records))
+            yield ([record['question'] for record in scored],
+                   [record['ai_answer'] for record in scored],
+                   [record['expected_answer'] for record in scored],
+                   [record['question_type'] for record in scored])
+
+    with ParallelScorer(workers, chunk_size, memo=memo) as scorer:
+        for batch in scorer.score_chunks(chunk_columns()):
+            source, records = pending.popleft()
+            counts = summary[source]
+            detections = iter(range(len(batch['hallucination_detected'])))
+            for record in records:
+                counts['total'] += 1
+                if record['error']:
+                    counts['skipped'] += 1
+                    continue
+
+                i = next(detections)
+                stored = record['stored']
+                now = batch['hallucination_detected'][i]
+                counts['replayed_hallucinations'] += now
+                if stored is None:
+                    counts['unjudged'] += 1
+                    continue
+                counts['stored_hallucinations'] += stored
+                if stored == now:
+                    continue
+
+                counts['new_hallucinations' if now else 'cleared_hallucinations'] += 1
+                diff_file.write(json.dumps({
+                    'source': source,
+                    'category': record['category'],
+                    'subcategory': record['subcategory'],
+                    'question': record['question'],
+                    'expected_answer': record['expected_answer'],
+                    'ai_answer': record['ai_answer'],
+                    'stored_hallucination': stored,
+                    'replayed_hallucination': now,
+                    'replayed_confidence': batch['confidence'][i],
+                    'replayed_details': batch['detection_details'][i]
+                }) + '\n')
+
+    return summary
@@ -0,0 +1,51 @@
+# src/runner.py
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List
+
+
+class AsyncQueryEngine:
+    """Runs async model queries with a bounded number in flight.
+
+    Items are pulled lazily from the input iterable, at most `concurrency`
+    handlers run at once, and results come back in input order so callers
+    can write them out exactly as the dataset lists them.
+    """
+
+    def __init__(self, concurrency: int = 8):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+
+    async def map(self, handler: Callable[..., Awaitable], items: Iterable) -> AsyncIterator:
+        """Yield handler(item) for every item, in input order"""
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # Keep a few more tasks queued than running so a slow head-of-line
+        # request doesn't leave workers idle
+        window_size = self.concurrency * 2
+        window = deque()
+
+        async def guarded(item):
+            async with semaphore:
+                return await handler(item)
+
+        try:
+            for item in items:
+                window.append(asyncio.ensure_future(guarded(item)))
+                if len(window) >= window_size:
+                    yield await window.popleft()
+
+            while window:
+                yield await window.popleft()
+        finally:
+            for task in window:
+                task.cancel()
+
+    async def gather(self, handler: Callable[..., Awaitable], items: Iterable) -> List:
+        """Run everything and return the results as a list"""
+        return [result async for result in self.map(handler, items)]
+
+    def run(self, handler: Callable[..., Awaitable], items: Iterable) -> List:
+        """Blocking wrapper around gather for synchronous callers"""
+        return asyncio.run(self.gather(handler, items))
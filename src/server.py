@@ -0,0 +1,435 @@
+# src/server.py
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.detector import EduHallucinationDetector
+from src.knowledge_base import AnswerIndex
+from src.similarity import SemanticIndex
+from src.telemetry import PERCENTILES
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Most answers scored in one detect_batch call
+DEFAULT_MAX_BATCH = 256
+
+# How long the oldest queued answer may wait for others to join its batch.
+# Answers that arrive while a batch is scored are coalesced regardless.
+DEFAULT_MAX_WAIT_MS = 0.0
+
+# Recent measurements kept for /stats
+DEFAULT_STATS_WINDOW = 10_000
+
+# Parsed reference answers, and vectors of references not in the vector
+# cache file, kept in memory; a long-running server sees ever more
+# distinct answers. Vectors take 4 KB each.
+DEFAULT_REFERENCE_CACHE = 20_000
+
+# Request fields and the raw_results.json names also accepted for them
+FIELD_NAMES = {
+    'question': ('question',),
+    'ai_response': ('ai_response', 'ai_answer'),
+    'expected_answer': ('expected_answer', 'expected'),
+    'question_type': ('question_type', 'subcategory', 'type')
+}
+
+# Fields of each result, as detect_hallucination returns them
+RESULT_KEYS = ('hallucination_detected', 'confidence', 'detection_details')
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+# Largest request body accepted
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+def bounded_detector(cache_size: int = DEFAULT_REFERENCE_CACHE, vector_cache: str = None,
+                     memo=None) -> EduHallucinationDetector:
+    """A detector whose reference-answer caches keep at most `cache_size` entries"""
+    return EduHallucinationDetector(
+        answer_index=AnswerIndex(max_answers=cache_size),
+        similarity=SemanticIndex(cache_path=vector_cache, max_rows=cache_size),
+        memo=memo
+    )
+
+
+class RequestError(ValueError):
+    """A request the server answers with HTTP 400"""
+
+
+def parse_item(item) -> Tuple:
+    """(question, ai_response, expected_answer, question_type) from one request item"""
+    if not isinstance(item, dict):
+        raise RequestError("each item must be a JSON object")
+    row = []
+    for field, names in FIELD_NAMES.items():
+        value = next((item[name] for name in names if item.get(name) is not None), None)
+        if value is not None and not isinstance(value, str):
+            value = str(value)
+        row.append(value)
+    if row[0] is None or row[1] is None:
+        raise RequestError("question and ai_response are required")
+    return tuple(row)
+
+
+class LatencyWindow:
+    """The most recent `size` values of one measurement, with percentiles"""
+
+    def __init__(self, size: int = DEFAULT_STATS_WINDOW):
+        self.values = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, value: float):
+        self.values.append(value)
+        self.count += 1
+
+    def summary(self, scale: float = 1.0, digits: int = 3) -> Dict:
+        if not self.values:
+            return {'count': self.count}
+        values = np.fromiter(self.values, dtype=np.float64, count=len(self.values)) * scale
+        quantiles = np.percentile(values, PERCENTILES)
+        return {
+            'count': self.count,
+            'mean': round(float(values.mean()), digits),
+            **{f'p{p}': round(float(q), digits) for p, q in zip(PERCENTILES, quantiles)},
+            'max': round(float(values.max()), digits)
+        }
+
+
+class MicroBatcher:
+    """Coalesces concurrent detection requests into detect_batch calls.
+
+    `submit(rows)` queues answers and resolves once they are scored. A
+    batch holds at most `max_batch` answers and starts once the loop has
+    taken in every request already received, plus, with a `max_wait_ms`
+    budget, once the oldest queued answer has waited that long. Answers
+    arriving while a batch is scored form the next one, so batches grow
+    with concurrency even without a budget, and a lone request is never
+    held back longer than the budget. Batches are scored one at a time on
+    a worker thread, so the event loop keeps serving connections meanwhile.
+    If a batch raises, its rows are rescored one by one so the error only
+    reaches the request that caused it.
+    """
+
+    def __init__(self, detector: EduHallucinationDetector, max_batch: int = DEFAULT_MAX_BATCH,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, stats_window: int = DEFAULT_STATS_WINDOW):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.detector = detector
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        # (row, future, queued_at)
+        self.pending = deque()
+        self.batch_sizes = LatencyWindow(stats_window)
+        self.batch_seconds = LatencyWindow(stats_window)
+        self.queue_seconds = LatencyWindow(stats_window)
+        # Batch time divided by batch size
+        self.answer_seconds = LatencyWindow(stats_window)
+        self.answers = 0
+        self._wake = None
+        self._task = None
+        self._executor = None
+
+    def start(self):
+        """Start the batching task on the running event loop"""
+        self._wake = asyncio.Event()
+        # One worker: the detector and its caches are not thread-safe
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='detector')
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def submit(self, rows: List[Tuple]) -> List[Dict]:
+        """Score rows of (question, ai_response, expected_answer, question_type)"""
+        loop = asyncio.get_running_loop()
+        queued_at = time.perf_counter()
+        futures = []
+        for row in rows:
+            future = loop.create_future()
+            self.pending.append((row, future, queued_at))
+            futures.append(future)
+        self._wake.set()
+        return await asyncio.gather(*futures)
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            if not self.pending:
+                self._wake.clear()
+                continue
+            # Let requests parsed in this loop iteration join the batch
+            await asyncio.sleep(0)
+            if len(self.pending) < self.max_batch and self.max_wait > 0:
+                deadline = self.pending[0][2] + self.max_wait
+                while len(self.pending) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+
+            batch = [self.pending.popleft() for _ in range(min(self.max_batch, len(self.pending)))]
+            if not self.pending:
+                self._wake.clear()
+            await self._score(batch)
+
+    async def _score(self, batch: List[Tuple]):
+        started = time.perf_counter()
+        for _, _, queued_at in batch:
+            self.queue_seconds.add(started - queued_at)
+        rows = [row for row, _, _ in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self._executor, self._detect, rows)
+        except Exception:
+            # One bad answer must not fail the requests it was batched with:
+            # score each row alone so only its own request gets the error
+            results = await loop.run_in_executor(self._executor, self._detect_each, rows)
+
+        for (_, future, _), result in zip(batch, results):
+            # The client may have gone away
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        elapsed = time.perf_counter() - started
+        self.answers += len(batch)
+        self.batch_sizes.add(len(batch))
+        self.batch_seconds.add(elapsed)
+        self.answer_seconds.add(elapsed / len(batch))
+
+    def _detect(self, rows: List[Tuple]) -> List[Dict]:
+        scored = self.detector.detect_batch(*(list(column) for column in zip(*rows)))
+        return [{key: scored[key][i] for key in RESULT_KEYS} for i in range(len(rows))]
+
+    def _detect_each(self, rows: List[Tuple]) -> List:
+        """A result dict, or the exception raised, for each row scored alone"""
+        results = []
+        for row in rows:
+            try:
+                results.extend(self._detect([row]))
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+class DetectionServer:
+    """HTTP/JSON front end for EduHallucinationDetector.
+
+    Endpoints:
+      POST /detect        one answer: {"question", "ai_response",
+                          "expected_answer", "question_type"}
+      POST /detect_batch  {"items": [...]} -> {"results": [...]}
+      GET  /health        liveness and queue depth
+      GET  /stats         request counts, batch sizes and latency
+                          percentiles (ms) over the last `stats_window`
+
+    Each result has hallucination_detected, confidence and
+    detection_details, as detect_hallucination returns them. Pass a
+    detector built with capped caches (see bounded_detector) so memory
+    stays flat however many distinct answers arrive. Requests
+    from all connections share one MicroBatcher. Runs on asyncio with
+    HTTP/1.1 keep-alive; `start()` serves from a background thread (like
+    StubModelServer) and `serve_forever()` from the calling one.
+    """
+
+    def __init__(self, detector: EduHallucinationDetector = None, host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT, max_batch: int = DEFAULT_MAX_BATCH,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, stats_window: int = DEFAULT_STATS_WINDOW):
+        self.detector = detector or bounded_detector()
+        self.host = host
+        self.port = port
+        self.batcher = MicroBatcher(self.detector, max_batch, max_wait_ms, stats_window)
+        self.request_seconds = {path: LatencyWindow(stats_window) for path in ('/detect', '/detect_batch')}
+        self.counts = {'requests': 0, 'errors': 0, 'connections': 0}
+        self.started = time.perf_counter()
+        self._server = None
+        self._stopping = None
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def serve(self):
+        """Accept connections until stopped or cancelled"""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            async with self._server:
+                await self._stopping.wait()
+        finally:
+            await self.batcher.stop()
+
+    def serve_forever(self):
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        """Return (status, payload) for one request"""
+        path = path.split('?', 1)[0]
+        if path in ('/health', '/stats'):
+            if method != 'GET':
+                return 405, {'error': f"{path} only accepts GET"}
+            return 200, self.health() if path == '/health' else self.stats()
+        if path not in self.request_seconds:
+            return 404, {'error': f"Unknown path {path}"}
+        if method != 'POST':
+            return 405, {'error': f"{path} only accepts POST"}
+
+        started = time.perf_counter()
+        try:
+            request = json.loads(body or b"null")
+            if path == '/detect':
+                payload = (await self.batcher.submit([parse_item(request)]))[0]
+            else:
+                items = request.get('items') if isinstance(request, dict) else request
+                if not isinstance(items, list):
+                    raise RequestError('expected {"items": [...]}')
+                payload = {'results': await self.batcher.submit([parse_item(item) for item in items])}
+        except (RequestError, ValueError) as e:
+            return 400, {'error': str(e)}
+        self.request_seconds[path].add(time.perf_counter() - started)
+        return 200, payload
+
+    def health(self) -> Dict:
+        return {
+            'status': 'ok',
+            'uptime_s': round(time.perf_counter() - self.started, 3),
+            'pending': len(self.batcher.pending)
+        }
+
+    def stats(self) -> Dict:
+        batcher = self.batcher
+        stats = {
+            **self.health(),
+            **self.counts,
+            'answers': batcher.answers,
+            'batch_size': batcher.batch_sizes.summary(digits=2),
+            'latency_ms': {
+                **{path.lstrip('/'): window.summary(1000) for path, window in self.request_seconds.items()},
+                'queue_wait': batcher.queue_seconds.summary(1000),
+                'batch': batcher.batch_seconds.summary(1000),
+                'per_answer': batcher.answer_seconds.summary(1000)
+            }
+        }
+        if self.detector.memo is not None:
+            stats['detection_memo'] = self.detector.memo.summary()
+        return stats
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.counts['connections'] += 1
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = request_line.split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in header_lines:
+                    name, sep, value = line.partition(':')
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    self.counts['requests'] += 1
+                    self.counts['errors'] += 1
+                    self._respond(writer, 400, {'error': "invalid Content-Length"}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if length > MAX_BODY_BYTES:
+                    self._respond(writer, 413, {'error': "request body too large"}, keep_alive=False)
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                self.counts['requests'] += 1
+                try:
+                    status, payload = await self.handle(method, target, body)
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+                if status != 200:
+                    self.counts['errors'] += 1
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+                self._respond(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutting down with the connection idle
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool):
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data
+        )
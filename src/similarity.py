@@ -0,0 +1,404 @@
+# src/similarity.py
+import hashlib
+import json
+import os
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from src.knowledge_base import normalize_text
+
+# Hashed feature space; reference vectors take DIMENSIONS * 4 bytes each
+DIMENSIONS = 1024
+CHAR_NGRAM = 3
+
+# Response windows are this many words longer than the reference
+WINDOW_SLACK = 2
+
+# Windows scored per matrix product, bounding memory for large batches
+WINDOW_BATCH = 4096
+
+# Smallest max_rows: one response's references must fit at once
+MIN_CACHED_ROWS = 64
+
+DEFAULT_VECTOR_CACHE = "cache/reference_vectors"
+
+# Bump when the features change, so cached vectors are rebuilt
+VECTORIZER_VERSION = "1"
+
+# Left out of the features, standing in for a low IDF when none is fitted
+STOP_WORDS = frozenset("""
+a an the and or but of in on at to for from by with as is are was were be been being
+it its this that these those they them their there then than so such do does did
+has have had i you he she we his her our your which who whom what when where how
+""".split())
+
+# A response with one of these can't be a paraphrase of a reference without one
+NEGATION_WORDS = frozenset(['not', 'no', 'never', 'cannot', 'nor', 't'])
+
+# Words that say the same thing; the token-level score counts each group
+# as one concept, named by its first word
+CONCEPT_GROUPS = (
+    ('same', 'equal', 'equally', 'identical', 'equivalent', 'alike', 'both'),
+    ('more', 'greater', 'larger', 'bigger', 'higher', 'exceeds'),
+    ('less', 'fewer', 'smaller', 'lower'),
+    ('weigh', 'weighs', 'weighed', 'weight', 'mass'),
+    ('zero', 'none', 'nothing'),
+    ('infinite', 'infinitely', 'endless', 'unlimited', 'forever'),
+    ('begin', 'begins', 'began', 'start', 'starts', 'started'),
+    ('end', 'ends', 'ended', 'finish', 'finished', 'stop', 'stopped'),
+)
+CONCEPTS = {word: group[0] for group in CONCEPT_GROUPS for word in group}
+
+
+def content_words(text: str) -> List[str]:
+    """Normalized words minus stop words (all words if nothing else is left)"""
+    return drop_stop_words(normalize_text(text).split())
+
+
+def drop_stop_words(words: List[str]) -> List[str]:
+    """content_words of text that is already normalized and split"""
+    content = [word for word in words if word not in STOP_WORDS]
+    return content or words
+
+
+def negated(text: str) -> bool:
+    """Whether a text contains a negation ("not", "never", "doesn't", ...)"""
+    return not NEGATION_WORDS.isdisjoint(normalize_text(text).split())
+
+
+def concept(word: str) -> str:
+    """A word's CONCEPT_GROUPS name, or the word without a plural 's'"""
+    named = CONCEPTS.get(word)
+    if named is not None:
+        return named
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=65536)
+def _reference_concepts(text: str) -> frozenset:
+    return frozenset(concept(word) for word in content_words(text))
+
+
+def concept_overlap(concepts: Sequence[str], reference: str, size: int) -> float:
+    """Largest share of a reference's concepts found within `size` words of a response.
+
+    `concepts` are the response's content words mapped through `concept`.
+    Unlike the hashed vectors this scores synonyms ("the same" / "both",
+    "weight" / "mass") as the same token, and ignores the response's
+    extra words as long as the reference's are close together.
+    """
+    wanted = _reference_concepts(reference)
+    if not wanted or wanted.isdisjoint(concepts):
+        return 0.0
+    found = max(len(wanted.intersection(concepts[start:start + size]))
+                for start in range(max(len(concepts) - size + 1, 1)))
+    return found / len(wanted)
+
+
+def _bucket(feature: str, dimensions: int) -> int:
+    return zlib.crc32(feature.encode('utf-8')) % dimensions
+
+
+@lru_cache(maxsize=65536)
+def _word_features(word: str, dimensions: int) -> Tuple[List[int], List[float]]:
+    """Buckets and weights of a word: the word itself plus its character n-grams.
+
+    The n-grams share a total weight of 1, so long words don't dominate and
+    inflections ("kilogram" / "kilograms") still mostly overlap.
+    """
+    padded = f" {word} "
+    grams = [padded[i:i + CHAR_NGRAM] for i in range(len(padded) - CHAR_NGRAM + 1)]
+    buckets = [_bucket(f"w:{word}", dimensions)] + [_bucket(f"c:{gram}", dimensions) for gram in grams]
+    weights = [1.0] + [1.0 / len(grams)] * len(grams)
+    return buckets, weights
+
+
+@lru_cache(maxsize=65536)
+def _bigram_bucket(left: str, right: str, dimensions: int) -> int:
+    return _bucket(f"b:{left} {right}", dimensions)
+
+
+def _expand(positions: np.ndarray, spans: np.ndarray, counts: np.ndarray, bases: np.ndarray,
+            buckets: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Assign each feature to the windows it falls in.
+
+    A feature counted under word position i with span k belongs to windows
+    i - k + 1 .. i of its text (clipped to the text's `counts` windows),
+    numbered from the text's `bases` offset. Returns flat (window, bucket,
+    weight) arrays.
+    """
+    offsets = np.arange(max(int(spans.max()), 1) if len(spans) else 1)
+    windows = positions[:, None] - offsets[None, :]
+    valid = (offsets[None, :] < spans[:, None]) & (windows >= 0) & (windows < counts[:, None])
+    repeat = valid.sum(axis=1)
+    return (windows + bases[:, None])[valid], np.repeat(buckets, repeat), np.repeat(weights, repeat)
+
+
+class HashedVectorizer:
+    """Hashed word, word-bigram and character n-gram vectors (TF-IDF style).
+
+    Everything is computed locally from the text; no model or vocabulary
+    is needed. Without `fit_idf` every feature weighs the same and stop
+    words are dropped, which keeps scores independent of which answers
+    happened to be seen. Vectors are L2-normalized, so a dot product is
+    the cosine similarity.
+    """
+
+    def __init__(self, dimensions: int = DIMENSIONS):
+        self.dimensions = dimensions
+        self.idf = None
+
+    def fit_idf(self, texts: Iterable[str]) -> 'HashedVectorizer':
+        """Weight features by inverse document frequency over `texts`"""
+        df = np.zeros(self.dimensions)
+        n = 0
+        for text in texts:
+            n += 1
+            _, buckets, _, _ = self.elements(content_words(text))
+            df[np.unique(np.asarray(buckets, dtype=np.int64))] += 1
+        self.idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        return self
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the feature space, so stale cached vectors are never reused"""
+        digest = hashlib.sha1(f"{VECTORIZER_VERSION}:{self.dimensions}:{CHAR_NGRAM}".encode())
+        if self.idf is not None:
+            digest.update(self.idf.tobytes())
+        return digest.hexdigest()[:16]
+
+    def elements(self, words: Sequence[str]) -> Tuple[List[int], List[int], List[float], List[int]]:
+        """(position, bucket, weight, is_bigram) lists of every word and bigram feature.
+
+        Bigram i (words i and i+1) is counted under position i; it only
+        belongs to windows that hold both words.
+        """
+        positions, buckets, weights, bigram = [], [], [], []
+        for i, word in enumerate(words):
+            word_buckets, word_weights = _word_features(word, self.dimensions)
+            positions.extend([i] * len(word_buckets))
+            buckets.extend(word_buckets)
+            weights.extend(word_weights)
+        bigram.extend([0] * len(positions))
+        for i in range(len(words) - 1):
+            positions.append(i)
+            buckets.append(_bigram_bucket(words[i], words[i + 1], self.dimensions))
+            weights.append(1.0)
+            bigram.append(1)
+        return positions, buckets, weights, bigram
+
+    def weigh(self, buckets: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Apply the fitted IDF, if any, to feature weights"""
+        return weights if self.idf is None else weights * self.idf[buckets]
+
+    def transform(self, texts: Iterable[str]) -> np.ndarray:
+        """One normalized vector per text"""
+        texts = list(texts)
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            _, buckets, weights, _ = self.elements(content_words(text))
+            buckets = np.asarray(buckets, dtype=np.int64)
+            np.add.at(vectors[row], buckets, self.weigh(buckets, np.asarray(weights, dtype=np.float32)))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+class SemanticIndex:
+    """Reference-answer vectors plus batched similarity scoring.
+
+    Each distinct reference text is vectorized once. With a `cache_path`
+    the vectors are kept in <cache_path>.npy, memory-mapped on load so
+    large reference sets cost no RAM until used, with the texts in
+    <cache_path>.json; `save()` writes newly seen references back.
+
+    A response is compared against every window of about the reference's
+    length, so the right phrase inside a long explanation still scores
+    high. All windows of a batch are scored with one row-wise product
+    per WINDOW_BATCH windows. A pair's score is the higher of that cosine
+    and the token-level `concept_overlap`, which catches paraphrases
+    sharing few characters ("They weigh the same" / "Both weigh one
+    kilogram").
+
+    With `max_rows`, at most that many references not in the cache file
+    are kept in memory; the least recently used one's row is reused for
+    the next new reference.
+    """
+
+    def __init__(self, vectorizer: HashedVectorizer = None, cache_path: str = None, max_rows: int = None):
+        if max_rows is not None and max_rows < MIN_CACHED_ROWS:
+            raise ValueError(f"max_rows must be at least {MIN_CACHED_ROWS}")
+        self.vectorizer = vectorizer or HashedVectorizer()
+        self.cache_path = cache_path
+        self.max_rows = max_rows
+        self.rows: Dict[str, int] = {}
+        # Texts of the added rows, least recently used first (with max_rows)
+        self.recent: OrderedDict = OrderedDict()
+        self.stored = np.zeros((0, self.vectorizer.dimensions), dtype=np.float32)
+        # Vectors of references not in the cache file yet, grown by doubling
+        self.added = np.zeros((0, self.vectorizer.dimensions), dtype=np.float32)
+        self.added_count = 0
+        if cache_path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(f"{self.cache_path}.json", 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            stored = np.load(f"{self.cache_path}.npy", mmap_mode='r')
+        except (OSError, ValueError):
+            return
+        # Vectors from another feature space would give meaningless scores
+        if meta.get('fingerprint') != self.vectorizer.fingerprint or len(meta['texts']) != len(stored):
+            return
+        self.stored = stored
+        self.rows = {text: row for row, text in enumerate(meta['texts'])}
+
+    def save(self):
+        """Write every known reference vector to the cache files"""
+        if not self.cache_path or not self.added_count:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        total = len(self.rows)
+        temp = f"{self.cache_path}.tmp.npy"
+        out = np.lib.format.open_memmap(temp, mode='w+', dtype=np.float32,
+                                        shape=(total, self.vectorizer.dimensions))
+        out[:len(self.stored)] = self.stored
+        out[len(self.stored):] = self.added[:self.added_count]
+        out.flush()
+        del out
+        os.replace(temp, f"{self.cache_path}.npy")
+
+        texts = sorted(self.rows, key=self.rows.get)
+        with open(f"{self.cache_path}.json", 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.vectorizer.fingerprint, 'texts': texts}, f, ensure_ascii=False)
+
+        self.stored = np.load(f"{self.cache_path}.npy", mmap_mode='r')
+        self.added_count = 0
+        self.recent.clear()
+
+    def row(self, text: str) -> int:
+        """Row of a reference text's vector, vectorizing it on first use"""
+        row = self.rows.get(text)
+        if row is not None:
+            if self.max_rows and row >= len(self.stored):
+                self.recent.move_to_end(text)
+            return row
+
+        if self.max_rows and self.added_count >= self.max_rows:
+            # Reuse the least recently used added row
+            row = self.rows.pop(self.recent.popitem(last=False)[0])
+            self.rows[text] = row
+            self.recent[text] = None
+            self.added[row - len(self.stored)] = self.vectorizer.transform([text])[0]
+            return row
+
+        row = self.rows[text] = len(self.stored) + self.added_count
+        if self.max_rows:
+            self.recent[text] = None
+        if self.added_count == len(self.added):
+            grown = np.zeros((max(16, 2 * len(self.added)), self.vectorizer.dimensions), dtype=np.float32)
+            grown[:self.added_count] = self.added[:self.added_count]
+            self.added = grown
+        self.added[self.added_count] = self.vectorizer.transform([text])[0]
+        self.added_count += 1
+        return row
+
+    def vectors(self, rows: np.ndarray) -> np.ndarray:
+        """Reference vectors for the given rows, from the cache or new entries"""
+        out = np.empty((len(rows), self.vectorizer.dimensions), dtype=np.float32)
+        stored = rows < len(self.stored)
+        if stored.any():
+            out[stored] = self.stored[rows[stored]]
+        if not stored.all():
+            out[~stored] = self.added[rows[~stored] - len(self.stored)]
+        return out
+
+    def score(self, pairs: Sequence[Tuple[str, Sequence[str]]]) -> np.ndarray:
+        """Best cosine similarity of each response to any of its references.
+
+        `pairs` holds (response, reference texts), where the response may
+        also be given as its content words; the result holds one score per
+        pair, taken over every reference and response window.
+        Windows stay sparse: a window's dot product with the reference and
+        its squared norm are sums over its few features. Features are
+        gathered for WINDOW_BATCH windows at a time and scored with a
+        handful of NumPy reductions over flat arrays.
+        """
+        best = np.zeros(len(pairs), dtype=np.float32)
+        dimensions = self.vectorizer.dimensions
+        # Per feature
+        positions, buckets, weights, bigram, segment_of = [], [], [], [], []
+        # Per (response, reference) segment
+        sizes, counts, bases, owners, references = [], [], [], [], []
+        total = 0
+
+        def flush():
+            segments = np.asarray(segment_of, dtype=np.int64)
+            buckets_array = np.asarray(buckets, dtype=np.int64)
+            windows, feature_buckets, feature_weights = _expand(
+                np.asarray(positions, dtype=np.int64),
+                np.asarray(sizes)[segments] - np.asarray(bigram, dtype=np.int64),
+                np.asarray(counts)[segments],
+                np.asarray(bases)[segments],
+                buckets_array,
+                self.vectorizer.weigh(buckets_array, np.asarray(weights, dtype=np.float32))
+            )
+
+            # Reference row and owning pair of every window
+            window_counts = np.asarray(counts)
+            rows, local = np.unique(np.asarray(references), return_inverse=True)
+            window_reference = np.repeat(local, window_counts)
+            window_owner = np.repeat(np.asarray(owners), window_counts)
+
+            reference = self.vectors(rows)
+            dots = np.bincount(windows, feature_weights * reference[window_reference[windows], feature_buckets],
+                               minlength=total)
+            keys, inverse = np.unique(windows * dimensions + feature_buckets, return_inverse=True)
+            summed = np.bincount(inverse, feature_weights)
+            norms = np.sqrt(np.bincount(keys // dimensions, summed * summed, minlength=total))
+            scores = np.divide(dots, norms, out=np.zeros(total), where=norms > 0)
+            np.maximum.at(best, window_owner, scores.astype(np.float32))
+
+            for values in (positions, buckets, weights, bigram, segment_of,
+                           sizes, counts, bases, owners, references):
+                values.clear()
+
+        for index, (response, texts) in enumerate(pairs):
+            # Rows used since the last flush must not be reused before it
+            if self.max_rows and sizes and len(sizes) + len(texts) > self.max_rows:
+                flush()
+                total = 0
+            words = content_words(response) if isinstance(response, str) else response
+            elements = self.vectorizer.elements(words)
+            concepts = [concept(word) for word in words]
+            for text in texts:
+                size = max(1, min(len(content_words(text)) + WINDOW_SLACK, len(words)))
+                best[index] = max(best[index], concept_overlap(concepts, text, size))
+                count = max(len(words) - size + 1, 1)
+                segment_of.extend([len(sizes)] * len(elements[0]))
+                positions.extend(elements[0])
+                buckets.extend(elements[1])
+                weights.extend(elements[2])
+                bigram.extend(elements[3])
+                sizes.append(size)
+                counts.append(count)
+                bases.append(total)
+                owners.append(index)
+                references.append(self.row(text))
+                total += count
+            if total >= WINDOW_BATCH:
+                flush()
+                total = 0
+        if sizes:
+            flush()
+        return best
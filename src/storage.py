@@ -0,0 +1,166 @@
+# src/storage.py
+import json
+import os
+from typing import Dict, Iterable, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PARQUET_FILE = "results.parquet"
+RAW_RESULTS_FILE = "raw_results.json"
+
+# Low-cardinality columns stored dictionary-encoded
+DICTIONARY_COLUMNS = {'category', 'subcategory', 'difficulty', 'confidence.confidence_level'}
+
+# Rows per Parquet row group
+ROW_GROUP_SIZE = 100_000
+
+# Columns the detector reports as percent text ("37.31%"), stored as a
+# float fraction (0.3731)
+PERCENT_COLUMNS = {'calculation.error_rate'}
+
+
+def flatten_result(result: Dict) -> Dict:
+    """Flatten one result record into dotted column names.
+
+    detection_details becomes factual.similarity, confidence.markers_found,
+    calculation.error_detected and so on; a check's own nested 'details'
+    dict is merged into the check's prefix (calculation.error_rate).
+    PERCENT_COLUMNS become floats.
+    """
+    row = {}
+    for key, value in result.items():
+        if key == 'detection_details':
+            for check, check_result in (value or {}).items():
+                _flatten_into(row, check, check_result)
+        else:
+            row[key] = value
+    for column in PERCENT_COLUMNS:
+        if column in row:
+            row[column] = _fraction(row[column])
+    return row
+
+
+def _fraction(value):
+    """"37.31%" as 0.3731; numbers are kept and anything else is missing"""
+    if isinstance(value, str):
+        try:
+            return float(value.rstrip().rstrip('%')) / 100
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def _flatten_into(row: Dict, prefix: str, value):
+    if isinstance(value, dict):
+        for key, inner in value.items():
+            _flatten_into(row, prefix if key == 'details' else f"{prefix}.{key}", inner)
+    else:
+        row[prefix] = value
+
+
+def build_schema(rows: Iterable[Dict]) -> pa.Schema:
+    """Pick a stable Arrow type for every column seen in the rows"""
+    seen = {}
+    for row in rows:
+        for key, value in row.items():
+            if value is not None:
+                seen.setdefault(key, set()).add(type(value))
+            else:
+                seen.setdefault(key, set())
+
+    fields = []
+    for name, types in seen.items():
+        if name in DICTIONARY_COLUMNS:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif types and types <= {bool}:
+            arrow_type = pa.bool_()
+        elif types and types <= {int}:
+            arrow_type = pa.int64()
+        elif types and types <= {int, float}:
+            arrow_type = pa.float64()
+        elif types and types <= {list, tuple}:
+            arrow_type = pa.list_(pa.string())
+        else:
+            # Mixed or free-form values are kept as text
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def _coerce(value, arrow_type: pa.DataType):
+    if value is None:
+        return None
+    if pa.types.is_list(arrow_type):
+        return [str(v) for v in value]
+    if pa.types.is_string(arrow_type) or pa.types.is_dictionary(arrow_type):
+        if isinstance(value, str):
+            return value
+        return json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+    if pa.types.is_floating(arrow_type):
+        return float(value)
+    return value
+
+
+def results_to_table(results: Iterable[Dict], schema: pa.Schema = None) -> pa.Table:
+    """Convert result records to a typed Arrow table"""
+    rows = [flatten_result(result) for result in results]
+    schema = schema or build_schema(rows)
+    columns = [
+        pa.array([_coerce(row.get(field.name), field.type) for row in rows], type=field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def write_results_parquet(results: List[Dict], path: str):
+    """Write results as Parquet, one row group per ROW_GROUP_SIZE results"""
+    schema = build_schema(flatten_result(result) for result in results)
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for start in range(0, len(results), ROW_GROUP_SIZE):
+            writer.write_table(results_to_table(results[start:start + ROW_GROUP_SIZE], schema))
+
+
+def write_results_json(results: Iterable[Dict], path: str):
+    """Write results as raw_results.json one record at a time.
+
+    The output is byte-for-byte what json.dump(list(results), f, indent=2)
+    writes, without building the list.
+    """
+    with open(path, "w") as f:
+        separator = "[\n"
+        for result in results:
+            f.write(separator)
+            f.write("  " + json.dumps(result, indent=2).replace("\n", "\n  "))
+            separator = ",\n"
+        f.write("[]" if separator == "[\n" else "\n]")
+
+
+def write_results_csv(results: List[Dict], path: str):
+    """Write results as CSV, ROW_GROUP_SIZE rows at a time.
+
+    Columns are every key seen, in order of first appearance, as when
+    the whole list is passed to pandas.DataFrame.
+    """
+    columns = list(dict.fromkeys(key for result in results for key in result))
+    for start in range(0, max(len(results), 1), ROW_GROUP_SIZE):
+        frame = pd.DataFrame(results[start:start + ROW_GROUP_SIZE], columns=columns)
+        frame.to_csv(path, index=False, mode="w" if start == 0 else "a", header=start == 0)
+
+
+def load_results(run_dir: str, columns: List[str] = None) -> pa.Table:
+    """Load a run's results, reading only `columns` when given.
+
+    Uses the memory-mapped Parquet file when the run has one and falls
+    back to flattening raw_results.json for runs saved before it existed.
+    """
+    parquet_path = os.path.join(run_dir, PARQUET_FILE)
+    if os.path.exists(parquet_path):
+        return pq.read_table(parquet_path, columns=columns, memory_map=True)
+
+    with open(os.path.join(run_dir, RAW_RESULTS_FILE), "r") as f:
+        table = results_to_table(json.load(f))
+    return table.select(columns) if columns else table
@@ -0,0 +1,141 @@
+# src/stub_server.py
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+
+
+class StubModelServer:
+    """Local HTTP server that stands in for the OpenAI Responses API.
+
+    Point a client at `base_url` (or set OPENAI_BASE_URL) to run the
+    dataset runners without network access or API cost. Answers come from
+    `answers` (question text -> answer) or from `answer_fn(prompt)`, and
+    every request waits `latency` seconds to mimic a real model. The first
+    `throttle_first` requests get a 429 with a Retry-After header so retry
+    handling can be exercised.
+    """
+
+    def __init__(self, answers: Dict[str, str] = None,
+                 answer_fn: Callable[[str], str] = None,
+                 latency: float = 0.0, throttle_first: int = 0,
+                 retry_after: float = 0.05,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.answers = answers or {}
+        self.answer_fn = answer_fn
+        self.latency = latency
+        self.throttle_first = throttle_first
+        self.retry_after = retry_after
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def answer(self, prompt: str) -> str:
+        """Pick the canned answer for a prompt"""
+        if self.answer_fn:
+            return self.answer_fn(prompt)
+        for question, answer in self.answers.items():
+            if prompt.startswith(question):
+                return f"The answer is {answer}."
+        return "I don't know."
+
+    def handle(self, path: str, body: Dict):
+        """Return (status, headers, payload) for one API request"""
+        with self._lock:
+            self.request_count += 1
+            throttled = self.request_count <= self.throttle_first
+
+        if throttled:
+            headers = {"retry-after-ms": str(int(self.retry_after * 1000))}
+            return 429, headers, {"error": {"message": "Rate limit reached (stub)", "type": "requests"}}
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if path.endswith("/responses"):
+            prompt = body.get("input", "")
+            if not isinstance(prompt, str):
+                prompt = json.dumps(prompt)
+            return 200, {}, _responses_payload(body.get("model", "stub"), prompt, self.answer(prompt))
+
+        return 404, {}, {"error": {"message": f"Unknown path {path}"}}
+
+
+def _responses_payload(model: str, prompt: str, text: str) -> Dict:
+    input_tokens = len(prompt.split())
+    output_tokens = len(text.split())
+    return {
+        "id": "resp_stub",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": "msg_stub",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": text, "annotations": []}]
+        }],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens
+        }
+    }
+
+
+def _make_handler(server: StubModelServer):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            status, headers, payload = server.handle(self.path, body)
+
+            data = json.dumps(payload).encode()
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                # Client cancelled the request (e.g. an early-stopped sample)
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
@@ -0,0 +1,218 @@
+# src/telemetry.py
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# Latency percentiles reported per stage
+PERCENTILES = (50, 95, 99)
+
+EXPORT_FORMATS = ('prometheus', 'chrome-trace')
+
+# Prometheus metric names are prefixed with this
+METRIC_PREFIX = "eduguard"
+
+# Durations are counted in log-spaced buckets, this many per decade, so
+# percentiles are within about 1.2% and memory doesn't grow with the run
+BUCKETS_PER_DECADE = 100
+# Shorter durations are counted in the bucket of this one
+MIN_DURATION = 1e-7
+
+
+class DurationHistogram:
+    """Count, sum, extremes and log-bucketed counts of one span's durations"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        # bucket number -> durations counted in it; only used buckets are stored
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        bucket = math.floor(math.log10(max(seconds, MIN_DURATION)) * BUCKETS_PER_DECADE)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentiles(self, percentiles: Iterable[float]) -> List[float]:
+        """Estimated percentiles: the middle of the bucket holding each rank"""
+        if not self.count:
+            return [0.0 for _ in percentiles]
+        keys = sorted(self.buckets)
+        cumulative = np.cumsum([self.buckets[key] for key in keys])
+        estimates = []
+        for p in percentiles:
+            # Same rank as np.percentile's default (linear) method
+            position = int(np.searchsorted(cumulative, p / 100 * (self.count - 1), side='right'))
+            middle = 10 ** ((keys[position] + 0.5) / BUCKETS_PER_DECADE)
+            estimates.append(min(max(middle, self.min), self.max))
+        return estimates
+
+
+class Telemetry:
+    """Timing spans, token counts and question throughput for one run.
+
+    Wrap work in `with telemetry.span('model_call'):` (also fine around
+    awaits) or report a measured duration with `record`. `summary()` gives
+    count / total / mean and p50/p95/p99 per span name, plus questions and
+    tokens per second over the run. Durations go into a fixed-size
+    histogram per span name, so long runs don't hold every measurement.
+    With `trace=True` every span is kept so the run can be written out as
+    a Chrome trace.
+    """
+
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        self.started = time.perf_counter()
+        self.durations: Dict[str, DurationHistogram] = {}
+        self.events: List[tuple] = []
+        self.questions = 0
+        self.tokens = {'input': 0, 'output': 0}
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed block under `name`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started, started)
+
+    def record(self, name: str, seconds: float, started: float = None):
+        """Add one measured duration; `started` is a perf_counter timestamp"""
+        with self._lock:
+            histogram = self.durations.get(name)
+            if histogram is None:
+                histogram = self.durations[name] = DurationHistogram()
+            histogram.add(seconds)
+            if self.trace:
+                start = started if started is not None else time.perf_counter() - seconds
+                self.events.append((name, start, seconds, self._lane()))
+
+    def add_usage(self, usage):
+        """Count the tokens of one API response's usage block"""
+        if usage is None:
+            return
+        with self._lock:
+            self.tokens['input'] += getattr(usage, 'input_tokens', 0) or 0
+            self.tokens['output'] += getattr(usage, 'output_tokens', 0) or 0
+
+    def count_question(self):
+        with self._lock:
+            self.questions += 1
+
+    def _lane(self) -> int:
+        """Small stable id of the current asyncio task (or thread) for trace rows"""
+        try:
+            owner = id(asyncio.current_task())
+        except RuntimeError:
+            owner = threading.get_ident()
+        return self._lanes.setdefault(owner, len(self._lanes) + 1)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def stage_summary(self) -> Dict[str, Dict]:
+        stages = {}
+        for name, histogram in self.durations.items():
+            quantiles = histogram.percentiles(PERCENTILES)
+            stages[name] = {
+                'count': histogram.count,
+                'total_s': round(histogram.total, 6),
+                'mean_s': round(histogram.mean, 6),
+                **{f'p{p}_s': round(q, 6) for p, q in zip(PERCENTILES, quantiles)},
+                'max_s': round(histogram.max, 6)
+            }
+        return stages
+
+    def summary(self) -> Dict:
+        """Per-stage latency percentiles and run-level throughput"""
+        elapsed = self.elapsed
+        total_tokens = self.tokens['input'] + self.tokens['output']
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'questions': self.questions,
+            'questions_per_s': round(self.questions / elapsed, 3) if elapsed > 0 else 0,
+            'tokens': {**self.tokens, 'total': total_tokens},
+            'tokens_per_s': round(total_tokens / elapsed, 2) if elapsed > 0 else 0,
+            'output_tokens_per_s': round(self.tokens['output'] / elapsed, 2) if elapsed > 0 else 0,
+            'stages': self.stage_summary()
+        }
+
+    def to_prometheus(self) -> str:
+        """The summary in Prometheus text exposition format"""
+        lines = [
+            f"# HELP {METRIC_PREFIX}_stage_seconds Time spent per run stage",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds summary"
+        ]
+        for name, histogram in self.durations.items():
+            for p, q in zip(PERCENTILES, histogram.percentiles(PERCENTILES)):
+                lines.append(f'{METRIC_PREFIX}_stage_seconds{{stage="{name}",quantile="{p / 100}"}} {q:.6f}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{name}"}} {histogram.total:.6f}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_questions_total Questions completed",
+            f"# TYPE {METRIC_PREFIX}_questions_total counter",
+            f"{METRIC_PREFIX}_questions_total {self.questions}",
+            f"# HELP {METRIC_PREFIX}_tokens_total API tokens used",
+            f"# TYPE {METRIC_PREFIX}_tokens_total counter"
+        ]
+        for kind, count in self.tokens.items():
+            lines.append(f'{METRIC_PREFIX}_tokens_total{{kind="{kind}"}} {count}')
+        lines += [
+            f"# HELP {METRIC_PREFIX}_run_seconds Wall time of the run so far",
+            f"# TYPE {METRIC_PREFIX}_run_seconds gauge",
+            f"{METRIC_PREFIX}_run_seconds {self.elapsed:.3f}"
+        ]
+        return "\n".join(lines) + "\n"
+
+    def to_chrome_trace(self) -> Dict:
+        """Recorded spans as Chrome trace events (load in chrome://tracing or Perfetto)"""
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {
+                    'name': name,
+                    'ph': 'X',
+                    'ts': round((start - self.started) * 1e6, 1),
+                    'dur': round(seconds * 1e6, 1),
+                    'pid': pid,
+                    'tid': lane
+                }
+                for name, start, seconds, lane in self.events
+            ],
+            'displayTimeUnit': 'ms'
+        }
+
+    def export(self, directory: str, formats, prefix: str = "") -> List[str]:
+        """Write <prefix>metrics.prom and/or <prefix>trace.json into `directory`"""
+        paths = []
+        if 'prometheus' in formats:
+            path = os.path.join(directory, f"{prefix}metrics.prom")
+            with open(path, "w") as f:
+                f.write(self.to_prometheus())
+            paths.append(path)
+        if 'chrome-trace' in formats:
+            path = os.path.join(directory, f"{prefix}trace.json")
+            with open(path, "w") as f:
+                json.dump(self.to_chrome_trace(), f)
+            paths.append(path)
+        return paths
@@ -0,0 +1,61 @@
+# tests/test_aggregation.py
+import random
+
+import pandas as pd
+
+from src.aggregation import GROUP_FIELDS, HallucinationAggregator
+
+
+def random_results(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            'category': rng.choice(['mathematics', 'history', 'science']),
+            'subcategory': rng.choice(['arithmetic', 'dates', 'physics', 'chemistry']),
+            'difficulty': rng.choice(['easy', 'medium', 'hard']),
+            'hallucination_detected': rng.random() < 0.3
+        }
+        for _ in range(n)
+    ]
+
+
+def pandas_summary(results):
+    """The per-group statistics the way analyze_results computed them with pandas"""
+    df = pd.DataFrame(results)
+    stats = {}
+    for section, field in GROUP_FIELDS.items():
+        stats[section] = {}
+        for value in df[field].unique():
+            group = df[df[field] == value]
+            hits = int(group['hallucination_detected'].sum())
+            stats[section][value] = {'total': len(group), 'hallucinations': hits,
+                                     'rate': round(hits / len(group) * 100, 2)}
+    return stats
+
+
+def test_streamed_counts_match_the_pandas_summary():
+    results = random_results(500)
+    summary = HallucinationAggregator.from_results(results).summary()
+    expected = pandas_summary(results)
+
+    hits = sum(result['hallucination_detected'] for result in results)
+    assert summary['overall'] == {'total_questions': 500, 'total_hallucinations': hits,
+                                  'hallucination_rate': round(hits / 500 * 100, 2)}
+    for section in GROUP_FIELDS:
+        assert summary[section] == expected[section]
+        # Groups stay in order of first appearance
+        assert list(summary[section]) == list(expected[section])
+
+
+def test_errored_results_count_towards_totals_only():
+    aggregator = HallucinationAggregator()
+    aggregator.add({'category': 'history', 'hallucination_detected': True})
+    aggregator.add({'category': 'history', 'hallucination_detected': None, 'error': True})
+    assert aggregator.hallucination_rate == 50.0
+    assert aggregator.summary()['by_category']['history'] == {'total': 2, 'hallucinations': 1, 'rate': 50.0}
+
+
+def test_empty_aggregator():
+    summary = HallucinationAggregator().summary()
+    assert summary['overall'] == {'total_questions': 0, 'total_hallucinations': 0, 'hallucination_rate': 0}
+    assert summary['by_category'] == {}
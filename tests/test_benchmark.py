@@ -0,0 +1,47 @@
+# tests/test_benchmark.py
+import json
+
+from src.benchmark import (CONSISTENCY_SAMPLES, benchmark_detector, compare_to_baseline,
+                           synthetic_corpus, time_best)
+
+DATASET = {"categories": {
+    "mathematics": {"arithmetic": [{"q": "What is 6 times 7?", "a": 42, "difficulty": "easy"}]},
+    "geography": {"capitals": [{"q": "What is the capital of France?", "a": "Paris"}]}
+}}
+
+
+def test_synthetic_corpus_is_seeded():
+    corpus = synthetic_corpus(DATASET, 50, seed=3)
+    assert corpus == synthetic_corpus(DATASET, 50, seed=3)
+    assert corpus != synthetic_corpus(DATASET, 50, seed=4)
+    assert len({row["question"] for row in corpus}) == 50
+    assert all(len(row["samples"]) == CONSISTENCY_SAMPLES for row in corpus)
+    assert {row["difficulty"] for row in corpus} == {"easy", "medium"}
+    # Roughly WRONG_ANSWER_RATE of the answers are wrong
+    assert any(row["expected_answer"] not in row["ai_answer"] for row in corpus)
+
+
+def test_detector_benchmarks_measure_every_stage():
+    results = benchmark_detector(synthetic_corpus(DATASET, 20), repeats=1)
+    assert set(results) == {
+        'detect_hallucination', 'detect_batch', 'check_calculation', 'analyze_confidence', 'verify_facts',
+        'check_consistency', 'aggregation', 'write_json', 'write_csv', 'write_parquet'
+    }
+    assert results['detect_batch']['items'] == 20
+    assert all(result['items_per_s'] > 0 for result in results.values())
+    json.dumps(results)
+
+
+def test_only_drops_beyond_the_threshold_are_regressions():
+    baseline = {'fast': {'items_per_s': 100.0}, 'slow': {'items_per_s': 100.0},
+                'gone': {'items_per_s': 100.0}, 'unmeasured': {'items_per_s': None}}
+    current = {'fast': {'items_per_s': 85.0}, 'slow': {'items_per_s': 70.0}, 'unmeasured': {'items_per_s': 5.0}}
+    assert compare_to_baseline(current, baseline, threshold=0.2) == [
+        {'benchmark': 'slow', 'baseline_items_per_s': 100.0, 'items_per_s': 70.0, 'change': -0.3}
+    ]
+
+
+def test_time_best_runs_setup_before_each_repeat():
+    calls = []
+    time_best(lambda: calls.append('run'), repeats=2, setup=lambda: calls.append('setup'))
+    assert calls == ['setup', 'run', 'setup', 'run']
@@ -0,0 +1,101 @@
+# tests/test_cache.py
+import asyncio
+import time
+
+import pytest
+
+from src.cache import CacheMiss, ResponseCache
+
+
+class Model:
+    """Counts calls and answers with the call number"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"answer {self.calls}"
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "responses.sqlite")
+
+
+def test_readwrite_serves_hits_and_keys_on_every_input(path):
+    cache = ResponseCache(path)
+    model = Model()
+    assert cache.fetch("m", "prompt", model) == "answer 1"
+    assert cache.fetch("m", "prompt", model) == "answer 1"
+    assert cache.fetch("other", "prompt", model) == "answer 2"
+    assert cache.fetch("m", "prompt", model, temperature=0.5) == "answer 3"
+    assert cache.stats == {'hits': 1, 'misses': 3, 'writes': 3, 'evictions': 0}
+
+
+def test_answers_persist_and_replay_needs_no_model(path):
+    writer = ResponseCache(path)
+    writer.fetch("m", "prompt", Model())
+    writer.close()
+
+    replay = ResponseCache(path, mode='replay')
+    model = Model()
+    assert replay.fetch("m", "prompt", model) == "answer 1"
+    with pytest.raises(CacheMiss):
+        replay.fetch("m", "another prompt", model)
+    assert model.calls == 0
+
+
+def test_refresh_always_calls_and_overwrites(path):
+    cache = ResponseCache(path)
+    cache.fetch("m", "prompt", lambda: "old")
+    refresh = ResponseCache(path, mode='refresh')
+    assert refresh.fetch("m", "prompt", lambda: "new") == "new"
+    assert ResponseCache(path).fetch("m", "prompt", Model()) == "new"
+
+
+def test_off_never_stores(tmp_path):
+    cache = ResponseCache(str(tmp_path / "unused.sqlite"), mode='off')
+    model = Model()
+    cache.fetch("m", "prompt", model)
+    cache.fetch("m", "prompt", model)
+    assert model.calls == 2
+    assert not (tmp_path / "unused.sqlite").exists()
+
+
+def test_async_fetch_shares_entries_with_fetch(path):
+    cache = ResponseCache(path)
+    cache.fetch("m", "prompt", lambda: "cached")
+
+    async def call():
+        raise AssertionError("should be served from the cache")
+
+    assert asyncio.run(cache.fetch_async("m", "prompt", call)) == "cached"
+
+
+def test_least_recently_used_entries_are_evicted_over_max_bytes(path):
+    cache = ResponseCache(path, max_bytes=250)
+    for n in range(3):
+        cache.put(cache.make_key("m", f"p{n}"), "m", "x" * 100)
+        time.sleep(0.01)
+    cache.get(cache.make_key("m", "p0"))
+    cache.evict()
+
+    assert cache.get(cache.make_key("m", "p1")) is None
+    assert cache.get(cache.make_key("m", "p0")) is not None
+    assert cache.stats['evictions'] == 1
+
+
+def test_expired_entries_are_misses(path):
+    cache = ResponseCache(path, max_age_days=1)
+    key = cache.make_key("m", "prompt")
+    cache.put(key, "m", "stale")
+    cache._conn.execute("UPDATE responses SET created_at = ?", (time.time() - 2 * 86400,))
+    assert cache.get(key) is None
+    cache.evict()
+    assert cache.stats['evictions'] == 1
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        ResponseCache(mode='sometimes')
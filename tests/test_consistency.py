@@ -0,0 +1,69 @@
+# tests/test_consistency.py
+import asyncio
+
+from src.analyzers import answers_agree, cluster_answers, extract_answer
+from src.detector import EduHallucinationDetector
+
+
+def test_answers_agree():
+    assert answers_agree(extract_answer("The answer is **12**."), extract_answer("12.0"))
+    assert not answers_agree(extract_answer("12"), extract_answer("13"))
+    assert answers_agree(extract_answer("Paris is the capital"), extract_answer("the capital is Paris"))
+    assert not answers_agree(extract_answer("12"), extract_answer("twelve"))
+
+
+def test_the_last_bold_span_is_the_answer():
+    assert extract_answer("First 3, then 4, so **7**").value == 7
+    assert extract_answer("**Paris**, not Lyon") == frozenset(["paris"])
+
+
+def test_clusters_are_largest_first():
+    clusters = cluster_answers(["It is 42.", "13", "**42**", "42.0 exactly", "13.0"])
+    assert [cluster['members'] for cluster in clusters] == [[0, 2, 3], [1, 4]]
+    assert clusters[0]['answer'] == "It is 42."
+
+
+def test_check_consistency_reports_agreement_and_settling():
+    detector = EduHallucinationDetector(agreement_threshold=0.6)
+    consistent = detector.check_consistency(["42", "42", "41"])
+    assert consistent['agreement'] == 0.6667 and consistent['n_clusters'] == 2
+    assert consistent['majority_answer'] == "42" and not consistent['likely_hallucination']
+
+    # 3 of 5 planned samples agree: already settled whatever the other two say
+    assert detector.check_consistency(["7", "7", "7"], total_samples=5)['settled']
+    # 1/1 agrees now, but four more samples could still split
+    assert not detector.check_consistency(["7"], total_samples=5)['settled']
+    assert detector.check_consistency(["1", "2", "3"])['likely_hallucination']
+    assert detector.check_consistency([])['likely_hallucination'] is False
+
+
+def test_sampling_stops_once_the_verdict_is_settled():
+    detector = EduHallucinationDetector()
+    calls = []
+
+    async def sample(prompt, index):
+        calls.append(index)
+        await asyncio.sleep(0.01 * index)
+        return "The answer is 42."
+
+    result = asyncio.run(detector.sample_consistency("prompt", sample, n_samples=10, parallel=3))
+    assert result['stopped_early'] and result['agreement'] == 1.0
+    assert result['n_samples'] < 10 and len(calls) < 10
+
+
+def test_disagreeing_samples_use_every_sample_in_parallel():
+    detector = EduHallucinationDetector()
+    running = peak = 0
+
+    async def sample(prompt, index):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return f"The answer is {index % 2}."
+
+    result = asyncio.run(detector.sample_consistency("prompt", sample, n_samples=5, parallel=3))
+    assert peak == 3
+    assert result['n_samples'] == 5 and not result['stopped_early']
+    assert result['agreement'] == 0.6 and result['n_clusters'] == 2
@@ -0,0 +1,80 @@
+# tests/test_dataset_loader.py
+import json
+
+import pytest
+
+from src import dataset_loader
+from src.dataset_loader import DatasetSource, parse_shard, read_metadata, shard_of
+from src.question_generators import generate_questions, write_sharded_dataset
+
+
+def test_shard_directory_reads_only_the_manifest_shards(tmp_path):
+    write_sharded_dataset(25, str(tmp_path), seed=3, shard_size=10)
+    # Results written next to the dataset are not questions
+    (tmp_path / "results.jsonl").write_text('{"not": "a question"}\n')
+
+    source = DatasetSource(str(tmp_path))
+    items = list(source)
+
+    assert source.total == 25
+    assert [data["q"] for data, _, _ in items] == [q["q"] for q in generate_questions(25, seed=3)]
+
+
+def test_nested_json_is_streamed_with_filters(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_loader, 'READ_SIZE', 16)
+    dataset = {
+        "metadata": {"total_questions": 4},
+        "categories": {
+            "mathematics": {
+                "arithmetic": [{"q": "What is 2 + 2?", "a": 4, "difficulty": "easy"},
+                               {"q": "What is 1e3 × 2?", "a": 2000.5}],
+                "algebra": []
+            },
+            "history": {"dates": [{"q": "When did WWII end?", "a": "1945", "difficulty": "hard"},
+                                  {"q": 'Who was the first "emperor" of Rome?', "a": "Augustus"}]}
+        }
+    }
+    path = tmp_path / "dataset.json"
+    path.write_text(json.dumps(dataset, indent=1))
+
+    items = list(DatasetSource(str(path)))
+    assert [(data["q"], category, subcategory) for data, category, subcategory in items] == [
+        (data["q"], category, subcategory)
+        for category, subcategories in dataset["categories"].items()
+        for subcategory, questions in subcategories.items()
+        for data in questions
+    ]
+    assert items[1][0]["a"] == 2000.5
+    assert read_metadata(str(path)) == {"total_questions": 4}
+    assert DatasetSource(str(path)).total == 4
+
+    assert [data["q"] for data, _, _ in DatasetSource(str(path), categories=["history"])] == [
+        "When did WWII end?", 'Who was the first "emperor" of Rome?'
+    ]
+    assert [data["a"] for data, _, _ in DatasetSource(str(path), difficulties=["medium"])] == [2000.5, "Augustus"]
+    assert DatasetSource(str(path), subcategories=["dates"]).total is None
+
+
+def test_shards_split_a_dataset_without_overlap(tmp_path):
+    write_sharded_dataset(300, str(tmp_path), seed=1, shard_size=100)
+    everything = [data["q"] for data, _, _ in DatasetSource(str(tmp_path))]
+    shards = [[data["q"] for data, _, _ in DatasetSource(str(tmp_path), shard=(i, 3))] for i in range(3)]
+
+    assert sorted(q for shard in shards for q in shard) == sorted(everything)
+    assert all(shard for shard in shards)
+    assert shard_of("mathematics", "arithmetic", everything[0], 3) in range(3)
+
+
+@pytest.mark.parametrize("spec", ["3/3", "-1/2", "1", "a/b", "0/0"])
+def test_bad_shard_specs(spec):
+    with pytest.raises(ValueError):
+        parse_shard(spec)
+
+
+def test_glob_of_jsonl_files(tmp_path):
+    for n in range(2):
+        (tmp_path / f"part{n}.jsonl").write_text(json.dumps(
+            {"q": f"Question {n}?", "a": n, "category": "c", "subcategory": "s"}
+        ) + "\n\n")
+    assert [data["q"] for data, _, _ in DatasetSource(str(tmp_path / "part*.jsonl"))] == ["Question 0?", "Question 1?"]
+    assert parse_shard("1/4") == (1, 4)
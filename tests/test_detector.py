@@ -0,0 +1,41 @@
+# tests/test_detector.py
+from src.detector import EduHallucinationDetector
+from src.pipeline import DetectionStage
+
+ROWS = [
+    ("What is 6 times 7?", "The answer is 41.", "42", "calculation"),
+    ("What is 6 times 7?", "The answer is 41.", "42", "calculation"),
+    ("What is the capital of France?", "It is Paris.", "Paris", "geography"),
+    ("Who wrote Hamlet?", "I am absolutely certain it was Marlowe.", "Shakespeare", "literature")
+]
+
+
+def test_batch_matches_single_calls():
+    detector = EduHallucinationDetector()
+    batch = detector.detect_batch(*(list(column) for column in zip(*ROWS)))
+    for i, row in enumerate(ROWS):
+        single = EduHallucinationDetector().detect_hallucination(*row)
+        assert batch['hallucination_detected'][i] == single.hallucination_detected
+        assert batch['confidence'][i] == single.confidence
+        assert batch['detection_details'][i] == single.detection_details
+
+
+def test_repeated_rows_get_their_own_details():
+    batch = EduHallucinationDetector().detect_batch(*(list(column) for column in zip(*ROWS[:2])))
+    first, second = batch['detection_details']
+    assert first == second
+    assert first is not second
+    first['calculation']['details'].clear()
+    assert second['calculation']['details']
+
+
+def test_stages_reading_the_question_see_every_row():
+    detector = EduHallucinationDetector()
+    detector.register_detector(DetectionStage(
+        'question_check', lambda ctx: {'flagged': "Marlowe" in ctx.question}, 'question', flag_key='flagged'
+    ))
+    rows = [(f"Who wrote {author}'s plays?", "It was Shakespeare.", "Shakespeare", "literature")
+            for author in ("Shakespeare", "Marlowe")]
+    batch = detector.detect_batch(*(list(column) for column in zip(*rows)))
+    assert batch['hallucination_detected'] == [False, True]
+    assert [details['question'] for details in batch['detection_details']] == [{'flagged': False}, {'flagged': True}]
@@ -0,0 +1,93 @@
+# tests/test_evaluation.py
+import numpy as np
+import pytest
+
+from src.evaluation import (bootstrap_counts, classification_metrics, confidence_intervals, confusion_matrix,
+                            detection_scores, evaluate, pr_curve, roc_curve)
+
+rng = np.random.default_rng(7)
+EXPECTED = rng.random(400) < 0.4
+DETECTED = np.where(rng.random(400) < 0.8, EXPECTED, ~EXPECTED)
+CONFIDENCE = np.round(rng.random(400), 1)
+
+
+def loop_metrics(expected, detected):
+    tp = sum(e and d for e, d in zip(expected, detected))
+    fp = sum(d and not e for e, d in zip(expected, detected))
+    fn = sum(e and not d for e, d in zip(expected, detected))
+    tn = len(expected) - tp - fp - fn
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return (tn, fp, fn, tp), {'accuracy': (tp + tn) / len(expected), 'precision': precision,
+                              'recall': recall, 'f1': f1}
+
+
+def test_metrics_match_a_plain_loop():
+    cells, expected_metrics = loop_metrics(EXPECTED.tolist(), DETECTED.tolist())
+    counts = confusion_matrix(EXPECTED, DETECTED)
+    assert tuple(counts.ravel()) == cells
+    metrics = classification_metrics(counts.ravel())
+    for name, value in expected_metrics.items():
+        assert metrics[name] == pytest.approx(value)
+
+
+def test_ratios_without_a_denominator_are_zero():
+    metrics = classification_metrics([[5, 0, 0, 0], [0, 0, 0, 0]])
+    assert metrics['precision'].tolist() == [0.0, 0.0]
+    assert metrics['accuracy'].tolist() == [1.0, 0.0]
+
+
+def test_auc_is_the_chance_a_hallucination_outscores_a_correct_answer():
+    scores = detection_scores(DETECTED, CONFIDENCE)
+    positives, negatives = scores[EXPECTED], scores[~EXPECTED]
+    pairwise = ((positives[:, None] > negatives[None, :]).mean()
+                + 0.5 * (positives[:, None] == negatives[None, :]).mean())
+    assert roc_curve(EXPECTED, scores)['auc'] == pytest.approx(pairwise)
+
+
+def test_average_precision_sums_precision_over_recall_steps():
+    scores = detection_scores(DETECTED, CONFIDENCE)
+    thresholds = sorted(set(scores.tolist()), reverse=True)
+    total = 0.0
+    previous_recall = 0.0
+    for threshold in thresholds:
+        flagged = scores >= threshold
+        tp = (flagged & EXPECTED).sum()
+        recall = tp / EXPECTED.sum()
+        total += (recall - previous_recall) * tp / flagged.sum()
+        previous_recall = recall
+    curve = pr_curve(EXPECTED, scores)
+    assert curve['average_precision'] == pytest.approx(total)
+    assert list(curve['thresholds']) == thresholds
+
+
+def test_curves_with_one_class_have_no_area():
+    assert roc_curve([True, True], [0.5, 0.9])['auc'] is None
+    assert pr_curve([False, False], [0.5, 0.9])['average_precision'] is None
+    assert roc_curve([], [])['auc'] is None
+
+
+def test_multinomial_bootstrap_matches_resampling_items():
+    counts = confusion_matrix(EXPECTED, DETECTED).ravel()
+    resampled = bootstrap_counts(counts, resamples=2000, seed=1)
+    assert resampled.shape == (2000, 4) and (resampled.sum(axis=1) == 400).all()
+    assert np.array_equal(resampled, bootstrap_counts(counts, resamples=2000, seed=1))
+
+    items = np.random.default_rng(2).integers(0, 400, size=(2000, 400))
+    by_index = np.stack([confusion_matrix(EXPECTED[rows], DETECTED[rows]).ravel() for rows in items])
+    intervals = confidence_intervals(counts, resamples=2000, seed=1)
+    for name, values in classification_metrics(by_index).items():
+        low, high = np.quantile(values, [0.025, 0.975])
+        assert intervals[name] == pytest.approx([low, high], abs=0.02)
+
+
+def test_evaluate_reports_overall_groups_and_curves():
+    groups = np.where(np.arange(400) % 3 == 0, 'history', 'mathematics')
+    report = evaluate(EXPECTED, DETECTED, CONFIDENCE, {'by_category': groups}, resamples=200)
+    overall = report['overall']
+    assert overall['total'] == 400
+    assert overall['ci']['accuracy'][0] <= overall['accuracy'] <= overall['ci']['accuracy'][1]
+    assert list(report['by_category']) == ['history', 'mathematics']
+    assert sum(group['total'] for group in report['by_category'].values()) == 400
+    assert 0 < report['roc']['auc'] <= 1 and report['pr']['average_precision'] > 0
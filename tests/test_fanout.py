@@ -0,0 +1,56 @@
+# tests/test_fanout.py
+import pytest
+
+from src.fanout import FanOutRunner, results_table
+from src.providers import StubProvider
+from src.question_bank import QuestionIndex
+
+QUESTIONS = [({"q": f"What is {n} plus {n}?", "a": str(2 * n)}, "mathematics", "arithmetic") for n in range(1, 5)]
+
+
+def test_fanout_runs_every_model_and_shares_bank_ids():
+    bank = QuestionIndex.from_bank([
+        {"id": "bank-7", "q": "Which river is the longest river in the whole of Africa?", "a": "Nile"}
+    ])
+    questions = [
+        ({"q": "Which river is the longest river in the whole of Africa today?", "a": "Nile"}, "geography", "rivers"),
+        *QUESTIONS
+    ]
+    answers = {data["q"]: data["a"] for data, _, _ in questions}
+    providers = [
+        StubProvider("right", answers=answers, latency=0.02),
+        StubProvider("unsure", latency=0.01),
+        StubProvider("wrong", answer_fn=lambda prompt: "The answer is 0.")
+    ]
+
+    runner = FanOutRunner(providers, questions=bank)
+    rows = runner.run(questions)
+
+    assert len(rows) == len(questions) * len(providers)
+    assert [row["model"] for row in rows[:3]] == ["stub:right", "stub:unsure", "stub:wrong"]
+    assert {row["question_id"] for row in rows[:3]} == {"bank-7"}
+    table = results_table(rows)
+    assert table.index.is_unique
+    summary = runner.summary()
+    assert summary["stub:right"]["overall"]["hallucination_rate"] == 0
+    assert summary["stub:wrong"]["overall"]["hallucination_rate"] == 100
+    assert all(provider.request_count == len(questions) for provider in providers)
+
+
+def test_fanout_rejects_duplicate_models():
+    with pytest.raises(ValueError):
+        FanOutRunner([StubProvider("m"), StubProvider("m")])
+
+
+def test_fanout_resolves_reworded_questions_before_querying():
+    questions = [
+        ({"q": "Which river is the longest river in the whole of Africa?", "a": "Nile"}, "geography", "rivers"),
+        ({"q": "Which river is the longest river in the whole of Africa today?", "a": "Nile"}, "geography", "rivers"),
+        *QUESTIONS
+    ]
+    runner = FanOutRunner([StubProvider("m")])
+    rows = runner.run(questions)
+
+    ids = [row["question_id"] for row in rows]
+    assert ids[0] == ids[1]
+    assert len(set(ids[2:])) == len(QUESTIONS) and ids[0] not in ids[2:]
@@ -0,0 +1,84 @@
+# tests/test_journal.py
+import contextlib
+import io
+import json
+
+import pytest
+
+from src.dataset_loader import DatasetSource
+from src.journal import RunJournal, result_key
+from src.rate_limit import RateLimiter
+from src.stub_server import StubModelServer
+
+QUESTIONS = [
+    {"q": f"What is {n} plus {n}?", "a": str(2 * n), "category": "mathematics", "subcategory": "arithmetic"}
+    for n in range(1, 7)
+]
+
+
+def record(n, **fields):
+    question = QUESTIONS[n]
+    return {"category": question["category"], "subcategory": question["subcategory"],
+            "difficulty": "medium", "question": question["q"], "expected_answer": question["a"], **fields}
+
+
+def test_torn_final_line_is_dropped_and_appends_continue(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = RunJournal(str(path), fsync='always')
+    journal.append(record(0, ai_answer="2"))
+    journal.append(record(1, ai_answer="4"))
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"category": "mathem')
+
+    journal = RunJournal(str(path))
+    assert [r["ai_answer"] for r in journal.load()] == ["2", "4"]
+    journal.append(record(2, ai_answer="6"))
+    journal.close()
+    assert [result_key(r)[2] for r in RunJournal(str(path)).load()] == [q["q"] for q in QUESTIONS[:3]]
+
+    journal.remove()
+    assert not path.exists()
+    assert journal.load() == []
+
+
+def test_unknown_fsync_policy(tmp_path):
+    with pytest.raises(ValueError):
+        RunJournal(str(tmp_path / "journal.jsonl"), fsync='sometimes')
+
+
+def test_resumed_run_only_asks_unanswered_and_errored_questions(tmp_path):
+    from openai import AsyncOpenAI
+    from run_test_dataset import DatasetTester
+
+    dataset_path = tmp_path / "questions.jsonl"
+    dataset_path.write_text("".join(json.dumps(q) + "\n" for q in QUESTIONS), encoding="utf-8")
+    results_dir = tmp_path / "results"
+    journal = RunJournal(str(results_dir / "journal_resumed.jsonl"))
+    journal.append(record(0, ai_answer="The answer is 2.", hallucination_detected=False, latency_s=0.1))
+    journal.append(record(1, ai_answer="ERROR: timeout", error=True, latency_s=0.1))
+    journal.append(record(2, ai_answer="The answer is 7.", hallucination_detected=True, latency_s=0.1))
+    journal.close()
+
+    with StubModelServer(answer_fn=lambda prompt: "The answer is 4.") as server:
+        tester = DatasetTester(
+            client=AsyncOpenAI(base_url=server.base_url, api_key="stub", max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1e9, tokens_per_minute=1e12),
+            dataset=DatasetSource(str(dataset_path)),
+            results_dir=str(results_dir),
+            vector_cache=str(tmp_path / "reference_vectors"),
+            run_id="resumed"
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            tester.run_tests()
+
+    assert server.request_count == len(QUESTIONS) - 2
+    results = list(tester.all_results)
+    assert [result["question"] for result in results] == [q["q"] for q in QUESTIONS]
+    assert [result["ai_answer"] for result in results[:3]] == [
+        "The answer is 2.", "The answer is 4.", "The answer is 7."
+    ]
+    assert tester.aggregator.summary()["overall"]["total_questions"] == len(QUESTIONS)
+    # The finished run's results are saved and its journal removed
+    assert (results_dir / "run_resumed" / "raw_results.json").exists()
+    assert not (results_dir / "journal_resumed.jsonl").exists()
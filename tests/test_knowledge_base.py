@@ -0,0 +1,59 @@
+# tests/test_knowledge_base.py
+import pytest
+
+from src.knowledge_base import AnswerIndex
+from src.pipeline import PreparedResponse
+
+
+def verify(index, answer, response, **tolerances):
+    prepared = PreparedResponse(response)
+    matched, _ = index.verify(index.get(answer), prepared.normalized, prepared.numbers,
+                              response_lower=prepared.lower, **tolerances)
+    return matched
+
+
+@pytest.mark.parametrize("answer, response", [
+    ("Paris", "The capital of France is Paris."),
+    ("Nile or Amazon", "It is the Amazon."),
+    ("42", "The answer is 42."),
+    ("Apollo 11", "Apollo 11 landed first."),
+    ("5 minutes", "It takes about 5 minutes."),
+    ("1450s", "Around 1455.")
+])
+def test_matching_responses(answer, response):
+    assert verify(AnswerIndex(), answer, response)
+
+
+@pytest.mark.parametrize("answer, response", [
+    ("Paris", "The capital of France is Lyon."),
+    ("42", "The answer is 41."),
+    ("Apollo 11", "Apollo 13 launched on 11 April."),
+    ("5 minutes", "5 hours, give or take a few minutes."),
+    ("1450s", "Around 1465.")
+])
+def test_mismatching_responses(answer, response):
+    assert not verify(AnswerIndex(), answer, response)
+
+
+def test_tolerances_are_passed_through():
+    index = AnswerIndex()
+    assert not verify(index, "100", "About 101.")
+    assert verify(index, "100", "About 101.", abs_tol=1)
+    assert verify(index, "Apollo 100", "apollo 101", rel_tol=0.01)
+
+
+def test_aliases():
+    index = AnswerIndex(aliases={"United States": ["USA", "America"]})
+    assert verify(index, "United States", "It was the USA.")
+
+
+def test_max_answers_keeps_the_most_recently_used():
+    index = AnswerIndex(max_answers=3)
+    for answer in "abcdab":
+        index.get(answer)
+    assert list(index.answers) == ["d", "a", "b"]
+
+
+def test_max_answers_must_be_positive():
+    with pytest.raises(ValueError):
+        AnswerIndex(max_answers=0)
@@ -0,0 +1,62 @@
+# tests/test_markers.py
+import pytest
+
+from src.analyzers import MarkerMatcher, load_lexicon
+from src.detector import EduHallucinationDetector
+
+LEXICONS = {
+    'high': ['definitely', 'without a doubt', 'exactly'],
+    'low': ['about', 'I think', 'I think so', 'might be', 'e.g.', '']
+}
+
+
+@pytest.fixture
+def matcher():
+    return MarkerMatcher(LEXICONS)
+
+
+def test_markers_respect_word_boundaries(matcher):
+    assert matcher.find("Take the roundabout, it's definitely-ish quick") == {'high': ['definitely'], 'low': []}
+    assert matcher.find("Exactlyish; abouts") == {'high': [], 'low': []}
+
+
+def test_case_and_whitespace_runs_are_ignored(matcher):
+    found = matcher.find("WITHOUT  a\n\tdoubt it MIGHT BE so")
+    assert found == {'high': ['without a doubt'], 'low': ['might be']}
+
+
+def test_nested_markers_are_all_found_in_lexicon_order(matcher):
+    found = matcher.find("I think so. Exactly about that, I think. Definitely.")
+    assert found == {'high': ['definitely', 'exactly'], 'low': ['about', 'I think', 'I think so']}
+
+
+def test_markers_ending_in_punctuation(matcher):
+    assert matcher.find("Some fruits, e.g. apples")['low'] == ['e.g.']
+
+
+def test_batch_agrees_with_single_texts(matcher):
+    texts = ["I think so", "", "nothing here", "Definitely\x00about", "about\nabout"]
+    found = matcher.find_batch(texts)
+    assert found[1] is None and found[2] is None
+    for text, batch in zip(texts, found):
+        if batch is not None:
+            assert batch == matcher.find(text)
+
+
+def test_empty_lexicons_match_nothing():
+    assert MarkerMatcher({'high': [], 'low': []}).find("definitely") == {'high': [], 'low': []}
+
+
+def test_load_lexicon_skips_comments_and_blank_lines(tmp_path):
+    path = tmp_path / "markers.txt"
+    path.write_text("# hedges\nperhaps\n\n  as of now  # dated\n")
+    assert load_lexicon(str(path)) == ['perhaps', 'as of now']
+
+
+def test_low_confidence_outranks_high():
+    detector = EduHallucinationDetector()
+    assert detector.analyze_confidence("It is definitely about 5") == {
+        'confidence_level': 'low', 'markers_found': ['definitely', 'about']
+    }
+    assert detector.analyze_confidence("Certainly 5")['confidence_level'] == 'high'
+    assert detector.analyze_confidence("5") == {'confidence_level': 'neutral', 'markers_found': []}
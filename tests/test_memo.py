@@ -0,0 +1,63 @@
+# tests/test_memo.py
+import pytest
+
+from src.detector import EduHallucinationDetector
+from src.memo import DetectionMemo, memo_key, normalize_response
+
+
+def test_paired_emphasis_is_stripped():
+    assert normalize_response("9876 - 5432 = **4444**") == "9876 - 5432 = 4444"
+    assert normalize_response("*italic* and `code` and __bold__") == "italic and code and bold"
+
+
+def test_operators_are_kept():
+    assert normalize_response("6*7 = 42") == "6*7 = 42"
+    assert normalize_response("2 * 3 * 4 = 24") == "2 * 3 * 4 = 24"
+    assert normalize_response("a*b and c*d") == "a*b and c*d"
+    assert normalize_response("call snake_case_name") == "call snake_case_name"
+
+
+def test_product_and_digits_get_different_keys():
+    assert memo_key("v", "q1", "42", None, "6*7 = 42") != memo_key("v", "q1", "42", None, "67 = 42")
+
+
+def test_memo_does_not_reuse_a_verdict_across_operators():
+    detector = EduHallucinationDetector(memo=DetectionMemo())
+    first = detector.detect_hallucination("What is 6 times 7?", "6*7 = 42", "42", "calculation")
+    second = detector.detect_hallucination("What is 6 times 7?", "67 = 42", "42", "calculation")
+    assert not first.hallucination_detected
+    assert detector.memo.stats['hits'] == 0
+    assert second.detection_details == EduHallucinationDetector().detect_hallucination(
+        "What is 6 times 7?", "67 = 42", "42", "calculation").detection_details
+
+
+def test_memo_hit_returns_a_fresh_copy():
+    memo = DetectionMemo()
+    memo.put("k", (True, 0.9, {'calculation': {'error_detected': True}}))
+    memo.get("k")[2]['calculation']['error_detected'] = False
+    assert memo.get("k")[2]['calculation']['error_detected'] is True
+
+
+@pytest.mark.parametrize("first, second", [
+    ("The total is **1**,000", "The total is 1,000"),
+    ("The total is 1,000", "The total is **1**,000")
+])
+def test_responses_sharing_a_key_share_a_verdict_in_either_order(first, second):
+    question, expected = "What is 10 times 100?", "1000"
+    detector = EduHallucinationDetector(memo=DetectionMemo())
+    verdicts = [detector.detect_hallucination(question, response, expected, "calculation")
+                for response in (first, second)]
+    assert detector.memo.stats['hits'] == 1
+    fresh = [EduHallucinationDetector().detect_hallucination(question, response, expected, "calculation")
+             for response in (first, second)]
+    for verdict, unmemoized in zip(verdicts, fresh):
+        assert verdict.hallucination_detected is unmemoized.hallucination_detected is False
+        assert verdict.detection_details == unmemoized.detection_details
+
+
+def test_batch_scores_the_normalized_text():
+    rows = [("What is 10 times 100?", response, "1000", "calculation")
+            for response in ("The total is **1**,000", "The total is 1,000")]
+    batch = EduHallucinationDetector().detect_batch(*(list(column) for column in zip(*rows)))
+    assert batch['hallucination_detected'] == [False, False]
+    assert batch['ai_response'] == [row[1] for row in rows]
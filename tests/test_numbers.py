@@ -0,0 +1,78 @@
+# tests/test_numbers.py
+import math
+
+import pytest
+
+from src.analyzers import compare_numbers, compare_numbers_batch, extract_numbers, numbers_match
+from src.detector import EduHallucinationDetector
+
+
+def number(text):
+    return extract_numbers(text)[0]
+
+
+@pytest.mark.parametrize("expected, found", [
+    ("42", "42"),
+    ("42", "42.0"),
+    ("1,000", "1000"),
+    ("3.14", "3.14"),
+    ("3.14", "3.141")
+])
+def test_matches_to_the_expected_precision(expected, found):
+    assert numbers_match(number(expected), number(found))
+
+
+@pytest.mark.parametrize("expected, found", [
+    ("0.3", "0"),
+    ("2.5", "3"),
+    ("295.693", "296"),
+    ("42", "41")
+])
+def test_coarser_responses_do_not_match(expected, found):
+    assert not numbers_match(number(expected), number(found))
+
+
+def test_tolerances_widen_the_match():
+    assert numbers_match(number("100"), number("101"), abs_tol=1)
+    assert numbers_match(number("100"), number("101"), rel_tol=0.01)
+    assert not numbers_match(number("100"), number("102"), abs_tol=1)
+
+
+def test_batch_agrees_with_single_rows():
+    found = [extract_numbers(text) for text in ("41", "It is 42.", "", "2.5 or 3", "0")]
+    expected = [extract_numbers(text) for text in ("42", "42", "42", "3", "0.3")]
+    batch = compare_numbers_batch(found, expected)
+    for i in range(len(found)):
+        single = compare_numbers(found[i], expected[i])
+        assert bool(batch['matched'][i]) == single['matched']
+        assert batch['found_index'][i] == single['found_index']
+        assert batch['expected_index'][i] == single['expected_index']
+        for key in ('difference', 'error_rate'):
+            assert (math.isnan(single[key]) and math.isnan(batch[key][i])) or batch[key][i] == pytest.approx(single[key])
+
+
+
+@pytest.mark.parametrize("text", ["1e999", "5 × 10^400", "2.5 x 10**999", "0e400"])
+def test_out_of_range_exponents_do_not_raise(text):
+    token = number(text)
+    assert math.isinf(token.resolution)
+
+
+def test_non_finite_numbers_never_match():
+    huge = number("1e999")
+    assert math.isinf(huge.value)
+    assert not numbers_match(huge, number("42"))
+    assert not numbers_match(huge, huge)
+    assert not numbers_match(number("0 × 10^400"), number("7"))
+    batch = compare_numbers_batch([[number("42")], [huge], [number("7")]],
+                                  [[huge], [number("42")], [number("0 × 10^400")]])
+    assert not batch['matched'].any()
+
+
+def test_overflowing_responses_are_scored():
+    detector = EduHallucinationDetector()
+    rows = [("What is 6 times 7?", response, expected, "calculation")
+            for response, expected in [("It is 1e999.", "42"), ("5 × 10^400", "42"), ("42", "1e999")]]
+    for row in rows:
+        assert detector.detect_hallucination(*row).hallucination_detected
+    assert detector.detect_batch(*(list(column) for column in zip(*rows)))['hallucination_detected'] == [True] * 3
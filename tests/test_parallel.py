@@ -0,0 +1,52 @@
+# tests/test_parallel.py
+import pandas as pd
+import pytest
+
+from src.detector import EduHallucinationDetector
+from src.memo import DetectionMemo
+from src.parallel import ParallelScorer
+
+ROWS = [
+    (f"What is {n} times 7?", f"The answer is {n * 7 + (n % 3 == 0)}.", str(n * 7), "calculation")
+    for n in range(1, 24)
+] + [
+    ("What is the capital of France?", "Paris, I think.", "Paris", "geography"),
+    ("Who wrote Hamlet?", "Marlowe.", "Shakespeare", "literature")
+]
+
+
+def columns(rows):
+    return [list(column) for column in zip(*rows)]
+
+
+@pytest.fixture(scope="module")
+def expected():
+    return EduHallucinationDetector().detect_batch(*columns(ROWS))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_chunks_come_back_in_input_order(expected, workers):
+    with ParallelScorer(workers=workers, chunk_size=4) as scorer:
+        scored = scorer.score(*columns(ROWS))
+    assert scored == expected
+
+
+def test_memo_is_shared_across_chunks_and_workers(expected):
+    memo = DetectionMemo()
+    with ParallelScorer(workers=2, chunk_size=5, memo=memo) as scorer:
+        first = scorer.score(*columns(ROWS))
+        again = scorer.score(*columns(ROWS))
+    assert first == again == expected
+    assert memo.stats['hits'] == len(ROWS)
+
+
+def test_dataframe_input_and_detector_options():
+    frame = pd.DataFrame(ROWS[:3], columns=['question', 'ai_response', 'expected_answer', 'question_type'])
+    with ParallelScorer(workers=1, detector_options={'rel_tol': 0.5}) as scorer:
+        scored = scorer.score(frame)
+    assert scored['hallucination_detected'] == [False, False, False]
+
+
+def test_chunk_size_must_be_positive():
+    with pytest.raises(ValueError):
+        ParallelScorer(chunk_size=0)
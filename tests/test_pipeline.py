@@ -0,0 +1,82 @@
+# tests/test_pipeline.py
+from src.detector import EduHallucinationDetector
+from src.pipeline import DetectionBatch, DetectionStage, PreparedBatch, run_stages_batch
+from src.telemetry import Telemetry
+
+WRONG_PRODUCT = ("What is 6 times 7?", "I think it is 41.", "42", "calculation")
+
+
+def columns(rows):
+    return [list(column) for column in zip(*rows)]
+
+
+def test_builtin_stages_run_in_registration_order():
+    detector = EduHallucinationDetector()
+    assert list(detector.detection_methods) == [
+        'calculation_check', 'consistency_check', 'confidence_analysis', 'factual_verification'
+    ]
+    details = detector.detect_hallucination(*WRONG_PRODUCT).detection_details
+    assert list(details) == ['calculation', 'confidence', 'factual']
+
+
+def test_stages_are_routed_by_type_expected_answer_and_samples():
+    detector = EduHallucinationDetector()
+    no_expected = detector.detect_hallucination("What is 6 times 7?", "41", None, "calculation")
+    assert 'factual' not in no_expected.detection_details
+    other_type = detector.detect_hallucination("Who wrote Hamlet?", "Shakespeare", "Shakespeare", "literature")
+    assert 'calculation' not in other_type.detection_details
+    sampled = detector.detect_hallucination("Who wrote Hamlet?", "Shakespeare", "Shakespeare", "literature",
+                                            samples=["Marlowe", "Bacon", "Shakespeare"])
+    assert sampled.detection_details['consistency']['likely_hallucination']
+    assert sampled.hallucination_detected
+
+
+def test_short_circuit_stops_after_a_decisive_flag():
+    full = EduHallucinationDetector().detect_hallucination(*WRONG_PRODUCT)
+    short = EduHallucinationDetector(short_circuit=True).detect_hallucination(*WRONG_PRODUCT)
+    assert full.hallucination_detected and short.hallucination_detected
+    assert full.confidence == short.confidence
+    assert list(short.detection_details) == ['calculation']
+    batch = EduHallucinationDetector(short_circuit=True).detect_batch(*columns([WRONG_PRODUCT]))
+    assert list(batch['detection_details'][0]) == ['calculation']
+
+
+def test_registered_stage_flags_with_its_own_confidence():
+    detector = EduHallucinationDetector()
+    fingerprint = detector.fingerprint
+    detector.register_detector(DetectionStage(
+        'length_check', lambda ctx: {'too_long': len(ctx.response.text) > 20, 'score': 0.9},
+        'length', flag_key='too_long', confidence_key='score', question_types=['geography']
+    ), before='confidence_analysis')
+
+    assert list(detector.detection_methods)[2] == 'length_check'
+    assert detector.fingerprint != fingerprint
+    detection = detector.detect_hallucination("Capital of France?", "Paris, which is on the Seine.", "Paris",
+                                              "geography")
+    assert detection.hallucination_detected and detection.confidence == 0.9
+    assert list(detection.detection_details) == ['length', 'confidence', 'factual']
+
+
+def test_batch_check_gets_only_the_rows_it_applies_to():
+    seen = []
+
+    def batch_check(batch, rows):
+        seen.append(list(rows))
+        return [{'flagged': batch.expected[i] == "Paris"} for i in rows]
+
+    stage = DetectionStage('paris', None, 'paris', flag_key='flagged', requires_expected=True,
+                           batch_check=batch_check)
+    batch = DetectionBatch(["q"] * 3, PreparedBatch(["a", "b", "c"]), ["Paris", None, "Rome"], [None] * 3)
+    verdicts = run_stages_batch([stage], batch)
+    assert seen == [[0, 2]]
+    assert [detected for detected, _, _ in verdicts] == [True, False, False]
+    assert verdicts[1][2] == {}
+
+
+def test_telemetry_times_each_stage():
+    telemetry = Telemetry()
+    detector = EduHallucinationDetector()
+    detector.telemetry = telemetry
+    detector.detect_hallucination(*WRONG_PRODUCT)
+    assert {'detect.calculation_check', 'detect.confidence_analysis',
+            'detect.factual_verification'} <= set(telemetry.durations)
@@ -0,0 +1,69 @@
+# tests/test_question_bank.py
+from src.question_bank import QuestionIndex
+
+
+def test_resolve_matches_near_duplicates_added_along_the_way():
+    index = QuestionIndex()
+    first = index.resolve("Which river is the longest river in the whole of Africa?", "Nile")
+    for n in range(200):
+        index.resolve(f"What is {n} times {n + 1}?", str(n * (n + 1)))
+
+    assert index.resolve("Which river is the longest river in the whole of Africa today?", "Nile") == first
+    assert index.resolve("What is 7 times 8?", "56") == index.resolve("What is 7 times 8?", "56")
+    assert index.lookup("What is 7 times 9?") is None
+
+
+def test_lookup_only_merges_when_answers_agree():
+    index = QuestionIndex()
+    index.add({'q': "In which year did the First World War begin in Europe?", 'a': "1914"})
+
+    assert index.lookup("In which year did the First World War begin in Europe exactly?", "1914") == 0
+    assert index.lookup("In which year did the First World War begin in Europe exactly?", "1939") is None
+
+
+def test_near_duplicates_come_from_shared_buckets():
+    index = QuestionIndex()
+    index.extend([
+        {'q': "Which river is the longest river in the whole of Africa?", 'a': "Nile"},
+        {'q': "What is 156 times 234?", 'a': "36504"},
+        {'q': "Which river is the longest river in the whole of Africa today?", 'a': "Nile"},
+        {'q': "What is 156 times 235?", 'a': "36660"},
+    ])
+
+    assert [(i, j) for i, j, _ in index.near_duplicates()] == [(0, 2)]
+    assert sorted(map(sorted, index.clusters())) == [[0, 2], [1], [3]]
+
+
+def test_merge_keeps_the_highest_priority_variant_and_flags_disagreements():
+    index = QuestionIndex()
+    index.extend([
+        {'source': 'dataset', 'q': "Which river is the longest river in the whole of Africa?", 'a': "Nile",
+         'category': 'geography', 'difficulty': 'easy'},
+        {'source': 'dataset', 'q': "What is the capital of Australia?", 'a': "Canberra", 'category': 'geography'},
+        {'source': 'scripts', 'q': "what is the CAPITAL of Australia", 'a': "Sydney"},
+        {'source': 'scripts', 'q': "Which river is the longest river in the whole of Africa today?", 'a': "The Nile"},
+        {'source': 'scripts', 'q': "In which year did the First World War begin?", 'a': "1914"},
+        {'source': 'scripts', 'q': "In which year did the Second World War begin?", 'a': "1939"},
+    ])
+
+    assert index.exact_duplicates() == [[1, 2]]
+    bank = index.merge()
+    assert [len(entry['sources']) for entry in bank] == [2, 2, 1, 1]
+
+    river, capital = bank[0], bank[1]
+    assert river['q'] == "Which river is the longest river in the whole of Africa?"
+    assert river['difficulty'] == 'easy' and river['answers_agree']
+    assert [source['a'] for source in river['sources']] == ["Nile", "The Nile"]
+    # Exact duplicates merge even when their answers don't agree, which is reported
+    assert capital['a'] == "Canberra" and not capital['answers_agree']
+    assert len({entry['id'] for entry in bank}) == 4
+
+
+def test_bank_lookups_use_the_bank_id_for_every_variant():
+    entries = [{'id': 'q-river', 'q': "Which river is the longest river in the whole of Africa?", 'a': "Nile",
+                'sources': [{'q': "Which river is the longest river in the whole of Africa?", 'a': "Nile"},
+                            {'q': "Longest river in Africa?", 'a': "Nile"}]}]
+    index = QuestionIndex.from_bank(entries)
+    assert index.resolve("longest river in africa", "Nile") == 'q-river'
+    assert index.resolve("Which river is the longest river in the whole of Africa today?", "Nile") == 'q-river'
+    assert index.resolve("Which river is the longest river in the whole of Europe?", "Volga") != 'q-river'
@@ -0,0 +1,79 @@
+# tests/test_question_generators.py
+import json
+import os
+import re
+from fractions import Fraction
+
+from src.question_generators import (BLOCK_SIZE, MANIFEST_FILE, format_number, generate_questions,
+                                     shard_name, write_sharded_dataset)
+
+
+def read_shards(output_dir, manifest):
+    questions = []
+    for shard in manifest["shards"]:
+        with open(os.path.join(output_dir, shard["file"]), encoding="utf-8") as f:
+            questions.extend(json.loads(line) for line in f)
+    return questions
+
+
+def test_same_seed_same_questions_and_slices_start_anywhere():
+    stream = list(generate_questions(BLOCK_SIZE + 20, seed=5))
+    assert stream == list(generate_questions(BLOCK_SIZE + 20, seed=5))
+    assert stream != list(generate_questions(BLOCK_SIZE + 20, seed=6))
+    # A slice crossing a block boundary is the same part of the stream
+    assert list(generate_questions(30, seed=5, start=BLOCK_SIZE - 10)) == stream[BLOCK_SIZE - 10:BLOCK_SIZE + 20]
+
+
+def test_generated_answers_are_correct():
+    operations = {'+': lambda a, b: a + b, '-': lambda a, b: a - b, '×': lambda a, b: a * b,
+                  '÷': lambda a, b: Fraction(a, b), '^': lambda a, b: a ** b}
+    checked = 0
+    for question in generate_questions(2000, seed=1):
+        arithmetic = re.fullmatch(r"What is (\d+) ?([-+×÷^]) ?(\d+)\?", question["q"])
+        linear = re.fullmatch(r"Solve for x: (\d+)x ([-+]) (\d+) = (-?\d+)", question["q"])
+        if arithmetic:
+            a, operator, b = arithmetic.groups()
+            assert operations[operator](int(a), int(b)) == question["a"], question
+        elif linear:
+            a, sign, b, total = linear.groups()
+            b = int(b) if sign == '+' else -int(b)
+            assert int(a) * question["a"] + b == int(total), question
+        else:
+            continue
+        checked += 1
+    assert checked > 500
+
+
+def test_format_number():
+    assert format_number(Fraction(42)) == 42
+    assert format_number(Fraction("12.50")) == "12.5"
+    assert format_number(Fraction(1, 3)) == "1/3 or 0.333"
+
+
+def test_parallel_shards_match_serial_and_the_manifest(tmp_path):
+    serial = write_sharded_dataset(250, str(tmp_path / "serial"), seed=2, shard_size=100)
+    parallel = write_sharded_dataset(250, str(tmp_path / "parallel"), seed=2, shard_size=100, workers=2)
+
+    assert serial["shards"] == parallel["shards"] == [
+        {"file": shard_name(0), "questions": 100}, {"file": shard_name(1), "questions": 100},
+        {"file": shard_name(2), "questions": 50}
+    ]
+    assert serial["counts"] == parallel["counts"]
+    questions = read_shards(str(tmp_path / "serial"), serial)
+    assert questions == read_shards(str(tmp_path / "parallel"), parallel)
+    assert questions == list(generate_questions(250, seed=2))
+    assert sum(n for by_sub in serial["counts"].values() for n in by_sub.values()) == 250
+    assert serial["metadata"]["total_questions"] == 250
+
+
+def test_rewriting_a_smaller_dataset_removes_stale_shards(tmp_path):
+    output_dir = str(tmp_path)
+    write_sharded_dataset(25, output_dir, shard_size=10)
+    assert os.path.exists(os.path.join(output_dir, shard_name(2)))
+    with open(os.path.join(output_dir, "notes.txt"), "w") as f:
+        f.write("kept")
+
+    manifest = write_sharded_dataset(8, output_dir, shard_size=10)
+
+    assert sorted(os.listdir(output_dir)) == [MANIFEST_FILE, "notes.txt", shard_name(0)]
+    assert manifest["shards"] == [{"file": shard_name(0), "questions": 8}]
@@ -0,0 +1,109 @@
+# tests/test_rate_limit.py
+import asyncio
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+from src import rate_limit
+from src.rate_limit import RateLimiter, TokenBucket, estimate_tokens
+
+
+class ApiError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Seconds passed to time.sleep, instead of sleeping"""
+    slept = []
+    monkeypatch.setattr(rate_limit.time, 'sleep', slept.append)
+    return slept
+
+
+def failing(errors, result="ok"):
+    """A function raising each of `errors` in turn, then returning `result`"""
+    errors = list(errors)
+
+    def call():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return call
+
+
+def test_bucket_waits_for_debt_to_refill():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    assert bucket.reserve(60, now) == 0
+    assert bucket.reserve(2, now) == pytest.approx(2.0)
+    # Three seconds later the debt of 2 is paid and one more token has refilled
+    assert bucket.reserve(1, now + 3) == 0
+    bucket.adjust(-100)
+    assert bucket.level == 60
+
+
+def test_token_bucket_throttles_estimated_tokens(sleeps):
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=600)
+    limiter.call(lambda: "first", estimated_tokens=600)
+    limiter.call(lambda: "second", estimated_tokens=60)
+    assert sleeps[0] == 0
+    assert sleeps[1] == pytest.approx(6.0, abs=0.1)
+
+
+def test_retry_after_header_sets_the_delay_and_pauses_other_callers(sleeps):
+    limiter = RateLimiter()
+    assert limiter.call(failing([ApiError(429, {'retry-after': '7'})])) == "ok"
+
+    assert sleeps[1] == 7.0
+    assert limiter.stats['rate_limited'] == 1 and limiter.stats['retries'] == 1
+    # The next request waits out the pause too
+    limiter.call(lambda: None)
+    assert sleeps[-1] == pytest.approx(7.0, abs=0.5)
+
+
+def test_backoff_is_capped_and_final_errors_are_raised(sleeps):
+    limiter = RateLimiter(max_retries=3, base_delay=10, max_delay=15)
+    with pytest.raises(ApiError):
+        limiter.call(failing([ApiError(503)] * 4))
+    backoffs = sleeps[1::2]
+    assert len(backoffs) == 3 and all(0 <= delay <= 15 for delay in backoffs)
+    assert limiter.stats['errors'] == 1
+
+    with pytest.raises(ApiError):
+        limiter.call(failing([ApiError(400)]))
+    assert limiter.stats['retries'] == 3
+
+
+def test_connection_errors_are_retried_in_async_calls(monkeypatch):
+    async def no_sleep(seconds):
+        pass
+    monkeypatch.setattr(rate_limit.asyncio, 'sleep', no_sleep)
+    errors = [ConnectionError(), type('APITimeoutError', (Exception,), {})()]
+
+    async def call():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    limiter = RateLimiter(base_delay=0)
+    assert asyncio.run(limiter.call_async(call)) == "ok"
+    assert limiter.stats['retries'] == 2
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({'retry-after-ms': '1500'}, 1.5),
+    ({'retry-after': '3'}, 3.0),
+    ({'retry-after': formatdate(0, usegmt=True)}, 0.0),
+    ({'retry-after': 'soon'}, None),
+    ({}, None)
+])
+def test_retry_after_forms(headers, expected):
+    assert rate_limit._retry_after(ApiError(429, headers)) == expected
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("x" * 400) == 100 + rate_limit.DEFAULT_COMPLETION_TOKENS
@@ -0,0 +1,37 @@
+# tests/test_records.py
+import json
+from collections.abc import MutableMapping
+
+import pytest
+
+from src.detector import EduHallucinationDetector
+
+ROW = ("What is 6 times 7?", "The answer is 41.", "42", "calculation")
+
+
+def test_detection_is_a_mapping_of_the_result_fields():
+    detection = EduHallucinationDetector().detect_hallucination(*ROW)
+    assert isinstance(detection, MutableMapping)
+    assert set(detection) == {'question', 'ai_response', 'expected_answer',
+                              'hallucination_detected', 'confidence', 'detection_details'}
+    assert detection['confidence'] == detection.confidence
+    assert dict(detection)['hallucination_detected'] is True
+
+
+def test_detection_can_be_updated_like_the_old_result_dict():
+    detection = EduHallucinationDetector().detect_hallucination(*ROW)
+    detection['hallucination_detected'] = False
+    detection['model'] = 'gpt-4.1'
+    detection.update(reviewed=True)
+
+    assert detection.hallucination_detected is False
+    assert detection['model'] == 'gpt-4.1' and len(detection) == 8
+    encoded = json.loads(json.dumps(detection.to_dict()))
+    assert encoded['reviewed'] is True and encoded['hallucination_detected'] is False
+
+    del detection['model']
+    assert 'model' not in detection
+    with pytest.raises(KeyError):
+        del detection['model']
+    with pytest.raises(TypeError):
+        del detection['confidence']
@@ -0,0 +1,61 @@
+# tests/test_replay.py
+import io
+import json
+
+from src.memo import DetectionMemo
+from src.replay import find_sources, replay
+from src.storage import RAW_RESULTS_FILE, write_results_json
+
+
+def dataset_result(question, expected, answer, stored, **fields):
+    return {"category": "mathematics", "subcategory": "calculation", "difficulty": "easy",
+            "question": question, "expected_answer": expected, "ai_answer": answer,
+            "hallucination_detected": stored, **fields}
+
+
+def write_archive(root):
+    run_dir = root / "run_1"
+    run_dir.mkdir(parents=True)
+    write_results_json([
+        dataset_result("What is 6 times 7?", "42", "The answer is 42.", False),
+        # The stored verdict is wrong either way round
+        dataset_result("What is 6 times 8?", "48", "The answer is 47.", False),
+        dataset_result("What is 6 times 9?", "54", "The answer is 54.", True),
+        dataset_result("What is 7 times 7?", "49", "ERROR: timeout", None, error=True),
+    ], str(run_dir / RAW_RESULTS_FILE))
+
+    with open(root / "hallucination_test_1.json", "w") as f:
+        json.dump({"detailed_results": [
+            {"question": "What is the capital of France?", "expected": "Paris", "type": "geography",
+             "ai_answer": "Paris.", "is_correct": True},
+            {"question": "Who wrote Hamlet?", "expected": "Shakespeare", "type": "literature",
+             "ai_answer": "Christopher Marlowe."}
+        ]}, f)
+    (root / "notes.json").write_text("{}")
+    return run_dir
+
+
+def test_find_sources_lists_runs_and_old_result_files(tmp_path):
+    run_dir = write_archive(tmp_path)
+    assert find_sources([str(tmp_path)]) == [str(tmp_path / "hallucination_test_1.json"), str(run_dir)]
+
+
+def test_replay_counts_and_diffs_changed_verdicts(tmp_path):
+    run_dir = write_archive(tmp_path)
+    sources = find_sources([str(tmp_path)])
+    diff = io.StringIO()
+    summary = replay(sources, diff, workers=1, chunk_size=2, memo=DetectionMemo())
+
+    assert summary[str(run_dir)] == {
+        'total': 4, 'skipped': 1, 'unjudged': 0,
+        'stored_hallucinations': 1, 'replayed_hallucinations': 1,
+        'new_hallucinations': 1, 'cleared_hallucinations': 1
+    }
+    old_file = summary[str(tmp_path / "hallucination_test_1.json")]
+    assert old_file['total'] == 2 and old_file['unjudged'] == 1 and old_file['replayed_hallucinations'] == 1
+
+    changes = [json.loads(line) for line in diff.getvalue().splitlines()]
+    assert [(change['question'], change['replayed_hallucination']) for change in changes] == [
+        ("What is 6 times 8?", True), ("What is 6 times 9?", False)
+    ]
+    assert changes[0]['replayed_details']['calculation']['error_detected']
@@ -0,0 +1,71 @@
+# tests/test_runner.py
+import contextlib
+import io
+import json
+import threading
+import time
+
+from src.dataset_loader import DatasetSource
+from src.rate_limit import RateLimiter
+from src.stub_server import StubModelServer
+
+QUESTIONS = [
+    {"q": f"What is {n} plus {n}?", "a": str(2 * n), "category": "mathematics", "subcategory": "arithmetic"}
+    for n in range(1, 13)
+]
+
+
+class InFlight:
+    """Answers like a model after `latency` seconds, recording peak concurrency"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt: str) -> str:
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        time.sleep(self.latency)
+        with self._lock:
+            self.current -= 1
+        question = next(q for q in QUESTIONS if prompt.startswith(q["q"]))
+        # Every third answer is wrong
+        n = int(question["a"])
+        return f"The answer is {n + 1 if n % 3 == 0 else n}."
+
+
+def test_dataset_tester_queries_concurrently_against_the_stub(tmp_path):
+    # Imported here so the other tests don't need the SDK
+    from openai import AsyncOpenAI
+    from run_test_dataset import DatasetTester
+
+    dataset_path = tmp_path / "questions.jsonl"
+    dataset_path.write_text("".join(json.dumps(q) + "\n" for q in QUESTIONS), encoding="utf-8")
+    model = InFlight(latency=0.1)
+
+    with StubModelServer(answer_fn=model, throttle_first=2, retry_after=0.01) as server:
+        tester = DatasetTester(
+            concurrency=4,
+            client=AsyncOpenAI(base_url=server.base_url, api_key="stub", max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1e9, tokens_per_minute=1e12, base_delay=0.01),
+            dataset=DatasetSource(str(dataset_path)),
+            results_dir=str(tmp_path / "results"),
+            vector_cache=str(tmp_path / "reference_vectors")
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            tester.run_tests()
+
+    assert 1 < model.peak <= 4
+    # Throttled requests were retried rather than recorded as errors
+    assert server.request_count == len(QUESTIONS) + 2
+    results = list(tester.all_results)
+    assert [result["question"] for result in results] == [q["q"] for q in QUESTIONS]
+    assert not any(result.get("error") for result in results)
+    assert [result["hallucination_detected"] for result in results] == [
+        int(q["a"]) % 3 == 0 for q in QUESTIONS
+    ]
+    assert list((tmp_path / "results").glob("run_*/raw_results.json"))
+
@@ -0,0 +1,137 @@
+# tests/test_server.py
+import http.client
+import json
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.detector import EduHallucinationDetector
+from src.server import DetectionServer, parse_item, RequestError
+
+ITEM = {
+    'question': "What is 6 times 7?",
+    'ai_response': "The answer is 41.",
+    'expected_answer': "42",
+    'question_type': "calculation"
+}
+
+
+@pytest.fixture(scope="module")
+def server():
+    with DetectionServer(port=0) as server:
+        yield server
+
+
+def request(server, method, path, body=None):
+    connection = http.client.HTTPConnection(server.host, server.port, timeout=30)
+    try:
+        connection.request(method, path, body=body if body is None or isinstance(body, bytes) else json.dumps(body))
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def raw_request(server, data: bytes) -> bytes:
+    with socket.create_connection((server.host, server.port), timeout=30) as sock:
+        sock.sendall(data)
+        chunks = []
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+
+def test_detect(server):
+    status, payload = request(server, 'POST', '/detect', ITEM)
+    assert status == 200
+    assert payload['hallucination_detected'] is True
+    assert set(payload) == {'hallucination_detected', 'confidence', 'detection_details'}
+
+
+def test_detect_batch_keeps_order(server):
+    items = [ITEM, {**ITEM, 'ai_response': "The answer is 42."}, {'question': "q", 'ai_answer': "a"}]
+    status, payload = request(server, 'POST', '/detect_batch', {'items': items})
+    assert status == 200
+    assert [result['hallucination_detected'] for result in payload['results']] == [True, False, False]
+
+
+def test_keep_alive_connection_serves_several_requests(server):
+    connection = http.client.HTTPConnection(server.host, server.port, timeout=30)
+    try:
+        for _ in range(3):
+            connection.request('POST', '/detect', body=json.dumps(ITEM))
+            response = connection.getresponse()
+            assert response.status == 200
+            response.read()
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("body", [b"{not json", json.dumps({'question': "q"}).encode(), b'{"items": 3}'])
+def test_bad_requests(server, body):
+    path = '/detect_batch' if b'items' in body else '/detect'
+    status, payload = request(server, 'POST', path, body)
+    assert status == 400
+    assert payload['error']
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5"])
+def test_malformed_content_length(server, length):
+    response = raw_request(server, b"POST /detect HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert b"invalid Content-Length" in response
+
+
+def test_unknown_path_and_wrong_method(server):
+    assert request(server, 'GET', '/nope')[0] == 404
+    assert request(server, 'GET', '/detect')[0] == 405
+    assert request(server, 'POST', '/health', {})[0] == 405
+
+
+def test_health_and_stats(server):
+    _, before = request(server, 'GET', '/stats')
+    request(server, 'POST', '/detect', ITEM)
+    request(server, 'GET', '/nope')
+    status, health = request(server, 'GET', '/health')
+    assert status == 200 and health['status'] == 'ok'
+    status, stats = request(server, 'GET', '/stats')
+    assert status == 200
+    assert stats['answers'] == before['answers'] + 1
+    # The 404 is the only failed request since the first /stats
+    assert stats['errors'] == before['errors'] + 1
+    assert stats['requests'] == before['requests'] + 4
+    assert 'p50' in stats['latency_ms']['detect']
+
+
+def test_parse_item_accepts_result_field_names():
+    assert parse_item({'question': "q", 'ai_answer': "a", 'expected': 5}) == ("q", "a", "5", None)
+    with pytest.raises(RequestError):
+        parse_item({'question': "q"})
+
+
+class PoisonedDetector(EduHallucinationDetector):
+    """Fails every batch containing the answer "poison" """
+
+    def detect_batch(self, questions, ai_responses, *columns):
+        if "poison" in ai_responses:
+            raise RuntimeError("poisoned answer")
+        return super().detect_batch(questions, ai_responses, *columns)
+
+
+def test_a_failing_answer_only_fails_its_own_request():
+    items = [{**ITEM, 'ai_response': "poison" if i == 3 else f"The answer is {40 + i}."} for i in range(8)]
+    # A wait budget so the concurrent requests are coalesced into one batch
+    with DetectionServer(PoisonedDetector(), port=0, max_wait_ms=200) as server:
+        with ThreadPoolExecutor(len(items)) as pool:
+            responses = list(pool.map(lambda item: request(server, 'POST', '/detect', item), items))
+        batch_sizes = server.batcher.batch_sizes.values
+
+    assert max(batch_sizes) > 1
+    assert [status for status, _ in responses] == [500 if i == 3 else 200 for i in range(8)]
+    assert responses[3][1]['error'] == "poisoned answer"
+    # Only 42 is right
+    assert [payload.get('hallucination_detected') for _, payload in responses] == [
+        None if i == 3 else i != 2 for i in range(8)]
@@ -0,0 +1,64 @@
+# tests/test_similarity.py
+import random
+
+import numpy as np
+import pytest
+
+from src.detector import EduHallucinationDetector
+from src.similarity import HashedVectorizer, SemanticIndex
+
+QUESTION = "Which is heavier, a kilogram of feathers or a kilogram of steel?"
+
+
+def test_paraphrase_with_few_shared_words_scores_as_a_match():
+    index = SemanticIndex()
+    paraphrase, contradiction = index.score([
+        ("Both weigh one kilogram", ["They weigh the same"]),
+        ("The steel is heavier", ["They weigh the same"]),
+    ])
+    assert paraphrase >= 0.6
+    assert contradiction < 0.6
+
+
+def test_detector_accepts_the_paraphrase_but_not_its_negation():
+    detector = EduHallucinationDetector()
+    paraphrase = detector.detect_hallucination(QUESTION, "Both weigh one kilogram", "They weigh the same", "trick")
+    negation = detector.detect_hallucination(QUESTION, "They don't weigh the same", "They weigh the same", "trick")
+
+    assert paraphrase.hallucination_detected is False
+    assert paraphrase.detection_details['factual']['semantic_match'] is True
+    assert negation.hallucination_detected is True
+
+
+def test_reference_vectors_are_cached_and_memory_mapped(tmp_path):
+    path = str(tmp_path / "vectors" / "reference")
+    index = SemanticIndex(cache_path=path)
+    pairs = [("It has a mass of one kilogram", ["One kilogram"]), ("The Nile river", ["Nile", "River Nile"])]
+    scores = index.score(pairs)
+    index.save()
+
+    reloaded = SemanticIndex(cache_path=path)
+    assert isinstance(reloaded.stored, np.memmap)
+    assert set(reloaded.rows) == {"One kilogram", "Nile", "River Nile"}
+    assert np.allclose(reloaded.score(pairs), scores)
+    assert reloaded.added_count == 0
+
+    # Vectors from another feature space are not reused
+    assert SemanticIndex(HashedVectorizer(dimensions=256), cache_path=path).rows == {}
+
+
+def test_batched_scores_match_one_pair_at_a_time():
+    rng = random.Random(0)
+    words = "the river nile flows north through egypt into the mediterranean sea past cairo".split()
+    pairs = [(" ".join(rng.choices(words, k=rng.randint(1, 30))), [" ".join(rng.sample(words, 3))])
+             for _ in range(300)]
+    index = SemanticIndex(max_rows=64)
+    batched = index.score(pairs)
+    assert np.allclose(batched, [SemanticIndex().score([pair])[0] for pair in pairs], atol=1e-6)
+    assert index.added_count <= 64
+
+
+def test_cosine_is_one_for_identical_text():
+    vectors = HashedVectorizer().transform(["Mount Everest", "mount everest!", ""])
+    assert np.dot(vectors[0], vectors[1]) == pytest.approx(1.0)
+    assert not vectors[2].any()
@@ -0,0 +1,96 @@
+# tests/test_storage.py
+import json
+
+import pandas as pd
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src import storage
+from src.detector import EduHallucinationDetector
+from src.storage import (PARQUET_FILE, RAW_RESULTS_FILE, flatten_result, load_results,
+                         write_results_csv, write_results_json, write_results_parquet)
+
+ROWS = [
+    ("mathematics", "arithmetic", "easy", "What is 6 times 7?", "42", "It is definitely 41."),
+    ("history", "dates", "medium", "When did World War II end?", "1945", "About 1945, I think."),
+    ("science", "physics", "hard", "What is the speed of light?", "299792458", "Roughly 3e8 m/s."),
+]
+
+
+def results():
+    detector = EduHallucinationDetector()
+    out = []
+    for category, subcategory, difficulty, question, expected, answer in ROWS:
+        detection = detector.detect_hallucination(question, answer, expected, subcategory)
+        out.append({
+            "category": category, "subcategory": subcategory, "difficulty": difficulty,
+            "question": question, "expected_answer": expected, "ai_answer": answer,
+            "hallucination_detected": detection.hallucination_detected,
+            "detection_confidence": detection.confidence,
+            "detection_details": detection.detection_details,
+            "latency_s": 0.5
+        })
+    out.append({"category": "history", "subcategory": "dates", "difficulty": "easy",
+                "question": "When did the Berlin Wall fall?", "expected_answer": "1989",
+                "ai_answer": "ERROR: timeout", "hallucination_detected": None, "error": True, "latency_s": 30.0})
+    return out
+
+
+def test_parquet_round_trip_keeps_types_and_values(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'ROW_GROUP_SIZE', 2)
+    records = results()
+    path = tmp_path / PARQUET_FILE
+    write_results_parquet(records, str(path))
+
+    parquet = pq.ParquetFile(str(path))
+    assert parquet.metadata.num_row_groups == 2
+    table = parquet.read()
+    schema = table.schema
+    assert schema.field('hallucination_detected').type == pa.bool_()
+    assert schema.field('latency_s').type == pa.float64()
+    assert pa.types.is_dictionary(schema.field('category').type)
+    assert schema.field('confidence.markers_found').type == pa.list_(pa.string())
+
+    rows = table.to_pylist()
+    for record, row in zip(records, rows):
+        for column, value in flatten_result(record).items():
+            assert row[column] == value, column
+    assert rows[0]['confidence.markers_found'] == ['definitely']
+    assert rows[3]['hallucination_detected'] is None and rows[3]['error'] is True
+
+
+def test_percent_text_becomes_a_fraction():
+    flat = flatten_result({"detection_details": {"calculation": {"details": {"error_rate": "37.31%"}}}})
+    assert flat == {"calculation.error_rate": pytest.approx(0.3731)}
+    assert flatten_result({"detection_details": {"calculation": {"error_rate": "n/a"}}}) == {
+        "calculation.error_rate": None
+    }
+
+
+def test_load_results_reads_parquet_or_falls_back_to_raw_json(tmp_path):
+    records = results()
+    json_run = tmp_path / "json_run"
+    parquet_run = tmp_path / "parquet_run"
+    json_run.mkdir()
+    parquet_run.mkdir()
+    write_results_json(records, str(json_run / RAW_RESULTS_FILE))
+    write_results_parquet(records, str(parquet_run / PARQUET_FILE))
+
+    columns = ['category', 'hallucination_detected', 'factual.similarity']
+    from_json = load_results(str(json_run), columns)
+    from_parquet = load_results(str(parquet_run), columns)
+    assert from_json.column_names == from_parquet.column_names == columns
+    assert from_json.to_pylist() == from_parquet.to_pylist()
+
+
+def test_streamed_json_and_csv_match_whole_list_writers(tmp_path):
+    records = results()
+    write_results_json(records, str(tmp_path / "streamed.json"))
+    assert (tmp_path / "streamed.json").read_text() == json.dumps(records, indent=2)
+    write_results_json([], str(tmp_path / "empty.json"))
+    assert json.loads((tmp_path / "empty.json").read_text()) == []
+
+    write_results_csv(records, str(tmp_path / "results.csv"))
+    expected = pd.DataFrame(records)
+    assert list(pd.read_csv(tmp_path / "results.csv").columns) == list(expected.columns)
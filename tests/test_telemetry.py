@@ -0,0 +1,73 @@
+# tests/test_telemetry.py
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.telemetry import EXPORT_FORMATS, PERCENTILES, Telemetry
+
+
+def test_stage_percentiles_come_from_a_bounded_histogram():
+    rng = np.random.default_rng(0)
+    durations = rng.lognormal(mean=-4, sigma=1, size=50_000)
+    telemetry = Telemetry()
+    for seconds in durations:
+        telemetry.record('model_call', float(seconds))
+
+    histogram = telemetry.durations['model_call']
+    assert len(histogram.buckets) < 1000
+    stage = telemetry.summary()['stages']['model_call']
+    assert stage['count'] == durations.size
+    assert stage['total_s'] == round(float(durations.sum()), 6)
+    assert stage['max_s'] == round(float(durations.max()), 6)
+    for p, exact in zip(PERCENTILES, np.percentile(durations, PERCENTILES)):
+        assert abs(stage[f'p{p}_s'] - exact) / exact < 0.02
+    assert 'eduguard_stage_seconds_count{stage="model_call"} 50000' in telemetry.to_prometheus()
+
+
+def test_single_duration_percentiles_are_exact():
+    telemetry = Telemetry()
+    telemetry.record('detection', 0.0042)
+    stage = telemetry.stage_summary()['detection']
+    assert stage['p50_s'] == stage['p99_s'] == 0.0042
+
+
+def test_spans_tokens_and_exports(tmp_path):
+    telemetry = Telemetry(trace=True)
+
+    async def call():
+        with telemetry.span('model_call'):
+            await asyncio.sleep(0.01)
+        telemetry.add_usage(SimpleNamespace(input_tokens=10, output_tokens=5))
+        telemetry.count_question()
+
+    async def run():
+        await asyncio.gather(call(), call())
+
+    asyncio.run(run())
+    telemetry.add_usage(None)
+
+    summary = telemetry.summary()
+    assert summary['questions'] == 2
+    assert summary['tokens'] == {'input': 20, 'output': 10, 'total': 30}
+    assert summary['stages']['model_call']['count'] == 2
+    assert summary['stages']['model_call']['p50_s'] >= 0.01
+
+    paths = telemetry.export(str(tmp_path), EXPORT_FORMATS, prefix="run_")
+    assert [os.path.basename(path) for path in paths] == ["run_metrics.prom", "run_trace.json"]
+    prometheus = (tmp_path / "run_metrics.prom").read_text()
+    assert 'eduguard_stage_seconds{stage="model_call",quantile="0.95"}' in prometheus
+    assert 'eduguard_tokens_total{kind="output"} 10' in prometheus
+    events = json.loads((tmp_path / "run_trace.json").read_text())['traceEvents']
+    # Concurrent spans land on their own trace rows
+    assert len(events) == 2 and len({event['tid'] for event in events}) == 2
+
+
+def test_spans_are_only_kept_when_tracing():
+    telemetry = Telemetry()
+    with telemetry.span('detection'):
+        pass
+    assert telemetry.events == []
+    assert telemetry.to_chrome_trace()['traceEvents'] == []
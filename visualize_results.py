@@ -4,6 +4,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 import numpy as np
+from src.storage import load_results
 
 def create_comprehensive_visualizations():
     """Create visualizations for the 65-question dataset results"""
@@ -12,9 +13,11 @@ def create_comprehensive_visualizations():
     with open('results/dataset_tests/run_20250704_092019/summary_statistics.json', 'r') as f:
         stats = json.load(f)
     
-    # Load raw results for detailed analysis
-    with open('results/dataset_tests/run_20250704_092019/raw_results.json', 'r') as f:
-        raw_results = json.load(f)
+    # Load only the result columns the example panel needs
+    raw_results = load_results(
+        'results/dataset_tests/run_20250704_092019',
+        columns=['question', 'ai_answer', 'expected_answer', 'subcategory', 'hallucination_detected']
+    ).to_pylist()
     
     # Set style
     plt.style.use('seaborn-v0_8-darkgrid')